@@ -7,6 +7,13 @@ load_dotenv()
 # Supabase configuration
 SUPABASE_URL =os.getenv('SUPABASE_URL')
 SUPABASE_API_KEY =os.getenv('SUPABASE_API_KEY')
+SUPABASE_TIMEOUT = float(os.getenv('SUPABASE_TIMEOUT', '10'))  # Seconds per PostgREST request
+
+# Twilio configuration
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+ADMIN_PHONE_NUMBER = os.getenv("ADMIN_PHONE_NUMBER")
 
 
 SAFE_EXIT_ROUTES = {
@@ -14,3 +21,116 @@ SAFE_EXIT_ROUTES = {
     # "Central Plaza": "https://maps.google.com/?q=19.54321,72.12345",
     # "Food Court": "https://maps.google.com/?q=19.98765,72.45678"
 }
+
+# Camera registry: JSON list of {"id", "source", "location", "grid", "center"}
+# plus an optional "calibration" (see models/calibration.py), "lines", gate
+# lines for flow counts (see models/tracker.py), and "rules", the camera's own
+# alert rules (see models/alert_rules.py).
+# Relative sources are resolved against backend/app.
+CAMERAS_FILE = os.getenv('CAMERAS_FILE', 'cameras.json')
+
+# Motion gating: skip YOLO when no grid cell changed by more than
+# MOTION_THRESHOLD (fraction of foreground pixels), but always refresh
+# detections at least every MOTION_MAX_INTERVAL seconds.
+MOTION_THRESHOLD = float(os.getenv('MOTION_THRESHOLD', '0.02'))
+MOTION_MAX_INTERVAL = float(os.getenv('MOTION_MAX_INTERVAL', '5'))
+
+# Write-behind persistence: rows are queued by the frame loop and inserted in
+# bulk by a background writer; batches that cannot be delivered are spooled
+# to a local SQLite file and replayed once Supabase is reachable again. The
+# spool keeps at most PERSIST_SPOOL_MAX_ROWS rows, evicting the oldest; rows
+# Supabase rejects outright go to its dead-letter table instead of the spool.
+PERSIST_QUEUE_SIZE = int(os.getenv('PERSIST_QUEUE_SIZE', '10000'))
+PERSIST_BATCH_SIZE = int(os.getenv('PERSIST_BATCH_SIZE', '200'))
+PERSIST_FLUSH_INTERVAL = float(os.getenv('PERSIST_FLUSH_INTERVAL', '5'))
+PERSIST_SPOOL_PATH = os.getenv('PERSIST_SPOOL_PATH', 'spool/persistence.sqlite3')
+PERSIST_SPOOL_MAX_ROWS = int(os.getenv('PERSIST_SPOOL_MAX_ROWS', '100000'))
+
+# Alert snapshots: disk budget per camera (oldest files are pruned first)
+# and whether to also store a thumbnail of the offending grid cell. Its path
+# is saved with the alert, so ALERT_THUMBNAILS needs a thumbnail_path text
+# column on the alerts table.
+ALERT_RETENTION_MB = float(os.getenv('ALERT_RETENTION_MB', '500'))
+ALERT_THUMBNAILS = os.getenv('ALERT_THUMBNAILS', '0') == '1'
+
+# Detector model: size n/s/m/l picks yolov8<size>.pt (YOLO_WEIGHTS overrides
+# with an explicit path), YOLO_IMGSZ is the inference input size and
+# YOLO_WARMUP the number of dummy inferences run right after loading.
+YOLO_MODEL_SIZE = os.getenv('YOLO_MODEL_SIZE', 'l')
+YOLO_WEIGHTS = os.getenv('YOLO_WEIGHTS')
+YOLO_IMGSZ = int(os.getenv('YOLO_IMGSZ', '640'))
+YOLO_WARMUP = int(os.getenv('YOLO_WARMUP', '1'))
+
+# Inference backend: "ultralytics" (PyTorch), "onnxruntime" or "openvino".
+# Exported backends read DETECTOR_MODEL (an .onnx file or an OpenVINO
+# model directory / .xml); DETECTOR_THREADS caps CPU threads (0 = default).
+DETECTOR_BACKEND = os.getenv('DETECTOR_BACKEND', 'ultralytics')
+DETECTOR_MODEL = os.getenv('DETECTOR_MODEL')
+DETECTOR_THREADS = int(os.getenv('DETECTOR_THREADS', '0'))
+
+# Offline analysis jobs for uploaded videos: worker processes and how many
+# frames each task covers.
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', str(max(1, (os.cpu_count() or 2) // 2))))
+JOB_CHUNK_FRAMES = int(os.getenv('JOB_CHUNK_FRAMES', '300'))
+
+# Logging: LOG_LEVEL as in the logging module (INFO logs nothing per frame),
+# LOG_FORMAT "text" or "json", and per-frame DEBUG messages are only written
+# for one frame in LOG_SAMPLE_EVERY.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', '100'))
+
+# Capture threads: how many decoded frames a file source may read ahead,
+# whether looping files are paced to their own frame rate like a camera,
+# and the longest wait between reconnect attempts for a lost source.
+CAPTURE_RING_SIZE = int(os.getenv('CAPTURE_RING_SIZE', '8'))
+CAPTURE_FILE_REALTIME = os.getenv('CAPTURE_FILE_REALTIME', '1') == '1'
+CAPTURE_RECONNECT_MAX = float(os.getenv('CAPTURE_RECONNECT_MAX', '30'))
+
+# Tracking: the detector runs on every DETECTOR_STRIDE-th frame (motion gate
+# permitting) and the tracker predicts boxes in between. Detections continue
+# a track if they overlap it by TRACK_IOU_THRESHOLD or, failing that, lie
+# within reach of someone moving TRACK_MAX_SPEED box heights per second since
+# the track was last seen. Tracks missing for
+# TRACK_MAX_AGE seconds end, and only tracks seen TRACK_MIN_HITS times count
+# towards line crossings and dwell times.
+DETECTOR_STRIDE = max(1, int(os.getenv('DETECTOR_STRIDE', '1')))
+TRACK_IOU_THRESHOLD = float(os.getenv('TRACK_IOU_THRESHOLD', '0.3'))
+TRACK_MAX_SPEED = float(os.getenv('TRACK_MAX_SPEED', '2'))
+TRACK_MAX_AGE = float(os.getenv('TRACK_MAX_AGE', '2'))
+TRACK_MIN_HITS = int(os.getenv('TRACK_MIN_HITS', '2'))
+
+# Alert rules and notifications: ALERT_RULES_FILE (a JSON list, see
+# models/alert_rules.py) replaces the built-in rules for cameras without their
+# own; a rule re-arms once its value falls below ALERT_HYSTERESIS of its
+# threshold. Alerts raised by the frame loop are only sent by SMS with
+# ALERT_NOTIFY=1, and forecast rules only with their own "notify": true;
+# otherwise only the /send_alert(s) routes send. NOTIFIER is "twilio" or
+# "stub" (in-memory, for local runs); messages within NOTIFY_DIGEST_SECONDS of the last send are combined into
+# one digest and at most NOTIFY_RATE_PER_MINUTE messages go out overall.
+ALERT_RULES_FILE = os.getenv('ALERT_RULES_FILE', 'alert_rules.json')
+ALERT_HYSTERESIS = float(os.getenv('ALERT_HYSTERESIS', '0.8'))
+ALERT_NOTIFY = os.getenv('ALERT_NOTIFY', '0') == '1'
+NOTIFIER = os.getenv('NOTIFIER', 'twilio' if TWILIO_ACCOUNT_SID else 'stub')
+NOTIFY_DIGEST_SECONDS = float(os.getenv('NOTIFY_DIGEST_SECONDS', '60'))
+NOTIFY_RATE_PER_MINUTE = float(os.getenv('NOTIFY_RATE_PER_MINUTE', '6'))
+
+# Tiled inference: cameras with "tiling" in cameras.json are split into
+# TILE_SIZE pixel crops overlapping by TILE_OVERLAP, plus one whole-frame pass
+# with TILE_FULL_FRAME; "roi" polygons there limit detection to part of the
+# view. DETECTOR_WORKERS > 1 runs the crops of one batch on that many threads
+# (only for detectors that allow it, i.e. onnxruntime).
+TILE_SIZE = int(os.getenv('TILE_SIZE', '640'))
+TILE_OVERLAP = float(os.getenv('TILE_OVERLAP', '0.2'))
+TILE_FULL_FRAME = os.getenv('TILE_FULL_FRAME', '1') == '1'
+DETECTOR_WORKERS = max(1, int(os.getenv('DETECTOR_WORKERS', '1')))
+
+# Video uploads: clients send files in UPLOAD_CHUNK_SIZE byte chunks, each
+# with its SHA-256, and resume after a dropped connection by re-sending the
+# missing ones; unfinished uploads are removed after UPLOAD_EXPIRE_HOURS.
+# Uploaded videos are probed once and listed from the index at
+# VIDEO_INDEX_PATH (relative paths are under backend/app).
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', str(20 * 1024 ** 3)))
+UPLOAD_EXPIRE_HOURS = float(os.getenv('UPLOAD_EXPIRE_HOURS', '24'))
+VIDEO_INDEX_PATH = os.getenv('VIDEO_INDEX_PATH', 'uploads/.index/videos.sqlite3')
@@ -5,6 +5,8 @@ from routes.alerts import alerts_bp
 from routes.fetch_crowd_data import crowd_bp
 from routes.heatmap import heatmap_bp
 from routes.videos import videos_bp
+from routes.jobs import jobs_bp
+from routes.metrics import metrics_bp
 app = Flask(__name__)
 CORS(app)  # Allow frontend to make API calls
 
@@ -14,6 +16,8 @@ app.register_blueprint(alerts_bp, url_prefix="/api/alerts")
 app.register_blueprint(crowd_bp,url_prefix="/api/crowd")
 app.register_blueprint(heatmap_bp)
 app.register_blueprint(videos_bp, url_prefix="/api/videos")
+app.register_blueprint(jobs_bp, url_prefix="/api/jobs")
+app.register_blueprint(metrics_bp)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+# models/alert_rules.py
+import json
+import os
+from threading import Lock
+
+import numpy as np
+
+from config import ALERT_HYSTERESIS, ALERT_NOTIFY, ALERT_RULES_FILE
+from models.grid import CellAlertState
+
+APP_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/app
+CELL_DENSITY_THRESHOLD = 2  # People per sqm in one grid cell
+COOLDOWN_TIME = 120  # 2 minutes cooldown
+FORECAST_MINUTES = 5  # Default look-ahead of forecast rules
+
+# Values the pipeline provides per frame; cell metrics are (rows, cols) arrays,
+# view metrics single numbers. Forecast metrics only exist on frames that
+# close a forecaster step.
+CELL_METRICS = ("cell_density", "cell_people", "forecast_cell_density")
+VIEW_METRICS = ("density", "people")
+
+DEFAULT_RULES = (
+    {"name": "density", "metric": "cell_density", "above": CELL_DENSITY_THRESHOLD,
+     "message": "High crowd density detected!"},
+    {"name": "forecast", "metric": "forecast_cell_density", "above": CELL_DENSITY_THRESHOLD,
+     "minutes": FORECAST_MINUTES, "notify": False,
+     "message": f"Crowd density forecast to exceed the limit within {FORECAST_MINUTES} minutes"},
+)
+
+
+class AlertRule:
+    """Fire when `metric` rises above `above`; re-arm once it falls below
+    `clear_below` (ALERT_HYSTERESIS of `above` by default) and `cooldown`
+    seconds have passed. `minutes` is the look-ahead of forecast metrics.
+    Alerts are always recorded; `notify` also sends them to the admin by
+    SMS, and defaults to ALERT_NOTIFY for live rules and off for forecasts."""
+
+    def __init__(self, name, metric, above, clear_below=None, cooldown=COOLDOWN_TIME, notify=None, message=None,
+                 minutes=FORECAST_MINUTES):
+        if metric not in CELL_METRICS + VIEW_METRICS:
+            raise ValueError(f"Unknown alert metric {metric!r}")
+        self.name = name
+        self.metric = metric
+        self.above = float(above)
+        self.clear_below = self.above * ALERT_HYSTERESIS if clear_below is None else float(clear_below)
+        self.cooldown = float(cooldown)
+        self.notify = bool(notify) if notify is not None else ALERT_NOTIFY and not self.predictive
+        self.message = message or f"{name}: {metric} above {above:g}"
+        self.minutes = float(minutes)
+
+    @classmethod
+    def from_dict(cls, data):
+        """{"name", "metric", "above"} plus optional "clear_below", "cooldown",
+        "notify", "message" and "minutes"."""
+        return cls(**{key: data[key] for key in ("name", "metric", "above", "clear_below", "cooldown", "notify",
+                                                  "message", "minutes") if key in data})
+
+    @property
+    def per_cell(self):
+        return self.metric in CELL_METRICS
+
+    @property
+    def predictive(self):
+        return self.metric.startswith("forecast_")
+
+
+class RuleEngine:
+    """Evaluates one camera's rules, each with its own per-cell alert state."""
+
+    def __init__(self, rules, grid_size):
+        self.rules = list(rules)
+        self.states = [CellAlertState(grid_size if rule.per_cell else (), rule.above, rule.cooldown, rule.clear_below)
+                       for rule in self.rules]
+
+    def forecast_minutes(self):
+        """Look-aheads the forecast rules need, so the pipeline only computes those."""
+        return sorted({rule.minutes for rule in self.rules if rule.predictive})
+
+    def evaluate(self, values, now):
+        """[(rule, cells), ...] for the rules that fired.
+
+        `values` maps metric names to arrays, and (metric, minutes) to forecast
+        arrays; rules whose value is missing are skipped without touching
+        their state. `cells` is a (K, 2) array of (row, col) for cell rules
+        and a (1, 0) array for view rules.
+        """
+        fired = []
+        for rule, state in zip(self.rules, self.states):
+            value = values.get((rule.metric, rule.minutes) if rule.predictive else rule.metric)
+            if value is None:
+                continue
+            value = np.asarray(value, dtype=np.float64)
+            live = values.get(rule.metric[len("forecast_"):]) if rule.predictive else None
+            if live is not None:
+                # Only cells still under the threshold; live rules cover the rest
+                value = np.where(np.asarray(live) <= rule.above, value, 0)
+            cells = state.check(value, now)
+            if len(cells):
+                fired.append((rule, cells))
+        return fired
+
+
+_default_rules = None
+_default_rules_lock = Lock()
+
+
+def default_rules(path=ALERT_RULES_FILE):
+    """Rules for cameras without their own: ALERT_RULES_FILE if present, else DEFAULT_RULES."""
+    global _default_rules
+    with _default_rules_lock:
+        if _default_rules is None:
+            if not os.path.isabs(path):
+                path = os.path.join(APP_DIR, path)
+            if os.path.isfile(path):
+                with open(path) as f:
+                    _default_rules = [AlertRule.from_dict(entry) for entry in json.load(f)]
+            else:
+                _default_rules = [AlertRule.from_dict(entry) for entry in DEFAULT_RULES]
+        return list(_default_rules)
@@ -0,0 +1,146 @@
+# models/calibration.py
+import cv2
+import numpy as np
+
+BLOCK = 16  # Pixel block size of the lat/lon lookup tables
+CELL_SAMPLES = 8  # Sub-quads per cell side when integrating ground area
+METRES_PER_DEG_LAT = 110540.0
+METRES_PER_DEG_LON = 111320.0  # At the equator; scaled by cos(latitude)
+
+
+def to_local_metres(lat, lon, origin):
+    """(east, north) metres of lat/lon around `origin` (equirectangular, fine at venue scale)."""
+    lat0, lon0 = origin
+    east = (np.asarray(lon) - lon0) * METRES_PER_DEG_LON * np.cos(np.radians(lat0))
+    north = (np.asarray(lat) - lat0) * METRES_PER_DEG_LAT
+    return east, north
+
+
+def to_lat_lon(east, north, origin):
+    lat0, lon0 = origin
+    lat = lat0 + np.asarray(north) / METRES_PER_DEG_LAT
+    lon = lon0 + np.asarray(east) / (METRES_PER_DEG_LON * np.cos(np.radians(lat0)))
+    return lat, lon
+
+
+class CalibrationTables:
+    """Lookup arrays for one frame size and grid.
+
+    cell_area is square metres of ground per grid cell (inf where the cell is
+    above the horizon, so its density reads 0); lat/lon hold the position of
+    each BLOCK x BLOCK pixel block, and cell_lat/cell_lon each cell's centre.
+    """
+
+    def __init__(self, cell_area, lat, lon, cell_lat, cell_lon):
+        self.cell_area = cell_area
+        self.lat = lat
+        self.lon = lon
+        self.cell_lat = cell_lat
+        self.cell_lon = cell_lon
+        finite = cell_area[np.isfinite(cell_area)]
+        self.total_area = float(finite.sum()) if finite.size else 0.0
+
+    def geolocate(self, x, y):
+        """lat, lon arrays for pixel coordinate arrays x, y."""
+        by = np.clip((np.asarray(y) // BLOCK).astype(np.intp), 0, self.lat.shape[0] - 1)
+        bx = np.clip((np.asarray(x) // BLOCK).astype(np.intp), 0, self.lat.shape[1] - 1)
+        return self.lat[by, bx], self.lon[by, bx]
+
+
+def _block_centres(frame_size):
+    width, height = frame_size
+    xs = np.arange(0, width, BLOCK) + BLOCK / 2
+    ys = np.arange(0, height, BLOCK) + BLOCK / 2
+    return np.meshgrid(xs, ys)
+
+
+def _cell_centres(frame_size, grid_size):
+    width, height = frame_size
+    rows, cols = grid_size
+    return np.meshgrid((np.arange(cols) + 0.5) * width / cols, (np.arange(rows) + 0.5) * height / rows)
+
+
+def flat_tables(frame_size, grid_size, map_center, total_area):
+    """Tables for an uncalibrated camera: the old evenly split area and linear offsets."""
+    width, height = frame_size
+    rows, cols = grid_size
+
+    def linear(x, y):
+        return (map_center[0] + (y / height - 0.5) * 0.0005, map_center[1] + (x / width - 0.5) * 0.0005)
+
+    lat, lon = linear(*_block_centres(frame_size))
+    cell_lat, cell_lon = linear(*_cell_centres(frame_size, grid_size))
+    return CalibrationTables(np.full((rows, cols), total_area / (rows * cols)), lat, lon, cell_lat, cell_lon)
+
+
+class Calibration:
+    """Image-to-ground homography for one camera.
+
+    `homography` maps pixels of an `image_size` frame to (east, north)
+    metres around `origin` (lat, lon). Frames of another size are scaled to
+    it. compile() turns it into CalibrationTables once per frame size.
+    """
+
+    def __init__(self, homography, origin, image_size):
+        self.homography = np.asarray(homography, dtype=np.float64).reshape(3, 3)
+        self.origin = (float(origin[0]), float(origin[1]))
+        self.image_size = (int(image_size[0]), int(image_size[1]))
+
+    @classmethod
+    def from_dict(cls, data, map_center):
+        """Either {"homography": 3x3, "origin": [lat, lon]} or at least four
+        {"points": [[x, y, lat, lon], ...]} reference points; both with "image_size": [w, h]."""
+        image_size = data["image_size"]
+        if "homography" in data:
+            return cls(data["homography"], data.get("origin", map_center), image_size)
+
+        points = np.asarray(data["points"], dtype=np.float64)
+        if len(points) < 4:
+            raise ValueError("Calibration needs at least 4 reference points")
+        origin = (float(points[:, 2].mean()), float(points[:, 3].mean()))
+        east, north = to_local_metres(points[:, 2], points[:, 3], origin)
+        homography, _ = cv2.findHomography(points[:, :2], np.stack([east, north], axis=1))
+        if homography is None:
+            raise ValueError("Calibration points are degenerate (collinear or repeated)")
+        return cls(homography, origin, image_size)
+
+    def to_dict(self):
+        return {"homography": self.homography.tolist(), "origin": list(self.origin), "image_size": list(self.image_size)}
+
+    def _project(self, x, y, frame_size):
+        """Ground (east, north, valid) for pixel arrays in a frame of `frame_size`."""
+        sx = self.image_size[0] / frame_size[0]
+        sy = self.image_size[1] / frame_size[1]
+        h = self.homography
+        px, py = np.asarray(x) * sx, np.asarray(y) * sy
+        w = h[2, 0] * px + h[2, 1] * py + h[2, 2]
+        valid = w > 1e-9  # Points at or beyond the horizon have no ground position
+        w = np.where(valid, w, 1.0)
+        east = (h[0, 0] * px + h[0, 1] * py + h[0, 2]) / w
+        north = (h[1, 0] * px + h[1, 1] * py + h[1, 2]) / w
+        return east, north, valid
+
+    def compile(self, frame_size, grid_size):
+        width, height = frame_size
+        rows, cols = grid_size
+
+        # Ground area per cell: project a fine mesh and sum its quads (shoelace),
+        # so perspective inside a cell is accounted for
+        xs = np.linspace(0, width, cols * CELL_SAMPLES + 1)
+        ys = np.linspace(0, height, rows * CELL_SAMPLES + 1)
+        gx, gy = np.meshgrid(xs, ys)
+        east, north, valid = self._project(gx, gy, frame_size)
+        corners = [(slice(None, -1), slice(None, -1)), (slice(None, -1), slice(1, None)),
+                   (slice(1, None), slice(1, None)), (slice(1, None), slice(None, -1))]
+        e = [east[c] for c in corners]
+        n = [north[c] for c in corners]
+        quad = 0.5 * np.abs(sum(e[i] * n[(i + 1) % 4] - e[(i + 1) % 4] * n[i] for i in range(4)))
+        quad_valid = np.logical_and.reduce([valid[c] for c in corners])
+        quad = np.where(quad_valid, quad, np.inf)
+        cell_area = quad.reshape(rows, CELL_SAMPLES, cols, CELL_SAMPLES).sum(axis=(1, 3))
+
+        bx, by = _block_centres(frame_size)
+        lat, lon = to_lat_lon(*self._project(bx, by, frame_size)[:2], self.origin)
+        cx, cy = _cell_centres(frame_size, grid_size)
+        cell_lat, cell_lon = to_lat_lon(*self._project(cx, cy, frame_size)[:2], self.origin)
+        return CalibrationTables(cell_area, lat, lon, cell_lat, cell_lon)
@@ -0,0 +1,340 @@
+# models/camera_pipeline.py
+import time
+from datetime import datetime
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from config import DETECTOR_STRIDE
+from models.videodata import insert_crowd_data
+from models.insertalertdata import insert_alert_data
+from models.alert_rules import RuleEngine, default_rules
+from models.calibration import flat_tables
+from models.congestion_predictor import get_forecaster
+from models.grid import PERSON_CLASS, bin_people
+from models.heatmap_accumulator import get_heatmap
+from models.logs import Sampler, get_logger
+from models.metrics import ALERTS, FRAME_AGE, FRAMES_PROCESSED, GLASS_TO_ALERT, STAGE_SECONDS
+from models.mjpeg import RenderedFrame
+from models.motion_gate import MotionGate
+from models.notifier import get_dispatcher
+from models.snapshots import get_snapshot_writer
+from models.tiling import CropPlan
+from models.timeseries import get_series
+from models.tracker import Tracker
+
+# Constants
+CONF_THRESHOLD = 0.0001
+CROWD_UPDATE_INTERVAL = 30  # Update crowd data every 30 seconds
+ALERT_MESSAGE = "High crowd density detected!"
+
+log = get_logger("pipeline")
+
+# Latest risk level per camera id, read by /risk-analysis
+RISK_ORDER = ("Low", "Medium", "High")
+risk_levels = {}
+risk_lock = Lock()
+
+
+def classify_risk(density_per_sqm):
+    return "Low" if density_per_sqm < 2 else "Medium" if density_per_sqm < 4 else "High"
+
+
+def estimate_camera_height(person_pixel_height, known_person_height=1.7, frame_height=1080):
+    if person_pixel_height == 0:
+        return None
+    return (known_person_height * frame_height) / person_pixel_height
+
+
+def compute_real_world_area(camera_height):
+    if camera_height is None:
+        return 50  # Default area
+    return (2 * camera_height) ** 2
+
+
+class CameraPipeline:
+    """Per-camera post-processing of detector output.
+
+    Holds everything that used to live as locals of detect_crowd (alert
+    cooldowns, camera height estimate, time series) so several cameras can
+    share one inference loop without sharing state.
+    """
+
+    def __init__(self, camera):
+        self.camera = camera
+        self.rules = RuleEngine(camera.rules if camera.rules is not None else default_rules(), camera.grid_size)
+        self.forecaster = get_forecaster(camera.id, camera.grid_size)
+        self.camera_height = None
+        self.last_update_time = time.time()
+        self.series = get_series(camera.id)
+        self.heatmap = get_heatmap(camera.id)
+        self.risk_level = "Low"
+        self.gate = MotionGate(camera.grid_size)
+        self.tracker = Tracker(camera.lines, source=camera.id)
+        self.stride = DETECTOR_STRIDE
+        self._since_inference = 0
+        self._last_boxes = None
+        self._overlay = None  # (person boxes, grid counts) of the last processed frame
+        self.stage_seconds = {}  # Cumulative time per stage, for benchmarks
+        self._tables = None
+        self._tables_key = None
+        self._plan = None
+        self._frame_log = Sampler(log)
+
+    def needs_inference(self, frame):
+        """Whether to run the model on `frame`: at most every `stride` frames, and
+        only if the motion gate sees enough change. The tracker fills the gaps."""
+        self._since_inference += 1
+        if self._last_boxes is not None and self._since_inference < self.stride:
+            return False
+        infer = self.gate.should_infer(frame) or self._last_boxes is None
+        if infer:
+            self._since_inference = 0
+        return infer
+
+    def crop_plan(self, frame):
+        """The camera's CropPlan for this frame size, built once."""
+        frame_height, frame_width = frame.shape[:2]
+        if self._plan is None or self._plan.frame_size != (frame_width, frame_height):
+            self._plan = CropPlan((frame_width, frame_height), self.camera.roi, self.camera.tiling)
+        return self._plan
+
+    def inference_crops(self, frame):
+        """Images to send to the detector for `frame`; just the frame unless the
+        camera has a region of interest or tiling."""
+        return self.crop_plan(frame).crops(frame)
+
+    def merge_detections(self, frame, parts):
+        """One Detections in frame pixels from the results for inference_crops(frame)."""
+        return self.crop_plan(frame).merge(parts)
+
+    def record(self, stage, seconds):
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        STAGE_SECONDS.observe(seconds, source=self.camera.id, stage=stage)
+
+    def lap(self, stage, started):
+        """Record the time since `started` (perf_counter) against `stage`; returns now."""
+        now = time.perf_counter()
+        self.record(stage, now - started)
+        return now
+
+    def tables(self, frame_width, frame_height):
+        """Area and lat/lon lookup tables for this frame size, compiled once.
+
+        Uncalibrated cameras get the flat fallback, rebuilt only when the
+        camera height estimate first becomes available.
+        """
+        calibrated = self.camera.calibration is not None
+        key = (frame_width, frame_height, None if calibrated else self.camera_height)
+        if key != self._tables_key:
+            if calibrated:
+                self._tables = self.camera.calibration.compile((frame_width, frame_height), self.camera.grid_size)
+            else:
+                self._tables = flat_tables((frame_width, frame_height), self.camera.grid_size, self.camera.map_center,
+                                           compute_real_world_area(self.camera_height))
+            self._tables_key = key
+        return self._tables
+
+    def map_pixel_to_gps(self, x, y, frame_width, frame_height):
+        return self.tables(frame_width, frame_height).geolocate(x, y)
+
+    def handle_alert(self, frame, location, grid_x, grid_y, people_count, density_per_sqm, latitude, longitude, cell=None,
+                     captured_at=None, message=ALERT_MESSAGE, risk_level=None, notify=False):
+        if risk_level is None:
+            self._set_risk(classify_risk(density_per_sqm))
+            risk_level = self.risk_level
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if notify:
+            # Queued for the notifier worker, which batches bursts into digests
+            get_dispatcher().notify(f"{message} at {location}: {int(people_count)} people, "
+                                    f"{float(density_per_sqm):.2f}/sqm ({risk_level} risk)")
+
+        def on_saved(image_path, thumbnail_path):
+            log.info("%s at %s, image saved: %s", message, location, image_path)
+            insert_alert_data(
+                location=location,
+                grid_x=grid_x,
+                grid_y=grid_y,
+                message=message,
+                image_path=image_path,
+                people_count=int(people_count),
+                density_per_sqm=float(density_per_sqm),
+                risk_level=risk_level,
+                latitude=float(latitude),
+                longitude=float(longitude),
+                timestamp=timestamp,
+                thumbnail_path=thumbnail_path,
+            )
+            if captured_at is not None:
+                GLASS_TO_ALERT.observe(time.time() - captured_at, source=self.camera.id)
+
+        # Encoding and disk I/O happen on the snapshot pool, not in the frame loop
+        get_snapshot_writer().submit(self.camera.id, frame, cell=cell, on_saved=on_saved)
+
+    def _cell_box(self, x, y, frame_width, frame_height):
+        rows, cols = self.camera.grid_size
+        return (x * frame_width / cols, y * frame_height / rows,
+                (x + 1) * frame_width / cols, (y + 1) * frame_height / rows)
+
+    def _raise_alerts(self, frame, values, grid_counts, tables, captured_at, now):
+        frame_height, frame_width = frame.shape[:2]
+        cell_density = values["cell_density"]
+        for rule, cells in self.rules.evaluate(values, now):
+            if not rule.per_cell:
+                # View-wide rules are reported at the busiest cell
+                cells = [np.unravel_index(np.argmax(cell_density), cell_density.shape)]
+            for y, x in cells:
+                density = values[(rule.metric, rule.minutes)][y, x] if rule.predictive else cell_density[y, x]
+                ALERTS.inc(source=self.camera.id, kind=rule.name)
+                self.handle_alert(
+                    frame,
+                    f"{self.camera.location} (Grid {x},{y})",
+                    int(x),
+                    int(y),
+                    grid_counts[y, x],
+                    density,
+                    tables.cell_lat[y, x],
+                    tables.cell_lon[y, x],
+                    cell=self._cell_box(x, y, frame_width, frame_height),
+                    captured_at=captured_at,
+                    message=rule.message,
+                    # Forecasts bring their own (predicted) risk level and leave the live one alone
+                    risk_level=classify_risk(density) if rule.predictive else None,
+                    notify=rule.notify,
+                )
+
+    def _set_risk(self, level):
+        self.risk_level = level
+        with risk_lock:
+            risk_levels[self.camera.id] = level
+
+    def draw_people(self, frame, person_boxes):
+        frame_height, frame_width = frame.shape[:2]
+        centres = (person_boxes[:, 0:2] + person_boxes[:, 2:4]) * 0.5
+        latitudes, longitudes = self.map_pixel_to_gps(centres[:, 0], centres[:, 1], frame_width, frame_height)
+        for (x1, y1, x2, y2), latitude, longitude in zip(person_boxes.astype(int).tolist(), latitudes, longitudes):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, "Person", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+            cv2.putText(frame, f"Lat: {latitude:.5f}, Lon: {longitude:.5f}", (x1, y2 + 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
+
+    def draw_grid(self, frame, grid_counts):
+        # Grid lines instead of one rectangle per cell, and labels only for
+        # occupied cells, so fine grids don't cost hundreds of draw calls
+        rows, cols = grid_counts.shape
+        frame_height, frame_width = frame.shape[:2]
+        for x in np.linspace(0, frame_width, cols + 1).astype(int):
+            cv2.line(frame, (x, 0), (x, frame_height), (255, 0, 0), 2)
+        for y in np.linspace(0, frame_height, rows + 1).astype(int):
+            cv2.line(frame, (0, y), (frame_width, y), (255, 0, 0), 2)
+        for y, x in np.argwhere(grid_counts):
+            cv2.putText(frame, f"{grid_counts[y, x]}",
+                        (int(x * frame_width / cols) + 10, int(y * frame_height / rows) + 30),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
+
+    def render(self, frame):
+        """Draw the last processed frame's overlay onto `frame` for the video clients.
+
+        Only needed while someone watches the video; analytics run without it.
+        """
+        started = time.perf_counter()
+        person_boxes, grid_counts = self._overlay
+        self.draw_people(frame, person_boxes)
+        self.draw_grid(frame, grid_counts)
+        self.lap("annotate", started)
+        return RenderedFrame(frame)
+
+    def process(self, frame, detections, captured_at=None):
+        """Count, score and raise alerts for one native-resolution frame.
+
+        `detections` may be None when the stride or motion gate skipped inference,
+        in which case the tracker's predicted boxes are used. `captured_at` is when the
+        frame was decoded, for latency metrics. `frame` is not modified; call
+        render() afterwards for the annotated video. Returns the grid snapshot.
+        """
+        rows, cols = self.camera.grid_size
+        frame_height, frame_width = frame.shape[:2]
+        current_time = time.time()
+        lap = time.perf_counter()
+
+        people = None
+        if detections is not None:
+            self._last_boxes = detections
+            people = detections.xyxy[detections.cls == PERSON_CLASS]
+        tracked = self.tracker.step(captured_at or current_time, (frame_width, frame_height), people)
+        lap = self.lap("track", lap)
+        grid_counts, person_boxes = bin_people(tracked, np.full(len(tracked), PERSON_CLASS),
+                                               (frame_width, frame_height), (rows, cols))
+        person_count = len(person_boxes)
+
+        self.heatmap.add((person_boxes[:, 0:2] + person_boxes[:, 2:4]) * 0.5, (frame_width, frame_height), current_time)
+
+        if self.camera.calibration is None and self.camera_height is None and person_count:
+            self.camera_height = estimate_camera_height(int(person_boxes[0, 3]) - int(person_boxes[0, 1]),
+                                                        frame_height=frame_height)
+
+        tables = self.tables(frame_width, frame_height)
+        real_world_area = tables.total_area
+        density_per_sqm = person_count / real_world_area if real_world_area else 0.0
+        occupancy = person_count
+
+        self._set_risk(classify_risk(density_per_sqm))
+
+        cell_density = grid_counts / tables.cell_area
+        self._overlay = (person_boxes, grid_counts)
+        lap = self.lap("bin", lap)
+
+        values = {"cell_density": cell_density, "cell_people": grid_counts, "density": density_per_sqm,
+                  "people": person_count}
+        # The forecaster folds every frame into a step; forecast rules are checked once per step
+        if self.forecaster.add(current_time, cell_density, density_per_sqm):
+            for minutes in self.rules.forecast_minutes():
+                forecast = self.forecaster.cells.forecast(minutes * 60)
+                if forecast is not None:
+                    values[("forecast_cell_density", minutes)] = forecast[0]
+        self._raise_alerts(frame, values, grid_counts, tables, captured_at, current_time)
+        lap = self.lap("alert_check", lap)
+
+        # Grid snapshot for real-time map consumers
+        snapshot = {
+            "camera": self.camera.id,
+            "location": self.camera.location,
+            "timestamp": datetime.now().isoformat(),
+            "grid_counts": grid_counts.tolist(),
+            "grid_size": {"rows": rows, "cols": cols},
+            "frame": {"width": frame_width, "height": frame_height},
+            "people_count": int(person_count),
+            "density_per_sqm": float(density_per_sqm),
+            "risk_level": self.risk_level,
+        }
+
+        self.series.add(current_time, density=density_per_sqm, occupancy=occupancy)
+        if time.time() - self.last_update_time >= CROWD_UPDATE_INTERVAL:
+            # Each row carries only the samples added since the previous row
+            new_samples = self.series.drain_new()
+            insert_crowd_data(
+                location=self.camera.location,
+                people_count=person_count,
+                area_sqm=real_world_area,
+                density_over_time=new_samples["density"],
+                occupancy_over_time=new_samples["occupancy"]
+            )
+
+            self.last_update_time = time.time()
+        self.lap("persist", lap)
+        FRAMES_PROCESSED.inc(source=self.camera.id)
+        if captured_at is not None:
+            FRAME_AGE.observe(time.time() - captured_at, source=self.camera.id)
+        self._frame_log.log("camera=%s people=%d density=%.3f risk=%s", self.camera.id, person_count,
+                            density_per_sqm, self.risk_level, camera=self.camera.id, people=int(person_count))
+
+        return snapshot
+
+
+def overall_risk():
+    """Worst risk level across cameras plus the per-camera breakdown."""
+    with risk_lock:
+        levels = dict(risk_levels)
+    worst = max(levels.values(), key=RISK_ORDER.index, default="Low")
+    return worst, levels
@@ -0,0 +1,117 @@
+# models/cameras.py
+import json
+import os
+from threading import Lock
+
+from config import CAMERAS_FILE
+from models.alert_rules import AlertRule
+from models.calibration import Calibration
+from models.roi import RegionOfInterest
+from models.tiling import Tiling
+from models.tracker import CountLine
+
+APP_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/app
+DEFAULT_GRID_SIZE = (3, 3)
+DEFAULT_MAP_CENTER = (19.0760, 72.8777)  # Example GPS coordinate for Mumbai
+
+
+class Camera:
+    """One video source with its own location label, grid and geo anchor.
+
+    `calibration` (models/calibration.py) maps pixels to ground positions;
+    without one, area and positions fall back to the camera-height heuristic.
+    `lines` are the CountLines whose crossings the tracker counts, and `rules`
+    the camera's AlertRules (None for the defaults). `roi` (models/roi.py)
+    limits detection to part of the view and `tiling` (models/tiling.py)
+    splits frames into crops so small, distant people are found.
+    """
+
+    def __init__(self, camera_id, source, location, grid_size=DEFAULT_GRID_SIZE, map_center=DEFAULT_MAP_CENTER,
+                 calibration=None, lines=(), rules=None, roi=None, tiling=None):
+        self.id = camera_id
+        self.source = source
+        self.location = location
+        self.grid_size = (int(grid_size[0]), int(grid_size[1]))
+        self.map_center = (float(map_center[0]), float(map_center[1]))
+        self.calibration = calibration
+        self.lines = list(lines)
+        self.rules = rules
+        self.roi = roi
+        self.tiling = tiling
+
+    @classmethod
+    def from_dict(cls, data):
+        map_center = data.get("center", DEFAULT_MAP_CENTER)
+        calibration = data.get("calibration")
+        return cls(
+            camera_id=data["id"],
+            source=_resolve_source(data["source"]),
+            location=data.get("location", data["id"]),
+            grid_size=data.get("grid", DEFAULT_GRID_SIZE),
+            map_center=map_center,
+            calibration=Calibration.from_dict(calibration, map_center) if calibration else None,
+            lines=[CountLine.from_dict(line) for line in data.get("lines", ())],
+            rules=[AlertRule.from_dict(rule) for rule in data["rules"]] if "rules" in data else None,
+            roi=RegionOfInterest.from_dict(data["roi"]) if data.get("roi") else None,
+            tiling=Tiling.from_dict(data["tiling"]) if data.get("tiling") else None,
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "location": self.location,
+            "grid": list(self.grid_size),
+            "center": list(self.map_center),
+            "calibrated": self.calibration is not None,
+            "lines": [line.to_dict() for line in self.lines],
+            "rules": [rule.name for rule in self.rules] if self.rules is not None else None,
+            "roi": self.roi.to_dict() if self.roi is not None else None,
+            "tiling": self.tiling.to_dict() if self.tiling is not None else None,
+        }
+
+
+def _resolve_source(source):
+    # Webcam indices and stream URLs are passed to OpenCV untouched
+    if isinstance(source, int) or str(source).isdigit():
+        return int(source)
+    if "://" in str(source) or os.path.isabs(source):
+        return source
+    return os.path.join(APP_DIR, source)
+
+
+_cameras = {}
+_cameras_lock = Lock()
+
+
+def load_cameras(path=CAMERAS_FILE):
+    """(Re)load the registry; falls back to the bundled Gate A clip."""
+    if not os.path.isabs(path):
+        path = os.path.join(APP_DIR, path)
+    if os.path.isfile(path):
+        with open(path) as f:
+            cameras = [Camera.from_dict(entry) for entry in json.load(f)]
+    else:
+        cameras = [Camera("gate-a", _resolve_source("1.mp4"), "Gate A")]
+
+    with _cameras_lock:
+        _cameras.clear()
+        for camera in cameras:
+            _cameras[camera.id] = camera
+    return cameras
+
+
+def list_cameras():
+    with _cameras_lock:
+        cameras = list(_cameras.values())
+    return cameras or load_cameras()
+
+
+def get_camera(camera_id=None):
+    """Look up a camera by id; None returns the first registered camera."""
+    cameras = list_cameras()
+    if camera_id is None:
+        return cameras[0] if cameras else None
+    for camera in cameras:
+        if camera.id == camera_id:
+            return camera
+    return None
@@ -0,0 +1,167 @@
+# models/capture.py
+import queue
+import time
+from threading import Condition, Event, Thread
+
+import cv2
+
+from config import CAPTURE_FILE_REALTIME, CAPTURE_RECONNECT_MAX, CAPTURE_RING_SIZE
+from models.logs import get_logger
+from models.metrics import CAPTURE_RECONNECTS, FRAMES_DROPPED
+
+log = get_logger("capture")
+DEFAULT_FPS = 25.0  # When a source does not report its frame rate
+
+
+def is_live_source(source):
+    """Webcam indices and stream URLs (rtsp://, http://, ...) are live; paths are files."""
+    return isinstance(source, int) or "://" in str(source)
+
+
+class CapturedFrame:
+    __slots__ = ("frame", "captured_at", "index")
+
+    def __init__(self, frame, captured_at, index):
+        self.frame = frame
+        self.captured_at = captured_at  # time.time() when decoded, the start of glass-to-alert latency
+        self.index = index
+
+
+class CaptureSource:
+    """Decodes one video source on its own thread.
+
+    Live sources keep only the newest frame: if inference falls behind, older
+    frames are overwritten and counted as dropped instead of queueing up in
+    the capture buffer. Files decode ahead into a ring of `ring_size` frames
+    and loop at the end; with `realtime` they are paced to their own frame
+    rate so a clip behaves like a camera. A source that fails to open or
+    stops delivering is reopened with exponential backoff.
+
+    `live` overrides the detection from the source string, which lets a local
+    file stand in for a camera stream.
+    """
+
+    def __init__(self, source, name=None, live=None, ring_size=CAPTURE_RING_SIZE,
+                 realtime=CAPTURE_FILE_REALTIME, reconnect_max=CAPTURE_RECONNECT_MAX):
+        self.source = source
+        self.name = name or str(source)
+        self.live = is_live_source(source) if live is None else live
+        # A file standing in for a live source must arrive at camera pace
+        self.realtime = not is_live_source(source) and (realtime or self.live)
+        self.reconnect_max = reconnect_max
+        self._ring = None if self.live else queue.Queue(maxsize=max(1, ring_size))
+        self._latest = None
+        self._cond = Condition()
+        self._stop = Event()
+        self._thread: Thread | None = None
+        self.decoded = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.connected = False
+        self.fps = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = Thread(target=self._run, name=f"capture-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def read(self, timeout=None):
+        """Next CapturedFrame, or None if nothing arrived within `timeout` seconds."""
+        if self._ring is not None:
+            try:
+                return self._ring.get(timeout=timeout)
+            except queue.Empty:
+                return None
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._latest is not None or self._stop.is_set(), timeout=timeout):
+                return None
+            latest, self._latest = self._latest, None
+            return latest
+
+    def stats(self):
+        return {
+            "live": self.live,
+            "connected": self.connected,
+            "fps": self.fps,
+            "decoded": self.decoded,
+            "dropped": self.dropped,
+            "reconnects": self.reconnects,
+            "buffered": self._ring.qsize() if self._ring is not None else int(self._latest is not None),
+        }
+
+    def _open(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            cap = cv2.VideoCapture(self.source)
+            if cap.isOpened():
+                if self.live:
+                    # Ask the backend to keep its own buffer short as well
+                    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+                self.fps = cap.get(cv2.CAP_PROP_FPS) or None
+                self.connected = True
+                return cap
+            cap.release()
+            log.error("Cannot open video source %s; retrying in %.0fs", self.name, backoff)
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.reconnect_max)
+        return None
+
+    def _run(self):
+        cap = self._open()
+        index = 0
+        paced_from = time.time()
+        while cap is not None and not self._stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                if not self.live:
+                    # Files loop from the start
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = cap.read()
+                    paced_from, index = time.time(), 0
+                if not ret:
+                    log.warning("Lost video source %s; reconnecting", self.name)
+                    cap.release()
+                    self.connected = False
+                    self.reconnects += 1
+                    CAPTURE_RECONNECTS.inc(source=self.name)
+                    cap = self._open()
+                    paced_from, index = time.time(), 0
+                    continue
+
+            if self.realtime:
+                delay = paced_from + index / (self.fps or DEFAULT_FPS) - time.time()
+                if delay > 0:
+                    self._stop.wait(delay)
+            index += 1
+            self.decoded += 1
+            self._deliver(CapturedFrame(frame, time.time(), self.decoded))
+
+        if cap is not None:
+            cap.release()
+        self.connected = False
+
+    def _deliver(self, captured):
+        if self._ring is not None:
+            # Decode-ahead: blocks while the ring is full, never drops
+            while not self._stop.is_set():
+                try:
+                    self._ring.put(captured, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue
+            return
+        with self._cond:
+            if self._latest is not None:
+                self.dropped += 1
+                FRAMES_DROPPED.inc(source=self.name, reason="stale_capture")
+            self._latest = captured
+            self._cond.notify_all()
@@ -1,8 +1,175 @@
 # models/congestion_predictor.py
-def predict_congestion(crowd_data: dict):
-    # Replace this with actual prediction logic
-    people_detected = crowd_data["people_detected"]
-    if people_detected > 80:
-        return "High congestion"
-    else:
-        return "Low congestion"
+from threading import Lock
+
+import numpy as np
+
+STEP_SECONDS = 10  # Per-frame samples are averaged into steps of this length
+ALPHA = 0.3  # Level smoothing
+BETA = 0.05  # Trend smoothing
+PHI = 0.98  # Trend damping, keeps 15-minute extrapolations from running away
+GAMMA = 0.01  # Time-of-day profile smoothing (each slot sees many steps per day)
+VARIANCE_ALPHA = 0.05  # Smoothing of the one-step squared error behind the bands
+SEASON_SLOT_SECONDS = 900  # Time-of-day profile in 15-minute slots
+SEASON_SLOTS = 86400 // SEASON_SLOT_SECONDS
+MAX_HORIZON_MINUTES = 15
+BAND_Z = 1.96  # ~95% bands
+
+
+class HoltForecaster:
+    """Damped-trend Holt smoothing with an additive time-of-day profile.
+
+    Works on arrays of any `shape` at once (one value per grid cell), so an
+    update costs a few array operations whatever the grid size, and memory
+    is fixed: level, trend, error variance and SEASON_SLOTS profile values
+    per element.
+    """
+
+    def __init__(self, shape=(), step=STEP_SECONDS):
+        self.shape = tuple(shape)
+        self.step = step
+        self.level = np.zeros(self.shape)
+        self.trend = np.zeros(self.shape)
+        self.variance = np.zeros(self.shape)
+        self.season = np.zeros((SEASON_SLOTS,) + self.shape)
+        self.steps = 0
+        self.last_ts = None
+        self._bucket = None
+        self._sum = np.zeros(self.shape)
+        self._count = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def _slot(ts):
+        return int(ts % 86400 // SEASON_SLOT_SECONDS)
+
+    def add(self, ts, values):
+        """Fold one sample into the current step; returns True when a step was closed."""
+        bucket = ts // self.step
+        closed = False
+        with self._lock:
+            if self._bucket is not None and bucket != self._bucket:
+                self._update(self._bucket * self.step, self._sum / self._count)
+                self._sum = np.zeros(self.shape)
+                self._count = 0
+                closed = True
+            self._bucket = bucket
+            self._sum += values
+            self._count += 1
+        return closed
+
+    def update(self, ts, y):
+        """Apply one whole step's mean directly (used by backtests)."""
+        with self._lock:
+            self._update(ts, np.asarray(y, dtype=float))
+
+    def _update(self, ts, y):
+        slot = self._slot(ts)
+        season = self.season[slot]
+        if self.steps == 0:
+            self.level = y - season
+        else:
+            error = y - (self.level + PHI * self.trend + season)
+            if self.steps == 1:
+                self.variance = error ** 2
+            else:
+                self.variance = (1 - VARIANCE_ALPHA) * self.variance + VARIANCE_ALPHA * error ** 2
+            previous = self.level
+            self.level = ALPHA * (y - season) + (1 - ALPHA) * (previous + PHI * self.trend)
+            self.trend = BETA * (self.level - previous) + (1 - BETA) * PHI * self.trend
+            self.season[slot] = GAMMA * (y - self.level) + (1 - GAMMA) * season
+        self.steps += 1
+        self.last_ts = ts
+
+    def forecast(self, horizon_seconds, z=BAND_Z):
+        """(mean, low, high) arrays `horizon_seconds` after the last closed step."""
+        h = max(1, round(horizon_seconds / self.step))
+        with self._lock:
+            if self.last_ts is None:
+                return None
+            damped = PHI * (1 - PHI ** h) / (1 - PHI)
+            mean = self.level + damped * self.trend + self.season[self._slot(self.last_ts + horizon_seconds)]
+            # Level and trend errors compound with every step ahead
+            j = np.arange(1, h)
+            growth = 1 + np.sum((ALPHA * (1 + j * BETA)) ** 2)
+            sigma = np.sqrt(self.variance * growth)
+        mean = np.maximum(mean, 0)
+        return mean, np.maximum(mean - z * sigma, 0), mean + z * sigma
+
+
+class CongestionForecaster:
+    """Per-cell and whole-view density forecasts for one camera."""
+
+    def __init__(self, grid_size, step=STEP_SECONDS):
+        self.cells = HoltForecaster(grid_size, step)
+        self.total = HoltForecaster((), step)
+
+    def add(self, ts, cell_density, density):
+        self.total.add(ts, density)
+        return self.cells.add(ts, cell_density)
+
+    def forecast(self, minutes):
+        horizon = min(max(minutes, 1), MAX_HORIZON_MINUTES) * 60
+        cells, total = self.cells.forecast(horizon), self.total.forecast(horizon)
+        if cells is None or total is None:
+            return None
+        return {
+            "minutes": horizon / 60,
+            "density": dict(zip(("mean", "low", "high"), (round(float(v), 4) for v in total))),
+            "cells": dict(zip(("mean", "low", "high"), (np.round(v, 4).tolist() for v in cells))),
+        }
+
+
+_forecasters = {}
+_forecasters_lock = Lock()
+
+
+def get_forecaster(camera_id, grid_size=None):
+    """The camera's forecaster; created on first use when `grid_size` is given."""
+    with _forecasters_lock:
+        forecaster = _forecasters.get(camera_id)
+        if forecaster is None and grid_size is not None:
+            forecaster = _forecasters[camera_id] = CongestionForecaster(grid_size)
+        return forecaster
+
+
+def predict_congestion(camera_id, minutes=5):
+    """Forecast for one camera `minutes` ahead (1-15), with ~95% bands; None before any data."""
+    forecaster = get_forecaster(camera_id)
+    return forecaster.forecast(minutes) if forecaster is not None else None
+
+
+def backtest(samples, horizons=(1, 5, 15), step=STEP_SECONDS):
+    """Replay a stored [[ts, value], ...] series through a fresh forecaster.
+
+    Samples are averaged into steps first, then each step is forecast from
+    what came before it. Returns MAE, RMSE and band coverage per horizon.
+    """
+    samples = np.asarray(samples, dtype=float).reshape(-1, 2)
+    if not len(samples):
+        return {"steps": 0, "horizons": []}
+    buckets, index = np.unique(samples[:, 0] // step, return_inverse=True)
+    means = np.bincount(index, weights=samples[:, 1]) / np.bincount(index)
+    position = {int(bucket): i for i, bucket in enumerate(buckets)}
+
+    forecaster = HoltForecaster((), step)
+    predicted = {minutes: np.full((len(buckets), 3), np.nan) for minutes in horizons}
+    for i, (bucket, y) in enumerate(zip(buckets, means)):
+        forecaster.update(bucket * step, y)
+        for minutes in horizons:
+            target = position.get(int(bucket + minutes * 60 // step))
+            if target is not None:
+                predicted[minutes][target] = forecaster.forecast(minutes * 60)
+
+    results = []
+    for minutes, values in predicted.items():
+        known = ~np.isnan(values[:, 0])
+        error = values[known, 0] - means[known]
+        inside = (means[known] >= values[known, 1]) & (means[known] <= values[known, 2])
+        results.append({
+            "minutes": minutes,
+            "forecasts": int(known.sum()),
+            "mae": float(np.abs(error).mean()) if known.any() else None,
+            "rmse": float(np.sqrt((error ** 2).mean())) if known.any() else None,
+            "band_coverage": float(inside.mean()) if known.any() else None,
+        })
+    return {"steps": len(buckets), "step_seconds": step, "horizons": results}
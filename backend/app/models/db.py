@@ -0,0 +1,43 @@
+# models/db.py
+import time
+from threading import Lock
+
+from supabase import Client, ClientOptions, create_client
+
+from config import SUPABASE_API_KEY, SUPABASE_TIMEOUT, SUPABASE_URL
+from models.logs import get_logger
+
+log = get_logger("startup")
+
+_client: Client | None = None
+_client_lock = Lock()
+_init_seconds = None
+
+
+def get_supabase() -> Client:
+    """The one Supabase client for this process, built on first use.
+
+    Every blueprint and background worker goes through here, so they all share
+    the client's HTTP connection pool (keep-alive) instead of each module
+    opening its own at import time.
+    """
+    global _client, _init_seconds
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            if not SUPABASE_URL or not SUPABASE_API_KEY:
+                raise RuntimeError("SUPABASE_URL and SUPABASE_API_KEY must be set")
+            start = time.perf_counter()
+            _client = create_client(
+                SUPABASE_URL,
+                SUPABASE_API_KEY,
+                options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT),
+            )
+            _init_seconds = time.perf_counter() - start
+            log.info("Supabase client initialised in %.1f ms", _init_seconds * 1000)
+    return _client
+
+
+def init_report():
+    return {"initialized": _client is not None, "init_seconds": _init_seconds}
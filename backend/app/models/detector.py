@@ -0,0 +1,209 @@
+# models/detector.py
+import glob
+import os
+from abc import ABC, abstractmethod
+from threading import Lock
+
+import cv2
+import numpy as np
+
+from config import DETECTOR_BACKEND, DETECTOR_MODEL, DETECTOR_THREADS, YOLO_IMGSZ
+
+IOU_THRESHOLD = 0.7  # Same defaults as ultralytics predict()
+MAX_DETECTIONS = 300
+CLASS_OFFSET = 4096  # Shifts boxes per class so one NMS call never merges classes
+
+
+class Detections:
+    """Boxes for one frame as plain arrays: xyxy (N, 4), cls (N,), conf (N,)."""
+
+    __slots__ = ("xyxy", "cls", "conf")
+
+    def __init__(self, xyxy, cls, conf):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.cls = np.asarray(cls, dtype=np.float32).reshape(-1)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+
+    def __len__(self):
+        return len(self.xyxy)
+
+
+class Detector(ABC):
+    """What the pipeline calls instead of model(frame, ...).
+
+    `thread_safe` detectors may be called from several threads at once
+    (see models/tiling.py detect_parallel).
+    """
+
+    name = "base"
+    thread_safe = False
+
+    @abstractmethod
+    def detect(self, frames, conf):
+        """Return one Detections per frame, in input order."""
+
+
+class UltralyticsDetector(Detector):
+    """PyTorch baseline through the shared model manager."""
+
+    name = "ultralytics"
+
+    def __init__(self, threads=DETECTOR_THREADS):
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+
+    def detect(self, frames, conf):
+        from models.model_manager import predict
+
+        detections = []
+        for result in predict(list(frames), conf=conf, verbose=False):
+            boxes = result.boxes.cpu().numpy()
+            detections.append(Detections(boxes.xyxy, boxes.cls, boxes.conf))
+        return detections
+
+
+def letterbox(frame, size):
+    """Resize keeping aspect ratio and pad to size x size, like ultralytics does."""
+    height, width = frame.shape[:2]
+    ratio = min(size / height, size / width)
+    new_w, new_h = round(width * ratio), round(height * ratio)
+    left, top = (size - new_w) // 2, (size - new_h) // 2
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return canvas, ratio, (left, top)
+
+
+def decode_yolov8(output, conf, ratio, pad):
+    """Turn one (4 + classes, anchors) YOLOv8 head output into Detections in frame pixels."""
+    pred = output.T
+    scores = pred[:, 4:]
+    cls = scores.argmax(axis=1)
+    confidence = scores[np.arange(len(cls)), cls]
+    keep = confidence > conf
+    pred, cls, confidence = pred[keep], cls[keep], confidence[keep]
+
+    cx, cy, w, h = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+    xyxy = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    xyxy[:, [0, 2]] -= pad[0]
+    xyxy[:, [1, 3]] -= pad[1]
+    xyxy /= ratio
+
+    index = nms(xyxy, cls, confidence, conf, IOU_THRESHOLD)[:MAX_DETECTIONS]
+    return Detections(xyxy[index], cls[index], confidence[index])
+
+
+def nms(xyxy, cls, confidence, conf, iou):
+    """Indices of the boxes kept by per-class NMS, best first, in one call for all classes."""
+    offset = cls[:, None] * CLASS_OFFSET
+    shifted = np.concatenate([xyxy[:, :2] + offset, xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+    index = cv2.dnn.NMSBoxes(shifted.tolist(), confidence.tolist(), conf, iou)
+    return np.asarray(index, dtype=int).reshape(-1)
+
+
+class _ExportedDetector(Detector):
+    """Shared letterbox / decode / NMS for exported YOLOv8 graphs."""
+
+    imgsz = YOLO_IMGSZ
+    batched = False
+
+    @abstractmethod
+    def _run(self, blob):
+        """Raw (B, 4 + classes, anchors) model output for an NCHW blob."""
+
+    def detect(self, frames, conf):
+        prepared = [letterbox(frame, self.imgsz) for frame in frames]
+        blobs = [cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True) for image, _, _ in prepared]
+        if self.batched and len(blobs) > 1:
+            outputs = self._run(np.concatenate(blobs))
+        else:
+            outputs = np.concatenate([self._run(blob) for blob in blobs])
+        return [decode_yolov8(output, conf, ratio, pad) for output, (_, ratio, pad) in zip(outputs, prepared)]
+
+
+class OnnxRuntimeDetector(_ExportedDetector):
+    name = "onnxruntime"
+    thread_safe = True  # InferenceSession.run may be called concurrently
+
+    def __init__(self, model_path, threads=DETECTOR_THREADS):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Exports with a dynamic batch axis take every camera in one call
+        self.batched = not isinstance(model_input.shape[0], int) or model_input.shape[0] > 1
+        if isinstance(model_input.shape[2], int):
+            self.imgsz = model_input.shape[2]
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoDetector(_ExportedDetector):
+    name = "openvino"
+
+    def __init__(self, model_path, threads=DETECTOR_THREADS):
+        import openvino as ov
+
+        if os.path.isdir(model_path):
+            model_path = glob.glob(os.path.join(model_path, "*.xml"))[0]
+        config = {"INFERENCE_NUM_THREADS": threads} if threads else {}
+        self.compiled = ov.Core().compile_model(model_path, "CPU", config)
+        shape = self.compiled.input(0).get_partial_shape()
+        if shape[2].is_static:
+            self.imgsz = shape[2].get_length()
+        self.batched = shape[0].is_dynamic
+
+    def _run(self, blob):
+        return self.compiled(blob)[self.compiled.output(0)]
+
+
+def export_model(weights, backend, int8=False, imgsz=YOLO_IMGSZ):
+    """Export PyTorch weights for an exported backend; returns the model path.
+
+    OpenVINO INT8 uses ultralytics' NNCF calibration. ONNX Runtime INT8 is
+    produced by dynamic quantization of the FP32 graph.
+    """
+    from ultralytics import YOLO
+
+    if backend == "openvino":
+        return YOLO(weights).export(format="openvino", imgsz=imgsz, int8=int8)
+    if backend == "onnxruntime":
+        path = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True)
+        if not int8:
+            return path
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized = path.replace(".onnx", "_int8.onnx")
+        quantize_dynamic(path, quantized, weight_type=QuantType.QUInt8)
+        return quantized
+    raise ValueError(f"Nothing to export for backend {backend!r}")
+
+
+def create_detector(backend=DETECTOR_BACKEND, model_path=DETECTOR_MODEL, threads=DETECTOR_THREADS):
+    if backend == "ultralytics":
+        return UltralyticsDetector(threads)
+    if not model_path:
+        raise ValueError(f"DETECTOR_MODEL must point at an exported model for backend {backend!r}")
+    if backend == "onnxruntime":
+        return OnnxRuntimeDetector(model_path, threads)
+    if backend == "openvino":
+        return OpenVinoDetector(model_path, threads)
+    raise ValueError(f"Unknown detector backend {backend!r}")
+
+
+_detector: Detector | None = None
+_detector_lock = Lock()
+
+
+def get_detector():
+    """The configured detector for this process, created on first use."""
+    global _detector
+    with _detector_lock:
+        if _detector is None:
+            _detector = create_detector()
+        return _detector
@@ -0,0 +1,194 @@
+# models/frame_hub.py
+import time
+from threading import Condition, Lock, Thread
+
+from models.logs import get_logger
+from models.metrics import FRAMES_DROPPED
+
+log = get_logger("frame_hub")
+
+# How long a pipeline keeps running after its last subscriber leaves.
+# Covers page reloads and short gaps between /grid polls.
+IDLE_TIMEOUT = 10
+
+
+class FrameHub:
+    """Runs one detection pipeline per source and fans its output out.
+
+    `producer` is called as producer(on_grid, has_viewers) and must return a
+    generator of rendered frames (see models/mjpeg.py), yielding None for
+    frames it did not render; it is started on the first subscriber and closed once
+    nobody has listened for IDLE_TIMEOUT seconds.
+
+    Without a producer the hub is fed from outside (see models/scheduler.py):
+    the driver polls is_active() and calls publish()/publish_grid(), and
+    `on_wake` is called whenever a subscriber shows up.
+
+    Only stream() clients count as viewers. Grid pollers and event streams
+    keep the pipeline running but let it skip drawing and JPEG encoding.
+    """
+
+    def __init__(self, name, producer=None, idle_timeout=IDLE_TIMEOUT, on_wake=None, source=None):
+        self.name = name
+        self.source = source or name  # Label used in metrics
+        self._producer = producer
+        self._on_wake = on_wake
+        self._idle_timeout = idle_timeout
+        self._cond = Condition()
+        self._thread: Thread | None = None
+        self._subscribers = 0
+        self._viewers = 0
+        self._lease_until = 0.0
+        self._idle_since = 0.0  # Idle until the first subscriber arrives
+        self._seq = 0
+        self._frame = None
+        self._grid = None
+        self._grid_seq = 0
+
+    # --- subscriber side -------------------------------------------------
+
+    def subscriber_count(self):
+        with self._cond:
+            return self._subscribers
+
+    def viewer_count(self):
+        with self._cond:
+            return self._viewers
+
+    def has_viewers(self):
+        """True while at least one client is receiving the rendered video."""
+        with self._cond:
+            return self._viewers > 0
+
+    def touch(self, seconds=None):
+        """Keep the pipeline alive for pollers that never hold a stream open."""
+        with self._cond:
+            self._lease_until = max(self._lease_until, time.time() + (seconds or self._idle_timeout))
+            self._ensure_running()
+
+    def latest_grid(self):
+        with self._cond:
+            return self._grid
+
+    def attach(self):
+        """Count a non-video listener (e.g. a grid event stream) as a subscriber."""
+        with self._cond:
+            self._subscribers += 1
+            self._ensure_running()
+
+    def detach(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def wait_grid(self, seen, timeout):
+        """Block until a grid snapshot newer than `seen` exists; returns (seq, snapshot)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._grid_seq != seen, timeout=timeout)
+            return self._grid_seq, self._grid
+
+    def stream(self):
+        """Yield the newest published frame to one client; detaches when it goes away.
+
+        Acts as a one-slot mailbox: frames published while the client is still
+        busy with the previous one are skipped, never queued.
+        """
+        with self._cond:
+            self._subscribers += 1
+            self._viewers += 1
+            self._ensure_running()
+            seen = self._seq
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._seq != seen or not self._running(), timeout=5)
+                    if self._seq == seen:
+                        if not self._running():
+                            self._ensure_running()
+                        continue
+                    if self._seq - seen > 1:
+                        FRAMES_DROPPED.inc(self._seq - seen - 1, source=self.source, reason="slow_client")
+                    seen, frame = self._seq, self._frame
+                yield frame
+        finally:
+            with self._cond:
+                self._subscribers -= 1
+                self._viewers -= 1
+
+    # --- producer side ---------------------------------------------------
+
+    def is_active(self):
+        """True while someone is listening or within the idle grace period."""
+        return not self._should_idle()
+
+    def publish_grid(self, snapshot):
+        with self._cond:
+            self._grid = snapshot
+            self._grid_seq += 1
+            self._cond.notify_all()
+
+    def publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._cond.notify_all()
+
+    def _running(self):
+        if self._producer is None:
+            return True
+        return self._thread is not None and self._thread.is_alive()
+
+    def _ensure_running(self):
+        # Caller holds self._cond
+        self._idle_since = None
+        if self._producer is None:
+            if self._on_wake:
+                self._on_wake()
+            return
+        if self._running():
+            return
+        self._thread = Thread(target=self._run, name=f"hub-{self.name}", daemon=True)
+        self._thread.start()
+
+    def _should_idle(self):
+        with self._cond:
+            if self._subscribers > 0 or time.time() < self._lease_until:
+                self._idle_since = None
+                return False
+            if self._idle_since is None:
+                self._idle_since = time.time()
+            return time.time() - self._idle_since >= self._idle_timeout
+
+    def _run(self):
+        log.debug("Pipeline %s started", self.name)
+        frames = self._producer(self.publish_grid, self.has_viewers)
+        try:
+            for frame in frames:
+                if frame is not None:
+                    self.publish(frame)
+                if self._should_idle():
+                    break
+        except Exception as e:
+            log.error("Pipeline %s stopped: %s", self.name, e)
+        finally:
+            frames.close()
+            with self._cond:
+                self._cond.notify_all()
+            log.debug("Pipeline %s idle", self.name)
+
+
+_hubs = {}
+_hubs_lock = Lock()
+
+
+def get_hub(name, producer=None, on_wake=None, source=None):
+    """Return the shared hub for `name`, creating it on first use."""
+    with _hubs_lock:
+        hub = _hubs.get(name)
+        if hub is None:
+            hub = _hubs[name] = FrameHub(name, producer, on_wake=on_wake, source=source)
+        return hub
+
+
+def all_hubs():
+    with _hubs_lock:
+        return list(_hubs.values())
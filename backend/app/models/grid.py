@@ -0,0 +1,50 @@
+# models/grid.py
+import numpy as np
+
+PERSON_CLASS = 0
+
+
+def bin_people(xyxy, classes, frame_size, grid_size):
+    """Count person centroids per grid cell in one pass over the box array.
+
+    xyxy is an (N, 4) array, classes an (N,) array, frame_size (width, height)
+    and grid_size (rows, cols). Returns (grid_counts, person_boxes) where
+    grid_counts is a (rows, cols) int array.
+    """
+    rows, cols = grid_size
+    width, height = frame_size
+    xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+    person_boxes = xyxy[np.asarray(classes).reshape(-1) == PERSON_CLASS]
+
+    cx = (person_boxes[:, 0] + person_boxes[:, 2]) * 0.5
+    cy = (person_boxes[:, 1] + person_boxes[:, 3]) * 0.5
+    gx = np.clip((cx * (cols / width)).astype(np.intp), 0, cols - 1)
+    gy = np.clip((cy * (rows / height)).astype(np.intp), 0, rows - 1)
+    grid_counts = np.bincount(gy * cols + gx, minlength=rows * cols).reshape(rows, cols)
+    return grid_counts, person_boxes
+
+
+class CellAlertState:
+    """Per-cell thresholds, hysteresis and cooldowns kept as arrays.
+
+    Replaces the (y, x) -> timestamp dict so a 32x18 grid costs the same
+    handful of array operations per frame as a 3x3 one. A cell that fired
+    stays active, and silent, until its value drops below `clear`; it can
+    fire again once it rises above `threshold` and its cooldown has passed.
+    `grid_size` may be () for a single whole-view value.
+    """
+
+    def __init__(self, grid_size, threshold, cooldown, clear=None):
+        self.threshold = threshold
+        self.clear = threshold if clear is None else clear
+        self.cooldown = cooldown
+        self.last_alert = np.full(grid_size, -np.inf)
+        self.active = np.zeros(grid_size, dtype=bool)
+
+    def check(self, values, now):
+        """Return (row, col) pairs that crossed the threshold outside their cooldown."""
+        self.active &= values >= self.clear
+        fire = (values > self.threshold) & ~self.active & (now - self.last_alert > self.cooldown)
+        self.last_alert[fire] = now
+        self.active |= fire
+        return np.argwhere(fire)
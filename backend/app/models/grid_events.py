@@ -0,0 +1,58 @@
+# models/grid_events.py
+import json
+import time
+
+import numpy as np
+
+HEARTBEAT_INTERVAL = 15  # Seconds between keep-alive comments
+MAX_EVENT_RATE = 10  # Hz ceiling a client may ask for
+SCALAR_FIELDS = ("timestamp", "people_count", "density_per_sqm", "risk_level")
+
+
+def grid_delta(previous, snapshot):
+    """Changed cells and scalars between two snapshots, or None if a full resend is needed."""
+    if previous is None or previous["grid_size"] != snapshot["grid_size"]:
+        return None
+    before = np.asarray(previous["grid_counts"])
+    after = np.asarray(snapshot["grid_counts"])
+    changed = np.argwhere(before != after)
+    delta = {field: snapshot[field] for field in SCALAR_FIELDS if snapshot.get(field) != previous.get(field)}
+    delta["cells"] = [[int(y), int(x), int(after[y, x])] for y, x in changed]
+    return delta
+
+
+def _event(kind, seq, payload):
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n"
+
+
+def grid_event_stream(hub, max_hz=2.0):
+    """Server-sent events for one client: a full snapshot, then only changes.
+
+    Snapshots produced faster than `max_hz` are coalesced, so each delta is
+    against what this client last received. A comment line every
+    HEARTBEAT_INTERVAL keeps proxies open and lets a dead client surface as a
+    write error, which ends the generator and detaches it from the hub.
+    """
+    min_gap = 1.0 / min(max(max_hz, 0.1), MAX_EVENT_RATE)
+    hub.attach()
+    try:
+        seen, sent = 0, None
+        last_write = time.time()
+        while True:
+            seq, snapshot = hub.wait_grid(seen, timeout=HEARTBEAT_INTERVAL)
+            if seq != seen and snapshot is not None:
+                delta = grid_delta(sent, snapshot)
+                seen, sent = seq, snapshot
+                if delta is None:
+                    last_write = time.time()
+                    yield _event("snapshot", seq, snapshot)
+                elif delta["cells"] or set(delta) - {"cells", "timestamp"}:
+                    last_write = time.time()
+                    yield _event("delta", seq, delta)
+                time.sleep(min_gap)
+            # Also on a static scene, where every snapshot differs only by its timestamp
+            if time.time() - last_write >= HEARTBEAT_INTERVAL:
+                last_write = time.time()
+                yield ": ping\n\n"
+    finally:
+        hub.detach()
@@ -0,0 +1,75 @@
+# models/heatmap_accumulator.py
+import time
+from threading import Lock
+
+import cv2
+import numpy as np
+
+HEATMAP_SHAPE = (90, 160)  # rows, cols; rendered images are upscaled from this
+HALF_LIFE = 10.0  # Seconds for old heat to fade to half
+
+
+class HeatmapAccumulator:
+    """Low-resolution occupancy heat built from person centroids.
+
+    Each detection adds one unit to the cell under its centroid; the whole
+    accumulator decays exponentially with time, applied lazily as a single
+    multiply when new detections arrive or a render is requested.
+    """
+
+    def __init__(self, shape=HEATMAP_SHAPE, half_life=HALF_LIFE):
+        self.shape = shape
+        self.half_life = half_life
+        self._heat = np.zeros(shape, dtype=np.float32)
+        self._updated = time.time()
+        self._lock = Lock()
+
+    def _decay_to(self, now):
+        # Caller holds self._lock
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._heat *= np.float32(0.5 ** (elapsed / self.half_life))
+            self._updated = now
+
+    def add(self, centres, frame_size, now=None):
+        """Splat (N, 2) pixel centroids from a frame of frame_size (width, height)."""
+        now = time.time() if now is None else now
+        rows, cols = self.shape
+        width, height = frame_size
+        centres = np.asarray(centres, dtype=np.float32).reshape(-1, 2)
+        ix = np.clip((centres[:, 0] * (cols / width)).astype(np.intp), 0, cols - 1)
+        iy = np.clip((centres[:, 1] * (rows / height)).astype(np.intp), 0, rows - 1)
+        splat = np.bincount(iy * cols + ix, minlength=rows * cols).reshape(rows, cols)
+        with self._lock:
+            self._decay_to(now)
+            self._heat += splat
+
+    def raw(self, now=None):
+        """Decayed copy of the accumulator as float32 (rows, cols)."""
+        with self._lock:
+            self._decay_to(time.time() if now is None else now)
+            return self._heat.copy()
+
+    def render(self, width, height=None):
+        """JET-coloured BGR image at the requested size (height keeps aspect if omitted)."""
+        heat = self.raw()
+        peak = heat.max()
+        scaled = np.uint8(heat * (255.0 / peak)) if peak > 0 else np.zeros(heat.shape, dtype=np.uint8)
+        # Smoothing the 160x90 grid is what turns single cells into blobs
+        scaled = cv2.GaussianBlur(scaled, (5, 5), 0)
+        colour = cv2.applyColorMap(scaled, cv2.COLORMAP_JET)
+        if height is None:
+            height = round(width * self.shape[0] / self.shape[1])
+        return cv2.resize(colour, (width, height), interpolation=cv2.INTER_LINEAR)
+
+
+_heatmaps = {}
+_heatmaps_lock = Lock()
+
+
+def get_heatmap(camera_id):
+    with _heatmaps_lock:
+        heatmap = _heatmaps.get(camera_id)
+        if heatmap is None:
+            heatmap = _heatmaps[camera_id] = HeatmapAccumulator()
+        return heatmap
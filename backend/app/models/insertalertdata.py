@@ -1,17 +1,11 @@
-from supabase import create_client, Client
-from dotenv import load_dotenv
+from models.logs import get_logger
+from models.persistence import get_writer
 
-load_dotenv()
-import os
-SUPABASE_URL =os.getenv('SUPABASE_URL')
-SUPABASE_API_KEY =os.getenv('SUPABASE_API_KEY')
-from datetime import datetime
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
+log = get_logger("alerts")
 
 # Function to insert an alert into the database
-def insert_alert_data(location, grid_x, grid_y, latitude, longitude, message, image_path, people_count, density_per_sqm, risk_level, timestamp):
+def insert_alert_data(location, grid_x, grid_y, latitude, longitude, message, image_path, people_count, density_per_sqm, risk_level, timestamp,
+                      thumbnail_path=None):
     data = {
         "location": location,
         "grid_x": grid_x,
@@ -25,6 +19,10 @@ def insert_alert_data(location, grid_x, grid_y, latitude, longitude, message, im
         "risk_level": risk_level,
         "timestamp": timestamp
     }
+    if thumbnail_path:
+        # Only sent when thumbnails are on, so tables without the column keep working
+        data["thumbnail_path"] = thumbnail_path
 
-    response = supabase.table("alerts").insert(data).execute()
-    print("Alert stored:", response)
+    # Queued for the background writer so a slow network never stalls the frame loop
+    get_writer().enqueue("alerts", data)
+    log.debug("Alert queued: %s", location)
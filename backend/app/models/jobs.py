@@ -0,0 +1,271 @@
+# models/jobs.py
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock, Thread
+
+import cv2
+import numpy as np
+
+from config import ALERT_HYSTERESIS, JOB_CHUNK_FRAMES, JOB_WORKERS
+
+APP_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/app
+JOBS_DIR = os.path.join(APP_DIR, "jobs")
+CANCEL_CHECK_FRAMES = 25  # Running chunks look for the cancel marker this often
+
+
+def count_frames(cap):
+    """Frames left in `cap`, counted by grabbing (demuxing without decoding).
+
+    For containers and streams whose header reports no frame count.
+    """
+    total = 0
+    while cap.grab():
+        total += 1
+    return total
+
+
+def _analyze_range(video_path, start, stop, stride, grid_size, conf, threads, cancel_path):
+    """Worker process: detect and bin frames [start, stop) of one video.
+
+    Runs headless (no drawing, no encoding) and returns compact arrays.
+    """
+    from models.grid import bin_people
+
+    detector = _worker_detector(threads)
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    frames, people, grids = [], [], []
+    first_person_height = None
+    frame_height = None
+    index = start
+    while index < stop:
+        if (index - start) % CANCEL_CHECK_FRAMES == 0 and os.path.exists(cancel_path):
+            break
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_height, frame_width = frame.shape[:2]
+        detections = detector.detect([frame], conf)[0]
+        grid_counts, person_boxes = bin_people(detections.xyxy, detections.cls, (frame_width, frame_height), grid_size)
+        if first_person_height is None and len(person_boxes):
+            first_person_height = int(person_boxes[0, 3]) - int(person_boxes[0, 1])
+        frames.append(index)
+        people.append(len(person_boxes))
+        grids.append(grid_counts.astype(np.uint16))
+
+        # Skip the frames between samples without converting them
+        for _ in range(stride - 1):
+            cap.grab()
+        index += stride
+    cap.release()
+
+    rows, cols = grid_size
+    return {
+        "start": start,
+        "frame": np.asarray(frames, dtype=np.int32),
+        "people": np.asarray(people, dtype=np.int32),
+        "grid": np.asarray(grids, dtype=np.uint16).reshape(-1, rows, cols),
+        "first_person_height": first_person_height,
+        "frame_height": frame_height,
+    }
+
+
+_detector_cache = {}  # Per worker process
+
+
+def _worker_detector(threads):
+    # One detector per worker process, reused across its chunks
+    from models.detector import create_detector
+
+    if threads not in _detector_cache:
+        _detector_cache[threads] = create_detector(threads=threads)
+    return _detector_cache[threads]
+
+
+class AnalysisJob:
+    def __init__(self, video_path, grid_size, stride):
+        self.id = uuid.uuid4().hex
+        self.video_path = video_path
+        self.grid_size = grid_size
+        self.stride = stride
+        self.directory = os.path.join(JOBS_DIR, self.id)
+        self.cancel_path = os.path.join(self.directory, "cancel")
+        self.result_path = os.path.join(self.directory, "result.npz")
+        self.status = "queued"
+        self.error = None
+        self.total_frames = 0
+        self.fps = 0.0
+        self.done_frames = 0
+        self.created = time.time()
+        self.finished = None
+        self.futures = []
+
+    def to_dict(self):
+        elapsed = (self.finished or time.time()) - self.created
+        return {
+            "job_id": self.id,
+            "video": os.path.basename(self.video_path),
+            "status": self.status,
+            "error": self.error,
+            "progress": self.done_frames / self.total_frames if self.total_frames else 0.0,
+            "frames": self.total_frames,
+            "stride": self.stride,
+            "elapsed_seconds": elapsed,
+            # Video seconds analysed per wall-clock second; > 1 is faster than realtime
+            "speed": (self.done_frames / self.fps) / elapsed if self.fps and elapsed > 0 else None,
+        }
+
+
+class JobManager:
+    """Runs uploaded videos through the detector headless, split across processes."""
+
+    def __init__(self, workers=JOB_WORKERS, chunk_frames=JOB_CHUNK_FRAMES):
+        self.workers = workers
+        self.chunk_frames = chunk_frames
+        # Split the CPU between workers instead of letting each grab every core
+        self.threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+        self._executor = None
+        self._jobs = {}
+        self._lock = Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            # spawn: forking a process that holds model and server threads is unsafe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def submit(self, video_path, grid_size, stride=1):
+        from models.camera_pipeline import CONF_THRESHOLD
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video file: {os.path.basename(video_path)}")
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        if total <= 0:
+            total = count_frames(cap)
+        cap.release()
+        if total <= 0:
+            raise ValueError(f"No frames could be read from {os.path.basename(video_path)}")
+
+        job = AnalysisJob(video_path, tuple(grid_size), max(1, int(stride)))
+        job.total_frames = total
+        job.fps = fps
+        os.makedirs(job.directory, exist_ok=True)
+
+        # Chunk boundaries stay aligned to the stride so no sample is lost or doubled
+        step = max(job.stride, self.chunk_frames - self.chunk_frames % job.stride)
+        pool = self._pool()
+        for start in range(0, total, step):
+            stop = min(start + step, total)
+            future = pool.submit(_analyze_range, video_path, start, stop, job.stride, job.grid_size,
+                                 CONF_THRESHOLD, self.threads_per_worker, job.cancel_path)
+            future.add_done_callback(lambda f, job=job, frames=stop - start: self._chunk_done(job, frames))
+            job.futures.append(future)
+        job.status = "running"
+
+        with self._lock:
+            self._jobs[job.id] = job
+        Thread(target=self._collect, args=(job,), name=f"job-{job.id[:8]}", daemon=True).start()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.status not in ("queued", "running"):
+            return job
+        job.status = "cancelled"
+        open(job.cancel_path, "w").close()
+        for future in job.futures:
+            future.cancel()
+        return job
+
+    def _chunk_done(self, job, frames):
+        with self._lock:
+            job.done_frames = min(job.total_frames, job.done_frames + frames)
+
+    def _collect(self, job):
+        try:
+            chunks = [future.result() for future in job.futures]
+        except Exception as e:
+            if job.status != "cancelled":
+                job.status, job.error = "failed", str(e)
+            job.finished = time.time()
+            return
+        if job.status == "cancelled":
+            job.finished = time.time()
+            return
+        try:
+            self._write_result(job, sorted(chunks, key=lambda chunk: chunk["start"]))
+            job.status = "done"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+        job.finished = time.time()
+
+    def _write_result(self, job, chunks):
+        from models.alert_rules import CELL_DENSITY_THRESHOLD, COOLDOWN_TIME
+        from models.camera_pipeline import compute_real_world_area, estimate_camera_height
+        from models.grid import CellAlertState
+
+        rows, cols = job.grid_size
+        frame = np.concatenate([chunk["frame"] for chunk in chunks])
+        people = np.concatenate([chunk["people"] for chunk in chunks])
+        grid = np.concatenate([chunk["grid"] for chunk in chunks]).reshape(-1, rows, cols)
+        time_s = (frame / job.fps if job.fps else frame.astype(np.float64)).astype(np.float32)
+
+        # Same camera-height heuristic as the live pipeline: first person seen
+        camera_height = None
+        for chunk in chunks:
+            if chunk["first_person_height"] is not None:
+                camera_height = estimate_camera_height(chunk["first_person_height"],
+                                                       frame_height=chunk["frame_height"])
+                break
+        area = compute_real_world_area(camera_height)
+
+        # Cooldowns run on video time, so alerts match what the live loop would raise
+        state = CellAlertState(job.grid_size, CELL_DENSITY_THRESHOLD, COOLDOWN_TIME,
+                               CELL_DENSITY_THRESHOLD * ALERT_HYSTERESIS)
+        cell_density = grid / (area / (rows * cols))
+        alert_rows = []
+        # Every frame is checked, since hysteresis re-arms on the quiet ones too
+        for i in range(len(frame)):
+            for y, x in state.check(cell_density[i], float(time_s[i])):
+                alert_rows.append((frame[i], y, x, grid[i, y, x]))
+        alerts = np.asarray(alert_rows, dtype=np.int32).reshape(-1, 4)
+
+        np.savez_compressed(
+            job.result_path,
+            frame=frame,
+            time_s=time_s,
+            people=people,
+            density_per_sqm=(people / area).astype(np.float32),
+            grid=grid,
+            alert_frame=alerts[:, 0],
+            alert_row=alerts[:, 1],
+            alert_col=alerts[:, 2],
+            alert_people=alerts[:, 3],
+        )
+
+
+_manager: JobManager | None = None
+_manager_lock = Lock()
+
+
+def get_job_manager():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -0,0 +1,69 @@
+# models/logs.py
+import json
+import logging
+import sys
+from threading import Lock
+
+from config import LOG_FORMAT, LOG_LEVEL, LOG_SAMPLE_EVERY
+
+ROOT_LOGGER = "crowd"
+TEXT_FORMAT = "[%(levelname)s] %(name)s: %(message)s"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed as extra={"fields": {...}} become keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_configured = False
+_configure_lock = Lock()
+
+
+def get_logger(name):
+    """Logger under the app's root logger, configured from LOG_LEVEL / LOG_FORMAT on first use."""
+    global _configured
+    if not _configured:
+        with _configure_lock:
+            if not _configured:
+                handler = logging.StreamHandler(sys.stdout)
+                handler.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+                root = logging.getLogger(ROOT_LOGGER)
+                root.addHandler(handler)
+                root.setLevel(LOG_LEVEL)
+                root.propagate = False
+                _configured = True
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+class Sampler:
+    """Lets one message in `every` through, for things logged per frame or per request.
+
+    The level check comes first, so at the default level a sampled call
+    costs one comparison and formats nothing.
+    """
+
+    def __init__(self, logger, every=LOG_SAMPLE_EVERY, level=logging.DEBUG):
+        self.logger = logger
+        self.every = max(1, every)
+        self.level = level
+        self._count = 0
+
+    def log(self, msg, *args, **fields):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        self._count += 1
+        if (self._count - 1) % self.every:
+            return
+        fields["sampled_1_in"] = self.every
+        self.logger.log(self.level, msg, *args, extra={"fields": fields})
@@ -0,0 +1,161 @@
+# models/metrics.py
+import time
+from bisect import bisect_left
+from threading import Lock
+
+# Upper bounds in seconds; a frame at 30 fps has about 0.033 s in total
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+DWELL_BUCKETS = (1, 5, 10, 30, 60, 120, 300, 600, 1800)
+RATE_WINDOW = 5.0  # Seconds of events behind each Rate value
+
+_registry = []
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = ((name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+               for name, value in labels)
+    inner = ",".join(f'{name}="{value}"' for name, value in escaped)
+    return "{" + inner + "}"
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, kind=None):
+        self.name = name
+        self.help = help
+        self.kind = kind or self.kind
+        self._values = {}
+        self._lock = Lock()
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Last value set per label set; `kind` may say "counter" for totals copied at scrape time."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_key(labels)] = value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._values = {}  # key -> [bucket counts..., +Inf count], sum
+        self._lock = Lock()
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        samples = []
+        for key, counts, total in values:
+            running = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                running += count
+                samples.append((f"{self.name}_bucket", key + (("le", str(bound)),), running))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, running))
+        return samples
+
+
+class Rate:
+    """Events per second per label set over the last RATE_WINDOW seconds."""
+
+    kind = "gauge"
+
+    def __init__(self, name, help, window=RATE_WINDOW):
+        self.name = name
+        self.help = help
+        self.window = window
+        self._values = {}  # key -> [window start, events in window, last rate]
+        self._lock = Lock()
+        _registry.append(self)
+
+    def mark(self, amount=1, **labels):
+        key = _key(labels)
+        now = time.time()
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [now, 0, 0.0]
+            entry[1] += amount
+            if now - entry[0] >= self.window:
+                entry[2] = entry[1] / (now - entry[0])
+                entry[0], entry[1] = now, 0
+
+    def samples(self):
+        now = time.time()
+        with self._lock:
+            # A source that stopped marking decays to 0 instead of freezing
+            return [(self.name, key, rate if now - start < 2 * self.window else 0.0)
+                    for key, (start, _, rate) in self._values.items()]
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, labels, value in metric.samples():
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+# Hot-path metrics, updated by the pipeline as frames go through
+STAGE_SECONDS = Histogram("crowd_stage_seconds", "Time spent per frame in each pipeline stage")
+FRAMES_PROCESSED = Counter("crowd_frames_processed_total", "Frames that went through the analytics pipeline")
+FRAMES_INFERRED = Counter("crowd_frames_inferred_total", "Frames sent to the detector")
+FRAMES_DROPPED = Counter("crowd_frames_dropped_total", "Frames skipped, by reason")
+INFERENCE_FPS = Rate("crowd_inference_fps", "Detector frames per second per source")
+ALERTS = Counter("crowd_alerts_total", "Alerts raised per source; kind is the alert rule's name")
+CAPTURE_RECONNECTS = Counter("crowd_capture_reconnects_total", "Times a lost video source was reopened")
+FRAME_AGE = Histogram("crowd_frame_age_seconds", "From frame decode to analytics done (grid published)")
+GLASS_TO_ALERT = Histogram("crowd_glass_to_alert_seconds", "From frame decode to its alert being queued for storage")
+LINE_CROSSINGS = Counter("crowd_line_crossings_total", "Tracked people crossing a gate line, by line and direction")
+NOTIFICATIONS = Counter("crowd_notifications_total", "Notifications by outcome: sent, failed, coalesced, dropped")
+TRACK_DWELL = Histogram("crowd_track_dwell_seconds", "Time from first to last detection of finished tracks",
+                        buckets=DWELL_BUCKETS)
+
+# Filled in at scrape time from the hubs, writers and gate
+SUBSCRIBERS = Gauge("crowd_subscribers", "Listeners per source; kind=viewers counts video clients only")
+PERSIST_QUEUE_DEPTH = Gauge("crowd_persist_queue_depth", "Rows waiting for the write-behind writer")
+PERSIST_ROWS = Gauge("crowd_persist_rows_total", "Write-behind rows by outcome", kind="counter")
+SNAPSHOTS = Gauge("crowd_alert_snapshots_total", "Alert snapshots by outcome", kind="counter")
+GATE_FRAMES = Gauge("crowd_gate_frames_total", "Motion gate decisions per source", kind="counter")
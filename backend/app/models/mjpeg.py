@@ -0,0 +1,150 @@
+# models/mjpeg.py
+import math
+import time
+from threading import Lock
+
+import cv2
+
+MAX_STREAM_FPS = 30
+MIN_STREAM_FPS = 0.1
+MIN_STREAM_WIDTH = 16
+MAX_STREAM_WIDTH = 3840  # Frames are never scaled up, this only bounds the request
+MIN_QUALITY, MAX_QUALITY = 10, 95
+DEFAULT_QUALITY = 80
+# Adaptive clients move along these steps so that clients on similar links
+# end up with identical settings and share one encode per frame
+WIDTH_STEPS = (1920, 1280, 960, 640, 480, 320)
+QUALITY_STEPS = (90, 80, 70, 55, 40)
+SLOW_FRAMES = 3  # Consecutive over-budget sends before stepping down
+FAST_FRAMES = 30  # Consecutive sends under half the budget before stepping up
+
+
+def multipart_chunk(jpeg_bytes):
+    return b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n'
+
+
+class RenderedFrame:
+    """One annotated frame plus the JPEG variants encoded from it so far.
+
+    Variants are keyed by (width, quality); every client asking for the same
+    pair reuses the first encode. Published frames replace each other in the
+    hub, so the cache lives exactly as long as the frame is the latest one.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.width = frame.shape[1]
+        self._scaled = {}
+        self._chunks = {}
+        self._lock = Lock()
+
+    def chunk(self, width, quality):
+        width = min(max(width, MIN_STREAM_WIDTH) if width else self.width, self.width)
+        key = (width, quality)
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                ok, buffer = cv2.imencode('.jpg', self._scale(width), [cv2.IMWRITE_JPEG_QUALITY, quality])
+                chunk = self._chunks[key] = multipart_chunk(buffer.tobytes())
+            return chunk
+
+    def _scale(self, width):
+        if width == self.width:
+            return self.frame
+        image = self._scaled.get(width)
+        if image is None:
+            height = round(self.frame.shape[0] * width / self.width)
+            image = self._scaled[width] = cv2.resize(self.frame, (width, height), interpolation=cv2.INTER_AREA)
+        return image
+
+
+class StreamSettings:
+    """Output settings for one MJPEG client.
+
+    fps, width and quality are the caps the client asked for. With `adaptive`
+    set, the time the server spends writing each frame is measured and width
+    and quality step down while sends overrun the frame budget, and back up
+    towards the caps once the link keeps up again.
+    """
+
+    def __init__(self, fps=None, width=None, quality=None, adaptive=True):
+        self.max_fps = min(max(fps or MAX_STREAM_FPS, MIN_STREAM_FPS), MAX_STREAM_FPS)
+        self.max_width = width
+        self.max_quality = min(max(quality or DEFAULT_QUALITY, MIN_QUALITY), MAX_QUALITY)
+        self.adaptive = adaptive
+        self.width = width
+        self.quality = self.max_quality
+        self._slow = 0
+        self._fast = 0
+
+    @classmethod
+    def from_args(cls, args):
+        """Settings from query args, clamped to sane ranges; bad or missing values use the defaults."""
+        fps = args.get("fps", type=float)
+        width = args.get("width", type=int)
+        quality = args.get("quality", type=int)
+        return cls(
+            fps=min(max(fps, MIN_STREAM_FPS), MAX_STREAM_FPS) if fps is not None and math.isfinite(fps) else None,
+            width=min(max(width, MIN_STREAM_WIDTH), MAX_STREAM_WIDTH) if width is not None else None,
+            quality=min(max(quality, MIN_QUALITY), MAX_QUALITY) if quality is not None else None,
+            adaptive=args.get("adaptive", "1") != "0",
+        )
+
+    @property
+    def interval(self):
+        return 1.0 / self.max_fps
+
+    def record_send(self, seconds, frame_width):
+        if not self.adaptive:
+            return
+        if seconds > self.interval:
+            self._slow, self._fast = self._slow + 1, 0
+            if self._slow >= SLOW_FRAMES:
+                self._slow = 0
+                self._step_down(frame_width)
+        elif seconds < self.interval / 2:
+            self._fast, self._slow = self._fast + 1, 0
+            if self._fast >= FAST_FRAMES:
+                self._fast = 0
+                self._step_up(frame_width)
+        else:
+            self._slow = self._fast = 0
+
+    def _step_down(self, frame_width):
+        # Shrinking the frame saves more bytes than lowering quality, so go first
+        width = min(self.width or frame_width, frame_width)
+        smaller = [step for step in WIDTH_STEPS if step < width]
+        if smaller:
+            self.width = smaller[0]
+            return
+        lower = [step for step in QUALITY_STEPS if step < self.quality]
+        if lower:
+            self.quality = lower[0]
+
+    def _step_up(self, frame_width):
+        steps = sorted(set(QUALITY_STEPS) | {self.max_quality})
+        higher = [step for step in steps if self.quality < step <= self.max_quality]
+        if higher:
+            self.quality = higher[0]
+            return
+        cap = min(self.max_width or frame_width, frame_width)
+        if self.width is None or self.width >= cap:
+            return
+        larger = [step for step in reversed(WIDTH_STEPS) if self.width < step <= cap]
+        self.width = larger[0] if larger else None if cap == frame_width else cap
+
+
+def mjpeg_stream(hub, settings):
+    """Multipart JPEG stream of one hub's rendered frames for one client.
+
+    The hub only ever hands over its newest frame, so a slow client skips
+    frames instead of queueing them or holding up the producer or anyone else.
+    """
+    for frame in hub.stream():
+        chunk = frame.chunk(settings.width, settings.quality)
+        started = time.time()
+        yield chunk
+        # Resumes once the server has written the chunk to the socket
+        sent = time.time() - started
+        settings.record_send(sent, frame.width)
+        time.sleep(max(0.0, settings.interval - sent))
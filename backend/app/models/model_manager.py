@@ -0,0 +1,80 @@
+# models/model_manager.py
+import os
+import time
+from threading import Lock
+
+import numpy as np
+
+from config import YOLO_IMGSZ, YOLO_MODEL_SIZE, YOLO_WARMUP, YOLO_WEIGHTS
+from models.logs import get_logger
+
+APP_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/app
+MODEL_SIZES = ("n", "s", "m", "l")
+
+log = get_logger("startup")
+
+_model = None
+_model_lock = Lock()
+_report = {
+    "weights": None,
+    "imgsz": YOLO_IMGSZ,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "first_frame_seconds": None,
+}
+
+
+def weights_path(size=YOLO_MODEL_SIZE):
+    """Explicit YOLO_WEIGHTS, else the bundled Yolo-Weights copy, else the ultralytics name."""
+    if YOLO_WEIGHTS:
+        return YOLO_WEIGHTS
+    if size not in MODEL_SIZES:
+        raise ValueError(f"YOLO_MODEL_SIZE must be one of {', '.join(MODEL_SIZES)}, got {size!r}")
+    name = f"yolov8{size}.pt"
+    bundled = os.path.join(APP_DIR, "Yolo-Weights", name)
+    return bundled if os.path.isfile(bundled) else name
+
+
+def get_model():
+    """The process-wide YOLO instance, loaded and warmed up on first use."""
+    global _model
+    if _model is not None:
+        return _model
+    with _model_lock:
+        if _model is None:
+            from ultralytics import YOLO
+
+            path = weights_path()
+            start = time.perf_counter()
+            model = YOLO(path)
+            loaded = time.perf_counter()
+
+            # Dummy passes build the graph and allocate buffers so the first
+            # real frame doesn't pay for them
+            blank = np.zeros((YOLO_IMGSZ, YOLO_IMGSZ, 3), dtype=np.uint8)
+            for _ in range(YOLO_WARMUP):
+                model(blank, imgsz=YOLO_IMGSZ, verbose=False)
+
+            _report.update(
+                weights=path,
+                load_seconds=loaded - start,
+                warmup_seconds=time.perf_counter() - loaded,
+            )
+            log.info("Loaded %s in %.2fs, warm-up %.2fs", path, _report["load_seconds"], _report["warmup_seconds"])
+            _model = model
+    return _model
+
+
+def predict(frames, **kwargs):
+    """Run the shared model; accepts one frame or a list, like calling the model directly."""
+    start = time.perf_counter()
+    kwargs.setdefault("imgsz", YOLO_IMGSZ)
+    results = get_model()(frames, **kwargs)
+    if _report["first_frame_seconds"] is None:
+        # Includes loading and warm-up when this call triggered them
+        _report["first_frame_seconds"] = time.perf_counter() - start
+    return results
+
+
+def model_report():
+    return dict(_report, loaded=_model is not None)
@@ -0,0 +1,66 @@
+# models/motion_gate.py
+import time
+
+import cv2
+import numpy as np
+
+from config import MOTION_MAX_INTERVAL, MOTION_THRESHOLD
+
+GATE_FRAME_SIZE = (160, 90)  # Foreground is measured on a thumbnail
+
+
+class MotionGate:
+    """Decides per frame whether the detector needs to run at all.
+
+    A MOG2 background model on a downscaled grayscale frame gives the share of
+    changed pixels in each grid cell. If no cell moved more than `threshold`
+    the previous detections are reused, except that a refresh is forced every
+    `max_interval` seconds so slow drifts are still picked up.
+    """
+
+    def __init__(self, grid_size, threshold=MOTION_THRESHOLD, max_interval=MOTION_MAX_INTERVAL):
+        self.grid_size = grid_size
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+        self.cell_change = np.zeros(grid_size, dtype=np.float32)
+        self.last_inference = None
+        self.frames = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.forced = 0
+
+    def should_infer(self, frame, now=None):
+        now = time.time() if now is None else now
+        small = cv2.resize(frame, GATE_FRAME_SIZE, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        mask = self.subtractor.apply(gray)
+
+        # INTER_AREA averages the binary mask over each cell in one call
+        rows, cols = self.grid_size
+        foreground = (mask > 0).astype(np.float32)
+        self.cell_change = cv2.resize(foreground, (cols, rows), interpolation=cv2.INTER_AREA)
+
+        self.frames += 1
+        if self.last_inference is None or self.cell_change.max() > self.threshold:
+            self.inferred += 1
+        elif now - self.last_inference >= self.max_interval:
+            self.forced += 1
+        else:
+            self.skipped += 1
+            return False
+        self.last_inference = now
+        return True
+
+    def stats(self):
+        # Skipped frames are the ones served from reused detections
+        frames = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+            "forced": self.forced,
+            "inference_rate": (self.inferred + self.forced) / frames,
+            "reuse_rate": self.skipped / frames,
+            "forced_rate": self.forced / frames,
+        }
@@ -0,0 +1,209 @@
+# models/notifier.py
+import atexit
+import queue
+import time
+from collections import deque
+from threading import Event, Lock, Thread
+
+from config import (ADMIN_PHONE_NUMBER, NOTIFIER, NOTIFY_DIGEST_SECONDS, NOTIFY_RATE_PER_MINUTE, TWILIO_ACCOUNT_SID,
+                    TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER)
+from models.logs import get_logger
+from models.metrics import NOTIFICATIONS
+
+MAX_QUEUE = 1000  # Notifications waiting for the worker before new ones are dropped
+BURST = 3  # Sends allowed back to back before the rate limit applies
+MAX_DIGEST_LINES = 10
+MAX_BODY = 1600  # Twilio's limit for one SMS body
+
+log = get_logger("notifier")
+
+
+class TwilioNotifier:
+    """SMS through a single Twilio client, created on first send and reused."""
+
+    name = "twilio"
+
+    def __init__(self, account_sid=TWILIO_ACCOUNT_SID, auth_token=TWILIO_AUTH_TOKEN, from_number=TWILIO_PHONE_NUMBER):
+        self.account_sid = account_sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self._client = None
+
+    def send(self, to, body):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(self.account_sid, self.auth_token)
+        return self._client.messages.create(body=body, from_=self.from_number, to=to).sid
+
+
+class StubNotifier:
+    """Keeps the last `keep` messages in memory instead of sending them.
+
+    For local runs and tests; `fail=True` makes every send raise.
+    """
+
+    name = "stub"
+
+    def __init__(self, keep=100, fail=False):
+        self.sent = deque(maxlen=keep)
+        self.fail = fail
+
+    def send(self, to, body):
+        if self.fail:
+            raise RuntimeError("Stub notifier is set to fail")
+        self.sent.append({"to": to, "body": body, "sent_at": time.time()})
+        log.info("Notification to %s: %s", to, body)
+        return f"stub-{len(self.sent)}"
+
+
+def create_notifier(kind=NOTIFIER):
+    if kind == "twilio":
+        return TwilioNotifier()
+    if kind == "stub":
+        return StubNotifier()
+    raise ValueError(f"Unknown notifier {kind!r}; expected twilio or stub")
+
+
+def compose_digest(bodies):
+    """One message for several alerts; a single alert is sent as is."""
+    if len(bodies) == 1:
+        return bodies[0][:MAX_BODY]
+    lines = [f"{len(bodies)} alerts:"] + [f"- {body}" for body in bodies[:MAX_DIGEST_LINES]]
+    if len(bodies) > MAX_DIGEST_LINES:
+        lines.append(f"...and {len(bodies) - MAX_DIGEST_LINES} more")
+    return "\n".join(lines)[:MAX_BODY]
+
+
+class NotificationDispatcher:
+    """Sends notifications from a worker thread so callers never wait on the API.
+
+    The first message to a recipient goes out right away; whatever follows
+    within `digest_seconds` is held and sent as one digest when the window
+    ends. A token bucket caps sends at `rate_per_minute` over all
+    recipients; while it is empty, messages keep collecting into the next
+    digest instead of being dropped.
+    """
+
+    def __init__(self, notifier, digest_seconds=NOTIFY_DIGEST_SECONDS, rate_per_minute=NOTIFY_RATE_PER_MINUTE,
+                 max_queue=MAX_QUEUE):
+        self.notifier = notifier
+        self.digest_seconds = digest_seconds
+        self.rate = rate_per_minute / 60
+        self._tokens = float(BURST)
+        self._refilled = time.time()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._pending = {}  # recipient -> bodies waiting for the next digest
+        self._last_sent = {}  # recipient -> time of the last send
+        self._throttled = False
+        self._stop = Event()
+        self._lock = Lock()
+        self._thread: Thread | None = None
+        self.queued = 0
+        self.sent = 0
+        self.digests = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.dropped = 0
+        self.rate_limited = 0  # Times a due send had to wait for the rate limit
+
+    def notify(self, body, to=None):
+        """Queue `body` for `to` (default ADMIN_PHONE_NUMBER); never blocks. False if dropped."""
+        self._ensure_running()
+        try:
+            self._queue.put_nowait((to or ADMIN_PHONE_NUMBER, body))
+        except queue.Full:
+            self.dropped += 1
+            NOTIFICATIONS.inc(outcome="dropped")
+            return False
+        self.queued += 1
+        return True
+
+    def stats(self):
+        return {
+            "notifier": self.notifier.name,
+            "queue_depth": self._queue.qsize(),
+            "pending": sum(len(bodies) for bodies in list(self._pending.values())),
+            "queued": self.queued,
+            "sent": self.sent,
+            "digests": self.digests,
+            "coalesced": self.coalesced,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "rate_limited": self.rate_limited,
+        }
+
+    def close(self, timeout=10):
+        """Stop after sending what is queued and pending (used at exit)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _ensure_running(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="notifier", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty() and not self._pending):
+            try:
+                to, body = self._queue.get(timeout=0.5)
+                self._pending.setdefault(to, []).append(body)
+            except queue.Empty:
+                pass
+            self._send_due(final=self._stop.is_set())
+
+    def _take_token(self):
+        now = time.time()
+        self._tokens = min(BURST, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _send_due(self, final=False):
+        now = time.time()
+        for to in list(self._pending):
+            if not final and now - self._last_sent.get(to, -float("inf")) < self.digest_seconds:
+                continue
+            if not final and not self._take_token():
+                if not self._throttled:
+                    self.rate_limited += 1
+                    self._throttled = True
+                return
+            self._throttled = False
+            bodies = self._pending.pop(to)
+            self._last_sent[to] = now
+            self._send(to, bodies)
+
+    def _send(self, to, bodies):
+        if len(bodies) > 1:
+            self.digests += 1
+            self.coalesced += len(bodies)
+            NOTIFICATIONS.inc(len(bodies), outcome="coalesced")
+        try:
+            self.notifier.send(to, compose_digest(bodies))
+        except Exception as e:
+            self.failed += 1
+            NOTIFICATIONS.inc(outcome="failed")
+            log.error("Sending notification to %s failed: %s", to, e)
+            return
+        self.sent += 1
+        NOTIFICATIONS.inc(outcome="sent")
+
+
+_dispatcher: NotificationDispatcher | None = None
+_dispatcher_lock = Lock()
+
+
+def get_dispatcher():
+    """Process-wide dispatcher shared by the pipeline and the alert routes."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher(create_notifier())
+            atexit.register(_dispatcher.close)
+        return _dispatcher
@@ -0,0 +1,302 @@
+# models/persistence.py
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import time
+from threading import Event, Lock, Thread
+
+from models.db import get_supabase
+from models.logs import get_logger
+from config import (PERSIST_BATCH_SIZE, PERSIST_FLUSH_INTERVAL, PERSIST_QUEUE_SIZE, PERSIST_SPOOL_MAX_ROWS,
+                    PERSIST_SPOOL_PATH)
+
+APP_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/app
+MIN_BACKOFF = 1
+MAX_BACKOFF = 300
+REPLAY_BATCH = 500
+RETRYABLE_STATUS = (408, 425, 429)  # 4xx responses that are worth retrying
+# SQLSTATE classes PostgREST passes through for rows the database will never
+# accept: data exceptions, integrity constraints, syntax/undefined column
+PERMANENT_SQLSTATE = ("22", "23", "42")
+
+log = get_logger("persistence")
+
+
+def is_permanent(error):
+    """Whether an insert failed because of the rows rather than the connection.
+
+    HTTP 4xx (except timeouts and rate limits), PostgREST's own request
+    errors (PGRST...) and data/constraint/schema SQLSTATEs will fail the
+    same way on every retry. Anything else, including network errors and
+    5xx, is treated as transient.
+    """
+    status = getattr(error, "status_code", None) or getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status not in RETRYABLE_STATUS
+    code = str(getattr(error, "code", None) or "")
+    return code.startswith("PGRST") or (len(code) == 5 and code[:2] in PERMANENT_SQLSTATE)
+
+
+class SqliteSpool:
+    """Append-only local store for rows that could not be delivered.
+
+    Holds at most `max_rows`; beyond that the oldest rows are evicted.
+    Rows the backend rejected for good are kept apart in `dead_letter`
+    (bounded the same way) for inspection instead of being retried.
+    """
+
+    def __init__(self, path, max_rows=PERSIST_SPOOL_MAX_ROWS):
+        if not os.path.isabs(path):
+            path = os.path.join(APP_DIR, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_rows = max_rows
+        self.size = None  # Spooled rows, kept here so stats() never queries from another thread
+        self._conn = None
+
+    def _db(self):
+        # Created lazily so the connection belongs to the writer thread
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS spool (id INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS dead_letter (id INTEGER PRIMARY KEY AUTOINCREMENT, tbl TEXT NOT NULL,"
+                " payload TEXT NOT NULL, error TEXT, failed_at REAL NOT NULL)"
+            )
+            self.size = self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+        return self._conn
+
+    def append(self, table, rows):
+        """Spool `rows`; returns how many old rows were evicted to stay within max_rows."""
+        with self._db() as db:
+            db.executemany("INSERT INTO spool (tbl, payload) VALUES (?, ?)", [(table, json.dumps(row)) for row in rows])
+            self.size += len(rows)
+            evicted = max(0, self.size - self.max_rows)
+            if evicted:
+                db.execute("DELETE FROM spool WHERE id IN (SELECT id FROM spool ORDER BY id LIMIT ?)", (evicted,))
+                self.size -= evicted
+        return evicted
+
+    def dead_letter(self, table, rows, error):
+        with self._db() as db:
+            now = time.time()
+            db.executemany("INSERT INTO dead_letter (tbl, payload, error, failed_at) VALUES (?, ?, ?, ?)",
+                           [(table, json.dumps(row), str(error), now) for row in rows])
+            db.execute("DELETE FROM dead_letter WHERE id <= (SELECT MAX(id) FROM dead_letter) - ?", (self.max_rows,))
+
+    def dead_letters(self, limit=100):
+        """Newest dead-lettered rows as dicts, for inspection."""
+        cursor = self._db().execute("SELECT tbl, payload, error, failed_at FROM dead_letter ORDER BY id DESC LIMIT ?",
+                                    (limit,))
+        return [{"table": tbl, "row": json.loads(payload), "error": error, "failed_at": failed_at}
+                for tbl, payload, error, failed_at in cursor]
+
+    def peek(self, limit):
+        """Oldest spooled rows as (table, [(id, row), ...]) for a single table."""
+        first = self._db().execute("SELECT tbl FROM spool ORDER BY id LIMIT 1").fetchone()
+        if first is None:
+            return None, []
+        cursor = self._db().execute("SELECT id, payload FROM spool WHERE tbl = ? ORDER BY id LIMIT ?", (first[0], limit))
+        return first[0], [(row_id, json.loads(payload)) for row_id, payload in cursor]
+
+    def delete(self, ids):
+        with self._db() as db:
+            db.executemany("DELETE FROM spool WHERE id = ?", [(row_id,) for row_id in ids])
+            self.size -= len(ids)
+
+    def count(self):
+        return self._db().execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+
+class WriteBehindWriter:
+    """Takes rows from the frame loop without blocking and inserts them in bulk.
+
+    `client_factory` returns anything with the Supabase table API
+    (client.table(name).insert(rows).execute()), so a local stub can stand in
+    for the real backend. Rows are flushed when a table collects `batch_size`
+    rows or `flush_interval` seconds pass. A transient failure puts the writer
+    into exponential backoff; while backing off, batches go to the spool and
+    are replayed, oldest first, after the next successful insert. Rows the
+    backend rejects outright (see is_permanent) are narrowed down by halving
+    the batch and moved to the dead-letter table, so one bad row neither
+    blocks the spool nor takes the rest of its batch with it.
+    """
+
+    def __init__(self, client_factory, max_queue=PERSIST_QUEUE_SIZE, batch_size=PERSIST_BATCH_SIZE,
+                 flush_interval=PERSIST_FLUSH_INTERVAL, spool_path=PERSIST_SPOOL_PATH,
+                 spool_max_rows=PERSIST_SPOOL_MAX_ROWS):
+        self._client_factory = client_factory
+        self._client = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool = SqliteSpool(spool_path, spool_max_rows)
+        self._backoff = 0
+        self._retry_at = 0.0
+        self._stop = Event()
+        self._lock = Lock()
+        self._thread: Thread | None = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.spooled = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.evicted = 0
+
+    def enqueue(self, table, row):
+        """Queue one row; never blocks. Returns False if the queue was full."""
+        self._ensure_running()
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            "queue_depth": self.queue_depth(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spooled": self.spooled,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "evicted": self.evicted,
+            "spool_rows": self.spool.size or 0,
+            "backoff_seconds": self._backoff,
+        }
+
+    def close(self, timeout=10):
+        """Stop the writer after draining what is queued (used at exit)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _ensure_running(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending = {}
+        deadline = time.time() + self.flush_interval
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                table, row = self._queue.get(timeout=max(0.0, min(deadline - time.time(), 1.0)))
+                rows = pending.setdefault(table, [])
+                rows.append(row)
+                if len(rows) >= self.batch_size:
+                    self._flush(table, pending.pop(table))
+            except queue.Empty:
+                pass
+
+            if time.time() >= deadline or self._stop.is_set():
+                for table in list(pending):
+                    self._flush(table, pending.pop(table))
+                self._replay()
+                deadline = time.time() + self.flush_interval
+
+        for table in list(pending):
+            self._flush(table, pending.pop(table))
+
+    def _insert(self, table, rows):
+        if self._client is None:
+            self._client = self._client_factory()
+        self._client.table(table).insert(rows).execute()
+
+    def _deliver(self, table, rows):
+        """Insert `rows`, dead-lettering the ones rejected for good.
+
+        Returns (undelivered, error): on a transient error, the rows from the
+        failing batch on (always a suffix of `rows`) and that error.
+        """
+        parts = [rows]  # Stack of batches still to send, next one last
+        while parts:
+            batch = parts.pop()
+            try:
+                self._insert(table, batch)
+            except Exception as e:
+                if not is_permanent(e):
+                    return batch + [row for part in reversed(parts) for row in part], e
+                if len(batch) > 1:
+                    middle = len(batch) // 2
+                    parts += [batch[middle:], batch[:middle]]
+                    continue
+                self.dead_lettered += 1
+                log.error("Insert into %s rejected (%s); row moved to the dead-letter table", table, e)
+                self.spool.dead_letter(table, batch, e)
+                continue
+            self.written += len(batch)
+        return [], None
+
+    def _flush(self, table, rows):
+        if time.time() < self._retry_at:
+            self._to_spool(table, rows)
+            return
+        rest, error = self._deliver(table, rows)
+        if error is not None:
+            self._failed(table, error)
+            self._to_spool(table, rest)
+            return
+        self._backoff = 0
+
+    def _failed(self, table, error):
+        self.failures += 1
+        self._backoff = min(max(self._backoff * 2, MIN_BACKOFF), MAX_BACKOFF)
+        self._retry_at = time.time() + self._backoff
+        log.error("Insert into %s failed (%s); retrying in %ss", table, error, self._backoff)
+
+    def _to_spool(self, table, rows):
+        try:
+            evicted = self.spool.append(table, rows)
+            self.spooled += len(rows)
+        except sqlite3.Error as e:
+            self.dropped += len(rows)
+            log.error("Could not spool %d %s rows: %s", len(rows), table, e)
+            return
+        if evicted:
+            self.evicted += evicted
+            log.warning("Spool full; evicted the %d oldest rows", evicted)
+
+    def _replay(self):
+        # Doubles as the reconnect probe once the backoff has expired
+        while time.time() >= self._retry_at:
+            table, entries = self.spool.peek(REPLAY_BATCH)
+            if not entries:
+                return
+            rest, error = self._deliver(table, [row for _, row in entries])
+            # Delivered and dead-lettered rows leave the spool; the rest stay at its head
+            self.spool.delete([row_id for row_id, _ in entries[:len(entries) - len(rest)]])
+            if error is not None:
+                self._failed(table, error)
+                return
+            self._backoff = 0
+
+
+_writer: WriteBehindWriter | None = None
+_writer_lock = Lock()
+
+
+def get_writer():
+    """Process-wide writer shared by crowd_data and alerts inserts."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter(get_supabase)
+            atexit.register(_writer.close)
+        return _writer
@@ -0,0 +1,57 @@
+# models/roi.py
+import cv2
+import numpy as np
+
+
+class RegionOfInterest:
+    """Where a camera looks for people: `include` polygons minus `exclude` ones.
+
+    Polygons are lists of [x, y] in frame fractions (0-1), so they fit any
+    resolution; no include polygons means the whole frame. Masks are
+    rasterised once per frame size.
+    """
+
+    def __init__(self, include=(), exclude=()):
+        self.include = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in include]
+        self.exclude = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in exclude]
+        self._masks = {}
+
+    @classmethod
+    def from_dict(cls, data):
+        """{"include": [[[x, y], ...], ...], "exclude": [...]}; a bare list is taken as include."""
+        if isinstance(data, list):
+            return cls(include=data)
+        return cls(include=data.get("include", ()), exclude=data.get("exclude", ()))
+
+    def to_dict(self):
+        return {"include": [polygon.tolist() for polygon in self.include],
+                "exclude": [polygon.tolist() for polygon in self.exclude]}
+
+    def mask(self, frame_size):
+        """(height, width) bool array, True where people are looked for."""
+        mask = self._masks.get(frame_size)
+        if mask is None:
+            width, height = frame_size
+            scale = np.array([width, height])
+            canvas = np.full((height, width), 0 if self.include else 1, dtype=np.uint8)
+            if self.include:
+                cv2.fillPoly(canvas, [np.round(p * scale).astype(np.int32) for p in self.include], 1)
+            if self.exclude:
+                cv2.fillPoly(canvas, [np.round(p * scale).astype(np.int32) for p in self.exclude], 0)
+            mask = self._masks[frame_size] = canvas.astype(bool)
+        return mask
+
+    def bounds(self, frame_size):
+        """(x0, y0, x1, y1) bounding box of the mask; the whole frame if it is empty."""
+        mask = self.mask(frame_size)
+        rows, cols = np.flatnonzero(mask.any(axis=1)), np.flatnonzero(mask.any(axis=0))
+        if not len(rows):
+            return 0, 0, frame_size[0], frame_size[1]
+        return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+    def contains(self, points, frame_size):
+        """Whether each (x, y) pixel point of an (N, 2) array is inside the region."""
+        mask = self.mask(frame_size)
+        x = np.clip(points[:, 0].astype(np.intp), 0, mask.shape[1] - 1)
+        y = np.clip(points[:, 1].astype(np.intp), 0, mask.shape[0] - 1)
+        return mask[y, x]
@@ -0,0 +1,158 @@
+# models/scheduler.py
+import time
+from threading import Event, Lock, Thread
+
+from models.camera_pipeline import CONF_THRESHOLD, CameraPipeline
+from models.capture import CaptureSource
+from models.cameras import get_camera, list_cameras
+from models.detector import get_detector
+from models.frame_hub import get_hub
+from models.logs import get_logger
+from models.metrics import FRAMES_INFERRED, INFERENCE_FPS
+from models.tiling import detect_parallel
+
+log = get_logger("scheduler")
+ROUND_WAIT = 0.1  # Longest a round waits for cameras to deliver a new frame
+
+
+def hub_name(camera_id):
+    return f"camera:{camera_id}"
+
+
+class BatchScheduler:
+    """Feeds every watched camera from one batched inference loop.
+
+    Each round grabs the latest frame from every camera whose hub has
+    listeners, runs them through the detector as a single batch and hands each
+    result back to that camera's own CameraPipeline, so per-camera state and
+    output stay separate while the per-call overhead is paid once.
+    """
+
+    def __init__(self, detector, cameras):
+        self.detector = detector
+        self.cameras = {camera.id: camera for camera in cameras}
+        self.pipelines = {camera.id: CameraPipeline(camera) for camera in cameras}
+        self.hubs = {camera.id: get_hub(hub_name(camera.id), on_wake=self.wake, source=camera.id) for camera in cameras}
+        self._captures = {}
+        self._wake = Event()
+        self._thread: Thread | None = None
+        self._thread_lock = Lock()
+
+    def hub(self, camera_id):
+        return self.hubs.get(camera_id)
+
+    def wake(self):
+        self._wake.set()
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="batch-scheduler", daemon=True)
+                self._thread.start()
+
+    def _capture(self, camera):
+        capture = self._captures.get(camera.id)
+        if capture is None:
+            capture = self._captures[camera.id] = CaptureSource(camera.source, name=camera.id).start()
+        return capture
+
+    def _release(self, camera_id):
+        capture = self._captures.pop(camera_id, None)
+        if capture is not None:
+            capture.stop()
+
+    def step(self, camera_ids):
+        """Run one batched inference round over `camera_ids`.
+
+        Frames come from each camera's capture thread; a camera with nothing
+        new by the end of the round's short wait sits this round out.
+        """
+        frames, captured_at, batch_ids, batch, results = {}, {}, [], [], {}
+        deadline = time.time() + ROUND_WAIT
+        for camera_id in camera_ids:
+            pipeline = self.pipelines[camera_id]
+            lap = time.perf_counter()
+            captured = self._capture(self.cameras[camera_id]).read(timeout=max(0.0, deadline - time.time()))
+            if captured is None:
+                continue
+            lap = pipeline.lap("capture_wait", lap)
+            frames[camera_id] = frame = captured.frame
+            captured_at[camera_id] = captured.captured_at
+            # Native frames (or their ROI/tile crops) go straight to the detector,
+            # which scales them to its input size
+            if pipeline.needs_inference(frame):
+                crops = pipeline.inference_crops(frame)
+                if crops:
+                    batch_ids.append((camera_id, len(batch), len(crops)))
+                    batch.extend(crops)
+                else:
+                    # The camera's ROI covers nothing: no people, without a model call
+                    results[camera_id] = pipeline.merge_detections(frame, [])
+            pipeline.lap("gate", lap)
+
+        # Only frames that passed the motion gate are sent to the model;
+        # results come back in input order, one per image
+        if batch:
+            started = time.perf_counter()
+            detections = detect_parallel(self.detector, batch, CONF_THRESHOLD)
+            # Each camera is charged its share of the batched call, by crop count
+            share = (time.perf_counter() - started) / len(batch)
+            for camera_id, first, count in batch_ids:
+                pipeline = self.pipelines[camera_id]
+                results[camera_id] = pipeline.merge_detections(frames[camera_id], detections[first:first + count])
+                pipeline.record("infer", share * count)
+                FRAMES_INFERRED.inc(source=camera_id)
+                INFERENCE_FPS.mark(source=camera_id)
+        for camera_id, frame in frames.items():
+            pipeline = self.pipelines[camera_id]
+            hub = self.hubs[camera_id]
+            hub.publish_grid(pipeline.process(frame, results.get(camera_id), captured_at[camera_id]))
+            # Drawing and JPEG encoding only happen while someone watches the video
+            if hub.has_viewers():
+                hub.publish(pipeline.render(frame))
+        return len(frames)
+
+    def stats(self):
+        return {camera_id: pipeline.gate.stats() for camera_id, pipeline in self.pipelines.items()}
+
+    def capture_stats(self):
+        return {camera_id: capture.stats() for camera_id, capture in list(self._captures.items())}
+
+    def _run(self):
+        log.info("Batch scheduler started for %d cameras", len(self.cameras))
+        while True:
+            self._wake.clear()
+            active = [camera_id for camera_id, hub in self.hubs.items() if hub.is_active()]
+            for camera_id in list(self._captures):
+                if camera_id not in active:
+                    self._release(camera_id)
+
+            if not active:
+                # Nobody is watching any camera: sleep until a subscriber wakes us
+                self._wake.wait(timeout=30)
+                continue
+
+            try:
+                self.step(active)
+            except Exception as e:
+                log.exception("Batch inference round failed: %s", e)
+                self._wake.wait(timeout=1)
+
+
+# Registered cameras share one batched inference loop
+_scheduler: BatchScheduler | None = None
+_scheduler_lock = Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BatchScheduler(get_detector(), list_cameras())
+        return _scheduler
+
+
+def camera_hub(camera_id=None):
+    """Hub of a registered camera (None = first camera), or None if unknown."""
+    camera = get_camera(camera_id)
+    if camera is None:
+        return None
+    return get_scheduler().hub(camera.id)
@@ -0,0 +1,132 @@
+# models/snapshots.py
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+
+import cv2
+
+from config import ALERT_RETENTION_MB, ALERT_THUMBNAILS
+from models.logs import get_logger
+
+SAVE_ALERT_PATH = "alerts/"
+THUMBNAIL_WIDTH = 320
+MAX_PENDING = 32  # Snapshots waiting for the encoder before new ones are dropped
+
+log = get_logger("snapshots")
+
+
+class SnapshotWriter:
+    """Encodes and stores alert snapshots off the inference thread.
+
+    Files are named after the hash of their JPEG bytes, so alerts raised in
+    the same second never overwrite each other. Each camera gets its own
+    directory with a retention cap; the oldest snapshots go first.
+    """
+
+    def __init__(self, root=SAVE_ALERT_PATH, workers=2, retention_mb=ALERT_RETENTION_MB, thumbnails=ALERT_THUMBNAILS):
+        self.root = root
+        self.retention_bytes = int(retention_mb * 1024 * 1024)
+        self.thumbnails = thumbnails
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="snapshot")
+        self._pending = BoundedSemaphore(MAX_PENDING)
+        self._lock = Lock()
+        self._usage = {}  # camera id -> {path: size}
+        self.written = 0
+        self.dropped = 0
+
+    def submit(self, camera_id, frame, cell=None, on_saved=None):
+        """Queue `frame` for writing; returns immediately.
+
+        `cell` is an optional (x1, y1, x2, y2) region for the thumbnail.
+        `on_saved(image_path, thumbnail_path)` runs on the encoder thread;
+        image_path is None if the snapshot had to be dropped.
+        """
+        if not self._pending.acquire(blocking=False):
+            self.dropped += 1
+            if on_saved:
+                on_saved(None, None)
+            return None
+        # The caller keeps drawing on its frame, so the encoder gets a copy
+        return self._executor.submit(self._write, camera_id, frame.copy(), cell, on_saved)
+
+    def _write(self, camera_id, frame, cell, on_saved):
+        try:
+            directory = os.path.join(self.root, str(camera_id))
+            os.makedirs(directory, exist_ok=True)
+            image_path = self._store(directory, frame, "")
+
+            thumbnail_path = None
+            if self.thumbnails and cell is not None:
+                x1, y1, x2, y2 = (int(v) for v in cell)
+                crop = frame[max(y1, 0):y2, max(x1, 0):x2]
+                if crop.size:
+                    scale = min(1.0, THUMBNAIL_WIDTH / crop.shape[1])
+                    crop = cv2.resize(crop, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                    thumbnail_path = self._store(directory, crop, "_thumb")
+
+            self._enforce_retention(camera_id, directory, [p for p in (image_path, thumbnail_path) if p])
+            self.written += 1
+        except Exception as e:
+            log.error("Could not write alert snapshot for %s: %s", camera_id, e)
+            image_path, thumbnail_path = None, None
+        finally:
+            self._pending.release()
+
+        if on_saved:
+            on_saved(image_path, thumbnail_path)
+        return image_path
+
+    def _store(self, directory, image, suffix):
+        ok, buffer = cv2.imencode('.jpg', image)
+        data = buffer.tobytes()
+        path = os.path.join(directory, f"alert_{hashlib.sha1(data).hexdigest()}{suffix}.jpg")
+        if not os.path.exists(path):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def _enforce_retention(self, camera_id, directory, new_paths):
+        with self._lock:
+            usage = self._usage.get(camera_id)
+            if usage is None:
+                # First write for this camera: pick up files from earlier runs
+                usage = self._usage[camera_id] = {}
+                for entry in os.scandir(directory):
+                    if entry.is_file() and entry.name.endswith(".jpg"):
+                        stat = entry.stat()
+                        usage[entry.path] = (stat.st_mtime, stat.st_size)
+            for path in new_paths:
+                stat = os.stat(path)
+                usage[path] = (stat.st_mtime, stat.st_size)
+
+            total = sum(size for _, size in usage.values())
+            if total <= self.retention_bytes:
+                return
+            for path, (_, size) in sorted(usage.items(), key=lambda item: item[1][0]):
+                if total <= self.retention_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                del usage[path]
+                total -= size
+
+    def disk_usage(self):
+        with self._lock:
+            return {camera_id: sum(size for _, size in usage.values()) for camera_id, usage in self._usage.items()}
+
+
+_writer: SnapshotWriter | None = None
+_writer_lock = Lock()
+
+
+def get_snapshot_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = SnapshotWriter()
+        return _writer
@@ -0,0 +1,145 @@
+# models/tiling.py
+import math
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+import numpy as np
+
+from config import DETECTOR_WORKERS, TILE_FULL_FRAME, TILE_OVERLAP, TILE_SIZE
+from models.detector import MAX_DETECTIONS, Detections, nms
+from models.logs import get_logger
+
+MERGE_IOU = 0.5  # Duplicates of one person from neighbouring tiles overlap less than NMS within one image
+EDGE_MARGIN = 2  # Pixels; boxes this close to an inner tile edge were cut off by it
+MASK_FILL = 114  # Letterbox grey, what the model sees as padding
+
+log = get_logger("tiling")
+
+
+class Tiling:
+    """Split frames into `size` pixel crops sharing `overlap` of their width,
+    plus with `full_frame` one whole-frame pass for people bigger than a tile."""
+
+    def __init__(self, size=TILE_SIZE, overlap=TILE_OVERLAP, full_frame=TILE_FULL_FRAME):
+        self.size = int(size)
+        self.overlap = float(overlap)
+        self.full_frame = bool(full_frame)
+
+    @classmethod
+    def from_dict(cls, data):
+        """true for the TILE_* defaults, or {"size", "overlap", "full_frame"}."""
+        if data is True:
+            return cls()
+        return cls(data.get("size", TILE_SIZE), data.get("overlap", TILE_OVERLAP), data.get("full_frame", TILE_FULL_FRAME))
+
+    def to_dict(self):
+        return {"size": self.size, "overlap": self.overlap, "full_frame": self.full_frame}
+
+
+def _tile_starts(start, end, size, overlap):
+    length = end - start
+    if length <= size:
+        return np.array([start]), end - start
+    count = math.ceil((length - size) / (size * (1 - overlap))) + 1
+    return np.round(np.linspace(start, end - size, count)).astype(int), size
+
+
+def tile_rects(bounds, size, overlap):
+    """(T, 4) x0, y0, x1, y1 tiles covering `bounds` with at least `overlap` shared between neighbours."""
+    x0, y0, x1, y1 = bounds
+    xs, width = _tile_starts(x0, x1, size, overlap)
+    ys, height = _tile_starts(y0, y1, size, overlap)
+    gx, gy = np.meshgrid(xs, ys)
+    gx, gy = gx.ravel(), gy.ravel()
+    return np.stack([gx, gy, gx + width, gy + height], axis=1)
+
+
+class CropPlan:
+    """Which crops of a frame the detector sees, and how their boxes are put back.
+
+    Built once per camera and frame size. The region of interest narrows the
+    crops to its bounding box, tiles without any ROI pixels are skipped, and
+    pixels outside it are painted grey. Without ROI or tiling the plan is the
+    untouched frame, so the default path costs nothing extra. An ROI that
+    leaves no pixels gives no crops, and merge() then returns no detections.
+    """
+
+    def __init__(self, frame_size, roi=None, tiling=None):
+        width, height = frame_size
+        self.frame_size = frame_size
+        self.roi = roi
+        self.mask = roi.mask(frame_size) if roi is not None else None
+        self.bounds = roi.bounds(frame_size) if roi is not None else (0, 0, width, height)
+
+        rects = np.array([self.bounds])
+        if tiling is not None:
+            rects = tile_rects(self.bounds, tiling.size, tiling.overlap)
+            if tiling.full_frame and len(rects) > 1:
+                rects = np.concatenate([rects, [self.bounds]])
+        self.partial = np.zeros(len(rects), dtype=bool)
+        if self.mask is not None:
+            inside = np.array([self.mask[y0:y1, x0:x1].mean() for x0, y0, x1, y1 in rects])
+            rects, self.partial = rects[inside > 0], inside[inside > 0] < 1
+        self.rects = rects
+        if not len(rects):
+            log.warning("Region of interest leaves no pixels of a %dx%d frame; nothing will be detected",
+                        width, height)
+        self.whole = self.mask is None and len(rects) == 1 and tuple(rects[0]) == (0, 0, width, height)
+
+    def crops(self, frame):
+        if self.whole:
+            return [frame]
+        crops = []
+        for (x0, y0, x1, y1), partial in zip(self.rects, self.partial):
+            crop = frame[y0:y1, x0:x1]
+            if partial:
+                crop = np.where(self.mask[y0:y1, x0:x1, None], crop, np.uint8(MASK_FILL))
+            crops.append(crop)
+        return crops
+
+    def merge(self, parts):
+        """One Detections in frame pixels from the per-crop results, in crop order."""
+        if self.whole:
+            return parts[0]
+        if not len(parts):
+            return Detections(np.empty((0, 4)), [], [])
+        bx0, by0, bx1, by1 = self.bounds
+        xyxy, cls, conf = [], [], []
+        for det, (x0, y0, x1, y1) in zip(parts, self.rects):
+            boxes = det.xyxy + np.array([x0, y0, x0, y0], dtype=np.float32)
+            # A box touching an edge inside the covered area was cut by it; the
+            # overlapping neighbour (or the full-frame pass) sees that person whole
+            cut = (((boxes[:, 0] <= x0 + EDGE_MARGIN) & (x0 > bx0)) | ((boxes[:, 1] <= y0 + EDGE_MARGIN) & (y0 > by0)) |
+                   ((boxes[:, 2] >= x1 - EDGE_MARGIN) & (x1 < bx1)) | ((boxes[:, 3] >= y1 - EDGE_MARGIN) & (y1 < by1)))
+            xyxy.append(boxes[~cut])
+            cls.append(det.cls[~cut])
+            conf.append(det.conf[~cut])
+        xyxy, cls, conf = np.concatenate(xyxy), np.concatenate(cls), np.concatenate(conf)
+
+        if self.roi is not None and len(xyxy):
+            inside = self.roi.contains((xyxy[:, :2] + xyxy[:, 2:]) * 0.5, self.frame_size)
+            xyxy, cls, conf = xyxy[inside], cls[inside], conf[inside]
+        if len(self.rects) > 1 and len(xyxy):
+            index = nms(xyxy, cls, conf, 0.0, MERGE_IOU)[:MAX_DETECTIONS]
+            xyxy, cls, conf = xyxy[index], cls[index], conf[index]
+        return Detections(xyxy, cls, conf)
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = Lock()
+
+
+def detect_parallel(detector, images, conf, workers=DETECTOR_WORKERS):
+    """detector.detect over `images`, split into up to `workers` batches that run
+    on a shared thread pool. Detectors that are not thread safe get one call."""
+    if not images:
+        return []
+    if workers <= 1 or len(images) <= 1 or not detector.thread_safe:
+        return detector.detect(images, conf)
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detect")
+    chunks = np.array_split(np.arange(len(images)), min(workers, len(images)))
+    futures = [_pool.submit(detector.detect, [images[i] for i in chunk], conf) for chunk in chunks]
+    return [detections for future in futures for detections in future.result()]
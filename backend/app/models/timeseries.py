@@ -0,0 +1,136 @@
+# models/timeseries.py
+import json
+import time
+from threading import Lock
+
+import numpy as np
+
+# (bucket width in seconds, buckets kept): 1 h at 1 s, 1 day at 1 min, 30 days at 1 h
+DEFAULT_TIERS = ((1, 3600), (60, 1440), (3600, 720))
+
+
+class _Tier:
+    """Fixed-size ring of per-bucket sums for one resolution."""
+
+    def __init__(self, resolution, capacity, n_fields):
+        self.resolution = resolution
+        self.capacity = capacity
+        self.starts = np.full(capacity, np.nan)
+        self.sums = np.zeros((capacity, n_fields))
+        self.counts = np.zeros(capacity)
+        self.head = -1
+        self.current = None
+        self.evicted_until = -np.inf  # Nothing older than this is still held
+
+    def add(self, ts, values):
+        bucket = ts // self.resolution * self.resolution
+        if bucket != self.current:
+            self.head = (self.head + 1) % self.capacity
+            if not np.isnan(self.starts[self.head]):
+                self.evicted_until = self.starts[self.head] + self.resolution
+            self.starts[self.head] = bucket
+            self.sums[self.head] = 0
+            self.counts[self.head] = 0
+            self.current = bucket
+        self.sums[self.head] += values
+        self.counts[self.head] += 1
+
+    def window(self, since, until):
+        """Bucket starts and means with since <= start < until, oldest first."""
+        mask = (self.starts >= since) & (self.starts < until)
+        order = np.argsort(self.starts[mask])
+        starts = self.starts[mask][order]
+        means = self.sums[mask][order] / self.counts[mask][order, None]
+        return starts, means
+
+
+class MultiResolutionSeries:
+    """Bounded time series kept at several resolutions at once.
+
+    Every sample is folded into each tier in O(1); memory is fixed by the tier
+    capacities no matter how long the process runs. drain_new() returns only
+    the finest-tier buckets completed since the previous call, which is what
+    each persisted crowd_data row carries.
+    """
+
+    def __init__(self, fields, tiers=DEFAULT_TIERS):
+        self.fields = tuple(fields)
+        self.tiers = [_Tier(resolution, capacity, len(self.fields)) for resolution, capacity in tiers]
+        self._lock = Lock()
+        self._flushed_until = None
+
+    def add(self, ts=None, **values):
+        ts = time.time() if ts is None else ts
+        row = np.array([values[field] for field in self.fields], dtype=float)
+        with self._lock:
+            for tier in self.tiers:
+                tier.add(ts, row)
+
+    def drain_new(self):
+        """{field: [[ts, value], ...]} for finest buckets finished since the last drain."""
+        finest = self.tiers[0]
+        with self._lock:
+            if finest.current is None:
+                return {field: [] for field in self.fields}
+            since = -np.inf if self._flushed_until is None else self._flushed_until
+            starts, means = finest.window(since, finest.current)
+            self._flushed_until = finest.current
+        return self._as_pairs(starts, means)
+
+    def query(self, since=None, until=None, resolution=None):
+        """Reassemble the series for [since, until) from the finest tier that covers it.
+
+        `resolution` (seconds) forces a tier; otherwise the finest tier still
+        holding `since` is used.
+        """
+        until = time.time() if until is None else until
+        since = until - 3600 if since is None else since
+        with self._lock:
+            tier = self._pick_tier(since, resolution)
+            starts, means = tier.window(since, until)
+        series = self._as_pairs(starts, means)
+        series["resolution"] = tier.resolution
+        return series
+
+    def _pick_tier(self, since, resolution):
+        if resolution is not None:
+            candidates = [tier for tier in self.tiers if tier.resolution >= resolution]
+            return candidates[0] if candidates else self.tiers[-1]
+        for tier in self.tiers:
+            if since >= tier.evicted_until:
+                return tier
+        return self.tiers[-1]
+
+    def _as_pairs(self, starts, means):
+        return {
+            field: [[int(ts), round(float(value), 4)] for ts, value in zip(starts, means[:, i])]
+            for i, field in enumerate(self.fields)
+        }
+
+
+# One series per camera, shared between the pipeline and the query routes
+_series = {}
+_series_lock = Lock()
+
+
+def get_series(camera_id, create=True):
+    with _series_lock:
+        series = _series.get(camera_id)
+        if series is None and create:
+            series = _series[camera_id] = MultiResolutionSeries(("density", "occupancy"))
+        return series
+
+
+def reassemble(rows, since=None, until=None):
+    """Stitch the per-row deltas of stored crowd_data rows back into one series."""
+    merged = {"density": [], "occupancy": []}
+    for row in rows:
+        for field, column in (("density", "density_over_time"), ("occupancy", "occupancy_over_time")):
+            samples = row.get(column) or []
+            if isinstance(samples, str):
+                samples = json.loads(samples)
+            merged[field].extend(sample for sample in samples if isinstance(sample, list))
+    for field, samples in merged.items():
+        samples.sort(key=lambda sample: sample[0])
+        merged[field] = [s for s in samples if (since is None or s[0] >= since) and (until is None or s[0] < until)]
+    return merged
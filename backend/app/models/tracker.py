@@ -0,0 +1,310 @@
+# models/tracker.py
+import time
+from collections import deque
+from threading import Lock
+
+import numpy as np
+
+from config import TRACK_IOU_THRESHOLD, TRACK_MAX_AGE, TRACK_MAX_SPEED, TRACK_MIN_HITS
+from models.metrics import LINE_CROSSINGS, TRACK_DWELL
+
+try:
+    import lap
+except ImportError:  # scipy is the slower but always available fallback
+    lap = None
+    from scipy.optimize import linear_sum_assignment
+
+# Kalman noise as a fraction of the box height, so near and far people are treated alike
+POSITION_NOISE = 0.05  # Per second, on centre and size
+VELOCITY_NOISE = 0.2  # Per second, on their rates of change
+MEASUREMENT_NOISE = 0.05
+MIN_REACH = 0.25  # Box heights a detection may be off by regardless of elapsed time
+CROSSING_MARGIN = 0.25  # Box heights a track must move past a line to change sides
+FLOW_RATE_WINDOW = 60  # Seconds of crossings behind the per-minute rates
+
+
+def iou_matrix(a, b):
+    """IoU of every box in a (N, 4) against every box in b (M, 4), as (N, M)."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def linear_assignment(cost, limit):
+    """Minimum-cost (row, col) pairs, leaving out pairs costing more than `limit`."""
+    if cost.size == 0:
+        return np.empty((0, 2), dtype=np.intp)
+    if lap is not None:
+        _, x, _ = lap.lapjv(cost, extend_cost=True, cost_limit=limit)
+        rows = np.flatnonzero(x >= 0)
+        return np.stack([rows, x[rows]], axis=1)
+    rows, cols = linear_sum_assignment(cost)
+    keep = cost[rows, cols] <= limit
+    return np.stack([rows[keep], cols[keep]], axis=1)
+
+
+def _cross(a, b):
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+
+
+def line_sides(points, starts, ends, margin, previous=None):
+    """Side of each segment starts -> ends (L, 2) that each point (N, 2) is on.
+
+    Returns an (N, L) int8 array: +1 on the right-hand side of start -> end as
+    drawn on screen (y pointing down), -1 on the left, 0 beside the segment's
+    ends. Points within `margin` pixels (N,) of the line keep their
+    `previous` side, so jitter around a line is not counted as crossings.
+    """
+    direction = ends - starts
+    length = np.maximum(np.hypot(direction[:, 0], direction[:, 1]), 1e-9)
+    offset = points[:, None] - starts[None]
+    distance = _cross(direction[None], offset) / length
+    along = (offset * direction[None]).sum(axis=2) / length ** 2
+    sides = np.sign(distance).astype(np.int8)
+    if previous is not None:
+        sides = np.where(np.abs(distance) > margin[:, None], sides, previous)
+    return np.where((along >= 0) & (along <= 1), sides, 0).astype(np.int8)
+
+
+def _trim(recent, now):
+    """Drop (time, count) crossings older than FLOW_RATE_WINDOW from the left of `recent`."""
+    while recent and now - recent[0][0] > FLOW_RATE_WINDOW:
+        recent.popleft()
+
+
+class CountLine:
+    """A named gate line in frame fractions (0-1), so it fits any resolution."""
+
+    def __init__(self, name, start, end):
+        self.name = name
+        self.start = (float(start[0]), float(start[1]))
+        self.end = (float(end[0]), float(end[1]))
+
+    @classmethod
+    def from_dict(cls, data):
+        """{"name": "entrance", "points": [[x1, y1], [x2, y2]]}"""
+        start, end = data["points"]
+        return cls(data["name"], start, end)
+
+    def to_dict(self):
+        return {"name": self.name, "points": [list(self.start), list(self.end)]}
+
+
+def _to_state(boxes):
+    """xyxy boxes to (cx, cy, w, h)."""
+    return np.concatenate([(boxes[:, :2] + boxes[:, 2:]) * 0.5, boxes[:, 2:] - boxes[:, :2]], axis=1)
+
+
+def _to_boxes(state):
+    half = state[:, 2:4] * 0.5
+    return np.concatenate([state[:, :2] - half, state[:, :2] + half], axis=1)
+
+
+class Tracker:
+    """Constant-velocity Kalman tracker with IoU/Hungarian association.
+
+    All tracks of a camera are held as arrays (state (N, 8), covariance
+    (N, 8, 8)), so predicting and updating cost a few batched array
+    operations per frame instead of one filter object per person. step() is
+    called on every frame: with detections it associates and corrects, without
+    them it only predicts, which keeps identities and box positions moving
+    between sparse detector runs. Tracks only age on detector runs. Motion is
+    in pixels per second, so uneven frame spacing (dropped live frames,
+    detector stride) is handled.
+
+    Tracks crossing `lines` are counted per direction, and the time from a
+    track's first to last detection is its dwell time.
+    """
+
+    def __init__(self, lines=(), iou_threshold=TRACK_IOU_THRESHOLD, max_speed=TRACK_MAX_SPEED,
+                 max_age=TRACK_MAX_AGE, min_hits=TRACK_MIN_HITS, source=None):
+        self.lines = list(lines)
+        self.iou_threshold = iou_threshold
+        self.max_speed = max_speed
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.source = source
+        self.mean = np.zeros((0, 8))
+        self.cov = np.zeros((0, 8, 8))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.first_seen = np.zeros(0)
+        self.last_seen = np.zeros(0)
+        self.live = np.zeros(0, dtype=bool)  # Matched at the latest detector run
+        self.measured = np.zeros((0, 4))  # Box from the latest detection of each track
+        self.side = np.zeros((0, len(self.lines)), dtype=np.int8)  # Per line, at the latest detection
+        self._next_id = 1
+        self._last_ts = None
+        self.counts = {(line.name, direction): 0 for line in self.lines for direction in ("in", "out")}
+        self._recent = {key: deque() for key in self.counts}  # (time, crossings) within FLOW_RATE_WINDOW
+        self.dwell_count = 0
+        self.dwell_total = 0.0
+        self._lock = Lock()
+
+    def step(self, now, frame_size, detections=None):
+        """Advance to `now`; `detections` is an (N, 4) xyxy array of people, or None
+        on frames the detector skipped. Returns the xyxy boxes of live tracks."""
+        with self._lock:
+            dt = 0.0 if self._last_ts is None else max(now - self._last_ts, 0.0)
+            self._last_ts = now
+            if dt > 0 and len(self.mean):
+                self._predict(dt)
+            updated = np.zeros(len(self.mean), dtype=bool)
+            if detections is not None:
+                updated = self._associate(now, np.asarray(detections, dtype=np.float64).reshape(-1, 4), frame_size)
+                # Tracks only age on detector runs, so a long motion-gate pause keeps them
+                updated = updated[self._expire(now)]
+
+            boxes = np.where(updated[:, None], self.measured, _to_boxes(self.mean[:, :4]))
+            return boxes[self.live].astype(np.float32)
+
+    def _predict(self, dt):
+        transition = np.eye(8)
+        transition[range(4), range(4, 8)] = dt
+        height = np.maximum(self.mean[:, 3], 1.0)
+        noise = np.concatenate([np.tile((POSITION_NOISE * height[:, None]) ** 2, 4),
+                                np.tile((VELOCITY_NOISE * height[:, None]) ** 2, 4)], axis=1) * dt
+        self.mean = self.mean @ transition.T
+        self.cov = transition @ self.cov @ transition.T
+        self.cov[:, range(8), range(8)] += noise
+        self.mean[:, 2:4] = np.maximum(self.mean[:, 2:4], 1.0)
+
+    def _associate(self, now, detections, frame_size):
+        cost = 1.0 - iou_matrix(_to_boxes(self.mean[:, :4]), detections)
+        matches = linear_assignment(cost, 1.0 - self.iou_threshold)
+
+        # Boxes that no longer overlap (a new track has no velocity yet, and at a
+        # high stride people move further than their own width) get a second
+        # chance by centre distance, as far as someone walking at `max_speed`
+        # box heights per second could have got since the previous detector run.
+        # Only tracks found in that run qualify; older ones would reach too far
+        left_tracks = np.setdiff1d(np.flatnonzero(self.live), matches[:, 0])
+        left_found = np.setdiff1d(np.arange(len(detections)), matches[:, 1])
+        if len(left_tracks) and len(left_found):
+            centres = (detections[left_found, :2] + detections[left_found, 2:]) * 0.5
+            offset = self.mean[left_tracks, None, :2] - centres[None]
+            elapsed = now - self.last_seen[left_tracks]
+            reach = np.maximum(self.mean[left_tracks, 3], 1.0) * (self.max_speed * elapsed + MIN_REACH)
+            near = linear_assignment(np.hypot(offset[..., 0], offset[..., 1]) / reach[:, None], 1.0)
+            matches = np.concatenate([matches, np.stack([left_tracks[near[:, 0]], left_found[near[:, 1]]], axis=1)])
+        tracks, found = matches[:, 0], matches[:, 1]
+
+        if len(tracks):
+            self._correct(tracks, _to_state(detections[found]))
+            self.measured[tracks] = detections[found]
+            self.hits[tracks] += 1
+            self.last_seen[tracks] = now
+            self._count_crossings(now, tracks, frame_size)
+        self.live[:] = False
+        self.live[tracks] = True
+
+        new = np.setdiff1d(np.arange(len(detections)), found)
+        self._spawn(now, detections[new], frame_size)
+        updated = np.zeros(len(self.mean), dtype=bool)
+        updated[tracks] = True
+        updated[len(updated) - len(new):] = True
+        return updated
+
+    def _correct(self, tracks, measurement):
+        mean, cov = self.mean[tracks], self.cov[tracks]
+        height = np.maximum(mean[:, 3], 1.0)
+        innovation_cov = cov[:, :4, :4] + np.eye(4) * ((MEASUREMENT_NOISE * height) ** 2)[:, None, None]
+        gain = cov[:, :, :4] @ np.linalg.inv(innovation_cov)
+        self.mean[tracks] = mean + np.einsum("nij,nj->ni", gain, measurement - mean[:, :4])
+        self.cov[tracks] = cov - gain @ cov[:, :4, :]
+
+    def _spawn(self, now, detections, frame_size):
+        count = len(detections)
+        state = np.zeros((count, 8))
+        state[:, :4] = _to_state(detections)
+        height = np.maximum(state[:, 3], 1.0)
+        # Velocity is unknown until the second detection
+        variance = np.concatenate([np.tile((2 * MEASUREMENT_NOISE * height[:, None]) ** 2, 4),
+                                   np.tile((10 * VELOCITY_NOISE * height[:, None]) ** 2, 4)], axis=1)
+        cov = np.zeros((count, 8, 8))
+        cov[:, range(8), range(8)] = variance
+
+        self.mean = np.concatenate([self.mean, state])
+        self.cov = np.concatenate([self.cov, cov])
+        self.ids = np.concatenate([self.ids, np.arange(self._next_id, self._next_id + count)])
+        self._next_id += count
+        self.hits = np.concatenate([self.hits, np.ones(count, dtype=np.int64)])
+        self.first_seen = np.concatenate([self.first_seen, np.full(count, now)])
+        self.last_seen = np.concatenate([self.last_seen, np.full(count, now)])
+        self.live = np.concatenate([self.live, np.ones(count, dtype=bool)])
+        self.measured = np.concatenate([self.measured, detections])
+        self.side = np.concatenate([self.side, self._sides(state[:, :2], height, frame_size)])
+
+    def _sides(self, centres, heights, frame_size, previous=None):
+        scale = np.asarray(frame_size, dtype=np.float64)
+        starts = np.array([line.start for line in self.lines]).reshape(-1, 2) * scale
+        ends = np.array([line.end for line in self.lines]).reshape(-1, 2) * scale
+        return line_sides(centres, starts, ends, heights * CROSSING_MARGIN, previous)
+
+    def _count_crossings(self, now, tracks, frame_size):
+        """Count side changes of just-detected `tracks`; predicted positions alone never count."""
+        if not self.lines:
+            return
+        previous = self.side[tracks]
+        sides = self._sides(self.mean[tracks, :2], np.maximum(self.mean[tracks, 3], 1.0), frame_size, previous)
+        self.side[tracks] = sides
+        # Unconfirmed tracks are often one-off false detections
+        confirmed = (self.hits[tracks] >= self.min_hits)[:, None]
+        inward = confirmed & (previous == -1) & (sides == 1)
+        outward = confirmed & (previous == 1) & (sides == -1)
+        for direction, crossed in (("in", inward), ("out", outward)):
+            for index, total in enumerate(crossed.sum(axis=0)):
+                if not total:
+                    continue
+                key = (self.lines[index].name, direction)
+                self.counts[key] += int(total)
+                recent = self._recent[key]
+                recent.append((now, int(total)))
+                _trim(recent, now)
+                LINE_CROSSINGS.inc(int(total), source=self.source, line=key[0], direction=direction)
+
+    def _expire(self, now):
+        """Drop tracks not detected for `max_age` seconds; returns the mask of kept tracks."""
+        expired = now - self.last_seen > self.max_age
+        if not expired.any():
+            return ~expired
+        dwell = (self.last_seen - self.first_seen)[expired & (self.hits >= self.min_hits)]
+        self.dwell_count += len(dwell)
+        self.dwell_total += float(dwell.sum())
+        for seconds in dwell:
+            TRACK_DWELL.observe(float(seconds), source=self.source)
+
+        keep = ~expired
+        self.mean, self.cov, self.ids, self.hits = self.mean[keep], self.cov[keep], self.ids[keep], self.hits[keep]
+        self.first_seen, self.last_seen = self.first_seen[keep], self.last_seen[keep]
+        self.live, self.measured, self.side = self.live[keep], self.measured[keep], self.side[keep]
+        return keep
+
+    def stats(self, now=None):
+        """Crossing totals and per-minute rates per line, plus dwell times."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rates = {}
+            for key, recent in self._recent.items():
+                _trim(recent, now)
+                rates[key] = sum(total for _, total in recent) * 60 / FLOW_RATE_WINDOW
+            confirmed = self.hits >= self.min_hits
+            active = now - self.first_seen[confirmed]
+            return {
+                "tracks": int(confirmed.sum()),
+                "lines": [{
+                    "name": line.name,
+                    "in": self.counts[(line.name, "in")],
+                    "out": self.counts[(line.name, "out")],
+                    "in_per_minute": rates[(line.name, "in")],
+                    "out_per_minute": rates[(line.name, "out")],
+                } for line in self.lines],
+                "dwell_seconds": {
+                    "active_mean": float(active.mean()) if len(active) else None,
+                    "completed": self.dwell_count,
+                    "completed_mean": self.dwell_total / self.dwell_count if self.dwell_count else None,
+                },
+            }
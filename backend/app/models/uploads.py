@@ -0,0 +1,245 @@
+# models/uploads.py
+import hashlib
+import os
+import tempfile
+import time
+import uuid
+from threading import Lock, Thread, local
+
+from werkzeug.utils import secure_filename
+
+from config import UPLOAD_CHUNK_SIZE, UPLOAD_EXPIRE_HOURS, UPLOAD_MAX_SIZE
+from models.logs import get_logger
+from models.video_index import HASH_BLOCK, allowed_file, connect, file_sha256, get_video_index
+
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+STALE_FINALIZE = 600  # Seconds after which a finalize that never finished may be retried
+
+log = get_logger("uploads")
+
+
+def stamped_name(filename, upload_dir):
+    """`name_<unix time>.ext`, with a counter if that is taken too."""
+    name, ext = os.path.splitext(secure_filename(filename))
+    stamp = int(time.time())
+    candidate, n = f"{name}_{stamp}{ext}", 1
+    while os.path.exists(os.path.join(upload_dir, candidate)):
+        candidate, n = f"{name}_{stamp}_{n}{ext}", n + 1
+    return candidate
+
+
+class UploadManager:
+    """Chunked, resumable uploads into the video index's folder.
+
+    A client creates a session with the file's name and size, then sends
+    numbered chunks in any order and from any worker, each streamed to its
+    offset in a preallocated file under uploads/.partial and checked
+    against the SHA-256 it was sent with, if any (browsers outside a secure
+    context cannot compute one). Received chunks are recorded in
+    SQLite, so after a dropped connection the client asks which are missing
+    and sends only those. Completing the session hashes the whole file,
+    moves it into the folder and indexes it on a background thread; a file
+    whose content is already indexed is not stored twice.
+    """
+
+    def __init__(self, index, chunk_size=UPLOAD_CHUNK_SIZE, max_size=UPLOAD_MAX_SIZE,
+                 expire_hours=UPLOAD_EXPIRE_HOURS):
+        self.index = index
+        self.partial_dir = os.path.join(index.upload_dir, ".partial")
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.expire_seconds = expire_hours * 3600
+        self._local = local()
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.index.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads (id TEXT PRIMARY KEY, filename TEXT NOT NULL, size INTEGER NOT NULL,"
+                " chunk_size INTEGER NOT NULL, sha256 TEXT, status TEXT NOT NULL, result TEXT, duplicate INTEGER,"
+                " error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS upload_chunks (upload_id TEXT NOT NULL, idx INTEGER NOT NULL,"
+                " sha256 TEXT NOT NULL, PRIMARY KEY (upload_id, idx))"
+            )
+        return conn
+
+    def _data_path(self, upload_id):
+        return os.path.join(self.partial_dir, upload_id)
+
+    def create(self, filename, size, sha256=None, chunk_size=None):
+        """Start a session; `sha256` of the whole file is checked on completion if given."""
+        if not filename or not allowed_file(filename):
+            raise ValueError(f"File type not allowed: {filename}")
+        size = int(size)
+        if not 0 < size <= self.max_size:
+            raise ValueError(f"'size' must be between 1 and {self.max_size} bytes")
+        chunk_size = min(max(int(chunk_size or self.chunk_size), MIN_CHUNK_SIZE), MAX_CHUNK_SIZE)
+        self.expire()
+
+        upload_id = uuid.uuid4().hex
+        os.makedirs(self.partial_dir, exist_ok=True)
+        with open(self._data_path(upload_id), "wb") as f:
+            f.truncate(size)
+        now = time.time()
+        with self._db() as db:
+            db.execute("INSERT INTO uploads (id, filename, size, chunk_size, sha256, status, created_at, updated_at)"
+                       " VALUES (?, ?, ?, ?, ?, 'receiving', ?, ?)",
+                       (upload_id, secure_filename(filename), size, chunk_size, sha256.lower() if sha256 else None,
+                        now, now))
+        log.info("Upload %s started: %s, %d bytes", upload_id, filename, size)
+        return self.get(upload_id)
+
+    def get(self, upload_id):
+        """The session with its missing chunk indices, or None if unknown."""
+        row = self._db().execute("SELECT * FROM uploads WHERE id = ?", (upload_id,)).fetchone()
+        if row is None:
+            return None
+        session = dict(row)
+        chunks = -(-session["size"] // session["chunk_size"])
+        received = set(range(chunks))  # Chunk records are dropped once a session is finished
+        if session["status"] in ("receiving", "finalizing"):
+            received = {idx for (idx,) in self._db().execute("SELECT idx FROM upload_chunks WHERE upload_id = ?",
+                                                             (upload_id,))}
+        session.update(duplicate=bool(session["duplicate"]), chunks=chunks, received=len(received),
+                       missing=[idx for idx in range(chunks) if idx not in received])
+        return session
+
+    def write_chunk(self, upload_id, index, stream, sha256=None):
+        """Stream chunk `index` from `stream` to its offset; ValueError if it is the
+        wrong length or does not match `sha256` (when given), in which case
+        neither the data file nor the chunk record is touched."""
+        session = self._db().execute("SELECT size, chunk_size, status FROM uploads WHERE id = ?",
+                                     (upload_id,)).fetchone()
+        if session is None:
+            raise LookupError(upload_id)
+        if session["status"] != "receiving":
+            raise ValueError(f"Upload is {session['status']}, not receiving")
+        offset = index * session["chunk_size"]
+        if not 0 <= offset < session["size"]:
+            raise ValueError(f"Chunk index {index} out of range")
+        expected = min(session["chunk_size"], session["size"] - offset)
+
+        # Staged and checked before anything reaches the data file, so a bad
+        # resend of a chunk already received cannot clobber the good bytes
+        digest, written = hashlib.sha256(), 0
+        with tempfile.SpooledTemporaryFile(max_size=HASH_BLOCK, dir=self.partial_dir) as staged:
+            while written <= expected:
+                block = stream.read(min(HASH_BLOCK, expected + 1 - written))
+                if not block:
+                    break
+                if written + len(block) > expected:
+                    raise ValueError(f"Chunk {index} is longer than {expected} bytes")
+                digest.update(block)
+                staged.write(block)
+                written += len(block)
+            if written != expected:
+                raise ValueError(f"Chunk {index} has {written} bytes, expected {expected}")
+            if sha256 and digest.hexdigest() != sha256.lower():
+                raise ValueError(f"Chunk {index} checksum mismatch")
+
+            staged.seek(0)
+            with open(self._data_path(upload_id), "r+b") as f:
+                f.seek(offset)
+                for block in iter(lambda: staged.read(HASH_BLOCK), b""):
+                    f.write(block)
+
+        with self._db() as db:
+            db.execute("INSERT OR REPLACE INTO upload_chunks (upload_id, idx, sha256) VALUES (?, ?, ?)",
+                       (upload_id, index, digest.hexdigest()))
+            db.execute("UPDATE uploads SET updated_at = ? WHERE id = ?", (time.time(), upload_id))
+        return {"index": index, "bytes": written}
+
+    def complete(self, upload_id):
+        """Check every chunk arrived and finalize in the background; returns the session."""
+        session = self.get(upload_id)
+        if session is None:
+            raise LookupError(upload_id)
+        if session["status"] in ("done", "failed"):
+            return session
+        if session["missing"]:
+            raise ValueError(f"{len(session['missing'])} chunks missing")
+        now = time.time()
+        with self._db() as db:
+            # Only one request wins the switch to finalizing
+            claimed = db.execute("UPDATE uploads SET status = 'finalizing', updated_at = ? WHERE id = ? AND"
+                                 " (status = 'receiving' OR (status = 'finalizing' AND updated_at < ?))",
+                                 (now, upload_id, now - STALE_FINALIZE)).rowcount
+        if claimed:
+            Thread(target=self._finalize, args=(upload_id,), name=f"upload-{upload_id[:8]}", daemon=True).start()
+        return self.get(upload_id)
+
+    def _finalize(self, upload_id):
+        session = self.get(upload_id)
+        data_path = self._data_path(upload_id)
+        try:
+            sha256 = file_sha256(data_path)
+            if session["sha256"] and sha256 != session["sha256"]:
+                raise ValueError("File checksum mismatch")
+            existing = self.index.find_hash(sha256)
+            if existing is not None and os.path.isfile(os.path.join(self.index.upload_dir, existing["filename"])):
+                os.remove(data_path)
+                result, duplicate = existing["filename"], True
+            else:
+                result, duplicate = stamped_name(session["filename"], self.index.upload_dir), False
+                os.replace(data_path, os.path.join(self.index.upload_dir, result))
+                self.index.add(result, sha256=sha256)
+        except Exception as e:
+            log.error("Upload %s failed to finalize: %s", upload_id, e)
+            self._finish(upload_id, "failed", error=str(e))
+            return
+        self._finish(upload_id, "done", result=result, duplicate=duplicate)
+        log.info("Upload %s stored as %s%s", upload_id, result, " (duplicate)" if duplicate else "")
+
+    def _finish(self, upload_id, status, result=None, duplicate=False, error=None):
+        with self._db() as db:
+            db.execute("UPDATE uploads SET status = ?, result = ?, duplicate = ?, error = ?, updated_at = ? WHERE id = ?",
+                       (status, result, int(duplicate), error, time.time(), upload_id))
+            db.execute("DELETE FROM upload_chunks WHERE upload_id = ?", (upload_id,))
+
+    def expire(self):
+        """Drop sessions untouched for `expire_seconds`, with their partial files."""
+        cutoff = time.time() - self.expire_seconds
+        expired = [upload_id for (upload_id,) in
+                   self._db().execute("SELECT id FROM uploads WHERE updated_at < ?", (cutoff,))]
+        if not expired:
+            return
+        with self._db() as db:
+            db.executemany("DELETE FROM upload_chunks WHERE upload_id = ?", [(upload_id,) for upload_id in expired])
+            db.executemany("DELETE FROM uploads WHERE id = ?", [(upload_id,) for upload_id in expired])
+        for upload_id in expired:
+            if os.path.exists(self._data_path(upload_id)):
+                os.remove(self._data_path(upload_id))
+        log.info("Expired %d uploads", len(expired))
+
+
+def store_file(file, index):
+    """Save a multipart upload the old way: written under .partial and moved into
+    the folder once complete, so listings never see a half-written file."""
+    partial_dir = os.path.join(index.upload_dir, ".partial")
+    os.makedirs(partial_dir, exist_ok=True)
+    temp_path = os.path.join(partial_dir, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    with open(temp_path, "wb") as f:
+        for block in iter(lambda: file.stream.read(HASH_BLOCK), b""):
+            digest.update(block)
+            f.write(block)
+    filename = stamped_name(file.filename, index.upload_dir)
+    os.replace(temp_path, os.path.join(index.upload_dir, filename))
+    return index.add(filename, sha256=digest.hexdigest())
+
+
+_manager: UploadManager | None = None
+_manager_lock = Lock()
+
+
+def get_upload_manager():
+    """Process-wide upload manager, sharing the video index's database."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = UploadManager(get_video_index())
+        return _manager
@@ -0,0 +1,175 @@
+# models/video_index.py
+import hashlib
+import os
+import sqlite3
+import time
+from threading import Lock, local
+
+import cv2
+
+from config import VIDEO_INDEX_PATH
+from models.logs import get_logger
+
+APP_DIR = os.path.dirname(os.path.dirname(__file__))  # backend/app
+UPLOAD_DIR = os.path.join(APP_DIR, "uploads")
+ALLOWED_EXTENSIONS = {"mp4", "avi", "mov", "mkv", "webm"}
+HASH_BLOCK = 1024 * 1024
+
+# Sort keys accepted by list(), mapped to SQL; ties go by filename
+SORT_COLUMNS = {
+    "uploaded_at": "uploaded_at",
+    "filename": "filename",
+    "size": "size",
+    "duration": "duration",
+    "fps": "fps",
+    "resolution": "width * height",
+}
+COLUMNS = ("filename", "size", "duration", "fps", "width", "height", "frames", "sha256", "uploaded_at")
+
+log = get_logger("videos")
+
+
+def allowed_file(filename: str) -> bool:
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def connect(path):
+    """SQLite connection for the calling thread; callers keep one per thread."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def probe_video(path):
+    """Duration, fps, resolution and frame count from the container headers.
+
+    None for values OpenCV cannot read; no frames are decoded.
+    """
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return {"duration": None, "fps": None, "width": None, "height": None, "frames": None}
+        fps = cap.get(cv2.CAP_PROP_FPS) or None
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+        return {
+            "duration": frames / fps if fps and frames else None,
+            "fps": fps,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or None,
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or None,
+            "frames": frames,
+        }
+    finally:
+        cap.release()
+
+
+class VideoIndex:
+    """Metadata of the videos in `upload_dir`, kept in SQLite.
+
+    Entries are written once, when an upload completes, so listing and
+    sorting never touch the files. Files copied in or removed by hand are
+    picked up on the next listing after the folder changes; those get no
+    content hash, since hashing them would hold up that request.
+    """
+
+    def __init__(self, path=VIDEO_INDEX_PATH, upload_dir=UPLOAD_DIR):
+        if not os.path.isabs(path):
+            path = os.path.join(APP_DIR, path)
+        self.path = path
+        self.upload_dir = upload_dir
+        self._local = local()
+        self._synced_mtime = None
+        self._sync_lock = Lock()
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS videos (filename TEXT PRIMARY KEY, size INTEGER NOT NULL, duration REAL,"
+                " fps REAL, width INTEGER, height INTEGER, frames INTEGER, sha256 TEXT, uploaded_at REAL NOT NULL)"
+            )
+            for column in ("uploaded_at", "size", "duration", "sha256"):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS videos_{column} ON videos ({column})")
+        return conn
+
+    def add(self, filename, sha256=None, uploaded_at=None):
+        """Probe `filename` in the upload folder and (re)index it; returns the entry."""
+        path = os.path.join(self.upload_dir, filename)
+        entry = {"filename": filename, "size": os.path.getsize(path), **probe_video(path), "sha256": sha256,
+                 "uploaded_at": uploaded_at or time.time()}
+        with self._db() as db:
+            db.execute(f"INSERT OR REPLACE INTO videos ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                       [entry[column] for column in COLUMNS])
+        return entry
+
+    def get(self, filename):
+        row = self._db().execute("SELECT * FROM videos WHERE filename = ?", (filename,)).fetchone()
+        return dict(row) if row else None
+
+    def find_hash(self, sha256):
+        """The indexed video with this content hash, if any."""
+        row = self._db().execute("SELECT * FROM videos WHERE sha256 = ? LIMIT 1", (sha256,)).fetchone()
+        return dict(row) if row else None
+
+    def remove(self, filename):
+        with self._db() as db:
+            db.execute("DELETE FROM videos WHERE filename = ?", (filename,))
+
+    def list(self, sort="uploaded_at", descending=True, limit=None, offset=0):
+        """(entries, total) sorted by one of SORT_COLUMNS."""
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Unknown sort key {sort!r}; expected one of {', '.join(SORT_COLUMNS)}")
+        self.sync()
+        order = "DESC" if descending else "ASC"
+        db = self._db()
+        total = db.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+        rows = db.execute(f"SELECT * FROM videos ORDER BY {SORT_COLUMNS[sort]} {order}, filename {order} LIMIT ? OFFSET ?",
+                          (-1 if limit is None else limit, offset)).fetchall()
+        return [dict(row) for row in rows], total
+
+    def sync(self):
+        """Reconcile with the folder, but only when its listing changed (one stat otherwise)."""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        mtime = os.stat(self.upload_dir).st_mtime_ns
+        if mtime == self._synced_mtime:
+            return
+        with self._sync_lock:
+            if mtime == self._synced_mtime:
+                return
+            on_disk = {}
+            with os.scandir(self.upload_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and allowed_file(entry.name):
+                        on_disk[entry.name] = entry
+            indexed = {row[0] for row in self._db().execute("SELECT filename FROM videos")}
+            for filename in indexed - on_disk.keys():
+                self.remove(filename)
+            for filename in on_disk.keys() - indexed:
+                self.add(filename, uploaded_at=on_disk[filename].stat().st_mtime)
+            if indexed ^ on_disk.keys():
+                log.info("Video index synced: %d added, %d removed", len(on_disk.keys() - indexed),
+                         len(indexed - on_disk.keys()))
+            self._synced_mtime = mtime
+
+
+_index: VideoIndex | None = None
+_index_lock = Lock()
+
+
+def get_video_index():
+    """Process-wide index of the upload folder."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VideoIndex()
+        return _index
@@ -1,14 +1,7 @@
-from supabase import create_client, Client
-from dotenv import load_dotenv
-load_dotenv()
-
-import os
 from datetime import datetime
 import json
-SUPABASE_URL =os.getenv('SUPABASE_URL')
-SUPABASE_API_KEY =os.getenv('SUPABASE_API_KEY')
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
+from models.db import get_supabase
+from models.persistence import get_writer
 
 # Function to create the "crowd_data" table if it doesn't exist
 def create_crowd_table():
@@ -26,7 +19,7 @@ def create_crowd_table():
         occupancy_over_time JSONB
     );
     """
-    response = supabase.rpc("sql", {"query": query}).execute()
+    response = get_supabase().rpc("sql", {"query": query}).execute()
     return response
 
 # Function to insert crowd data into the database
@@ -47,5 +40,6 @@ def insert_crowd_data(location, people_count, area_sqm, density_over_time, occup
         "occupancy_over_time": json.dumps(occupancy_over_time),
     }
 
-    response = supabase.table("crowd_data").insert(data).execute()
-    return response.data
+    # Queued for the background writer so a slow network never stalls the frame loop
+    get_writer().enqueue("crowd_data", data)
+    return data
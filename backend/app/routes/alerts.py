@@ -1,81 +1,45 @@
-
-import os
-from supabase import create_client, Client
-
-from dotenv import load_dotenv
 from flask import Flask, request, jsonify, Blueprint
-
-# Load environment variables from .env file
-load_dotenv()
-SUPABASE_URL =os.getenv('SUPABASE_URL')
-SUPABASE_API_KEY =os.getenv('SUPABASE_API_KEY')
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
-# print(supabase.)
+from models.db import get_supabase
+from models.logs import get_logger
+from models.notifier import get_dispatcher
+from routes.table_query import paged_table_response
 alerts_bp = Blueprint("alerts", __name__)
+log = get_logger("alerts")
 
-# Twilio Credentials
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
-ADMIN_PHONE_NUMBER = os.getenv("ADMIN_PHONE_NUMBER")
 def send_sms_alert(message):
-    """Send an SMS alert using Twilio."""
-    try:
-        from twilio.rest import Client
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            body=message,
-            from_=TWILIO_PHONE_NUMBER,
-            to=ADMIN_PHONE_NUMBER
-        )
-        return "SMS alert sent successfully!"
-    except Exception as e:
-        return f"Error sending SMS: {str(e)}"
+    """Queue an SMS alert; the notifier worker sends it (or folds it into a digest)."""
+    if get_dispatcher().notify(message):
+        return "SMS alert queued"
+    return "Error sending SMS: notification queue is full"
 
 @alerts_bp.route("/send_alerts", methods=["POST"])
 def send_alerts():
     message = "A high-density crowd has been detected. Immediate action is required!"
     sms_status = send_sms_alert(message)
 
-    return jsonify({"sms_status": sms_status}), 200
+    return jsonify({"sms_status": sms_status}), 202
 
 @alerts_bp.route("/get_alerts", methods=["GET"])
 def get_crowd_data():
+    # ?since=&until=&location=&columns=&limit=&cursor=, newest first.
+    # Responses are cached briefly and carry an ETag for If-None-Match.
     try:
-        response = (
-            supabase.table("crowd_data")
-            .select("*")
-            .execute()  # Explicitly pass API key
-        )
-
-        print(response)
-        if response.data:
-            return jsonify({"status": "success", "data": response.data}), 200
-        else:
-            return jsonify({"status": "success", "data": []}), 200
+        return paged_table_response(get_supabase(), "crowd_data")
     except Exception as e:
         return jsonify({"status": "error", "message": f"Error fetching crowd data: {str(e)}"}), 500
 
 
 # alert_service.py
-# from twilio.rest import Client
-# from  import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
-from backend.app.config import SAFE_EXIT_ROUTES
+from config import SAFE_EXIT_ROUTES
 
 
 def send_alert(mobile_number, location):
-    from twilio.rest import Client
-    client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-    exit_link ="https://maps.app.goo.gl/UbE1rPs6Y7CkPnFJ6",
-    print(exit_link)
+    exit_link = "https://maps.app.goo.gl/UbE1rPs6Y7CkPnFJ6"
     message = f"🚨 URGENT: High crowd density detected at {location}. Please exit safely via this route: {exit_link}"
-    print(message)
-    client.messages.create(
-        body=message,
-        from_=TWILIO_PHONE_NUMBER,
-        to=ADMIN_PHONE_NUMBER
-    )
-    return "sms sent successfully"
+    log.info("Queueing SMS alert: %s", message)
+    if not get_dispatcher().notify(message):
+        raise RuntimeError("Notification queue is full")
+    return "sms queued"
 
 
 @alerts_bp.route('/send_alert', methods=['POST'])
@@ -89,8 +53,16 @@ def send_alert_route():
     try:
 
         sid = send_alert(mobile, location)
-        print(sid)
-        return jsonify({"status": "Alert sent", "sid": sid})
+        log.debug("SMS alert result: %s", sid)
+        return jsonify({"status": "Alert queued", "sid": sid}), 202
     except Exception as e:
-        print(e)
+        log.error("SMS alert failed: %s", e)
         return jsonify({"error": str(e)}), 500
+
+
+@alerts_bp.route("/notifications", methods=["GET"])
+def get_notifications():
+    # Notifier worker counters; with NOTIFIER=stub also the messages it "sent"
+    dispatcher = get_dispatcher()
+    sent = getattr(dispatcher.notifier, "sent", None)
+    return jsonify(dict(dispatcher.stats(), messages=list(sent) if sent is not None else None))
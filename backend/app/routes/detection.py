@@ -1,272 +1,147 @@
-import cv2
-import numpy as np
+import time
+
 from flask import Blueprint, Response, jsonify, request
-from ultralytics import YOLO
 import os
-import time
-from datetime import datetime
-from threading import Lock, Thread
-from models.videodata import insert_crowd_data
-from models.insertalertdata import insert_alert_data
+from models.cameras import Camera, get_camera, list_cameras
+from models.capture import CaptureSource
+from models.camera_pipeline import CONF_THRESHOLD, CameraPipeline, overall_risk
+from models.frame_hub import get_hub
+from models.grid_events import grid_event_stream
+from models.logs import Sampler, get_logger
+from models.metrics import FRAMES_INFERRED, INFERENCE_FPS
+from models.mjpeg import StreamSettings, mjpeg_stream
+from models.detector import get_detector
+from models.model_manager import model_report
+from models.scheduler import camera_hub, get_scheduler
+from models.tiling import detect_parallel
 
-# Load YOLOv8 model
-model = YOLO('yolov8l.pt')
 detection_bp = Blueprint("detection", __name__)
-
-# Constants
-GRID_SIZE = (3, 3)
-SAVE_ALERT_PATH = "alerts/"
-LOCATION = "Gate A"
-COOLDOWN_TIME = 120  # 2 minutes cooldown
-CROWD_UPDATE_INTERVAL = 30  # Update crowd data every 30 seconds
-MAP_CENTER_LAT, MAP_CENTER_LON = 19.0760, 72.8777  # Example GPS coordinate for Mumbai
-
-# Ensure alert directory exists
-os.makedirs(SAVE_ALERT_PATH, exist_ok=True)
-
-# Shared variables
-risk_level = "Low"
-risk_lock = Lock()
-last_alert_times = {}  # Dictionary to store last alert times for each grid cell
-
-# Latest grid snapshot for real-time map
-grid_data_lock = Lock()
-last_grid_data = None
-
-# Background detection worker
-_bg_thread: Thread | None = None
-
-def _ensure_background_running():
-    global _bg_thread
-    if _bg_thread and _bg_thread.is_alive():
-        print("[DEBUG] Background thread already running")
-        return
-
-    print("[DEBUG] Starting background detection thread...")
-    def _runner():
-        # Consume the generator to keep updating last_grid_data
-        try:
-            print("[DEBUG] Background runner starting detect_crowd generator")
-            for frame_count, _ in enumerate(detect_crowd(None)):
-                # We don't need the frame bytes here; detect_crowd updates shared state
-                if frame_count % 30 == 0:  # Log every 30 frames
-                    print(f"[DEBUG] Background processed {frame_count} frames")
-        except Exception as e:
-            print(f"[ERROR] Background detection stopped: {e}")
-            import traceback
-            traceback.print_exc()
-
-    _bg_thread = Thread(target=_runner, daemon=True)
-    _bg_thread.start()
-    print(f"[DEBUG] Background thread started: {_bg_thread.is_alive()}")
-
-def detect_crowd(video_override: str | None = None):
-    # Open video capture
-    if video_override:
-        video_path = video_override
-    else:
-        base_dir = os.path.dirname(os.path.dirname(__file__))  # backend/app
-        video_path = os.path.join(base_dir, "1.mp4")
-    
-    print(f"[DEBUG] Opening video: {video_path}")
-    cap = cv2.VideoCapture(video_path)
-
-    if not cap.isOpened():
-        print(f"[ERROR] Cannot open video file: {video_path}")
-        return
-
-    frame_width = int(cap.get(3))
-    frame_height = int(cap.get(4))
-    print(f"[DEBUG] Video opened successfully: {frame_width}x{frame_height}")
-    grid_width = frame_width // GRID_SIZE[1]
-    grid_height = frame_height // GRID_SIZE[0]
-
-    last_crowd_update_time = time.time()  # Initialize crowd data update timer
-    last_update_time = time.time()
-    density_over_time = []
-    occupancy_over_time = []
-    camera_height = None
-
-    def estimate_camera_height(person_pixel_height, known_person_height=1.7, frame_height=1080):
-        if person_pixel_height == 0:
-            return None
-        return (known_person_height * frame_height) / person_pixel_height
-
-    def compute_real_world_area(camera_height):
-        if camera_height is None:
-            return 50  # Default area
-        return (2 * camera_height) ** 2
-
-    def map_pixel_to_gps(x, y):
-        lat_offset = (y / frame_height - 0.5) * 0.0005
-        lon_offset = (x / frame_width - 0.5) * 0.0005
-        return MAP_CENTER_LAT + lat_offset, MAP_CENTER_LON + lon_offset
-
-    def handle_alert(frame, location, grid_x, grid_y, people_count, density_per_sqm, latitude, longitude):
-        alert_filename = os.path.join(SAVE_ALERT_PATH, f"alert_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg")
-        cv2.imwrite(alert_filename, frame)
-        print(f"[ALERT] High crowd density detected! Image saved: {alert_filename}")
-        global risk_level
-        risk_level = "Low" if density_per_sqm < 2 else "Medium" if density_per_sqm < 4 else "High"
-
-        insert_alert_data(
-            location=location,
-            grid_x=grid_x,
-            grid_y=grid_y,
-            message="High crowd density detected!",
-            image_path=alert_filename,
-            people_count=int(people_count),
-            density_per_sqm=float(density_per_sqm),
-            risk_level=risk_level,
-            latitude=latitude,
-            longitude=longitude,
-            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        )
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            print("[DEBUG] End of video, restarting...")
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Restart video
-            continue
-
-        print("[DEBUG] Processing frame...")
-        frame = cv2.resize(frame, (1920, 1080))
-        results = model(frame, conf=0.0001)
-        grid_counts = np.zeros(GRID_SIZE, dtype=int)
-        person_count = 0
-        current_time = time.time()
-
-        for result in results:
-            boxes = result.boxes.xyxy
-            classes = result.boxes.cls
-            print(f"[DEBUG] Found {len(boxes)} detections in frame")
-
-            for i in range(len(boxes)):
-                if int(classes[i]) == 0:
-                    person_count += 1
-                    x1, y1, x2, y2 = map(int, boxes[i])
-                    person_pixel_height = y2 - y1
-                    if camera_height is None:
-                        camera_height = estimate_camera_height(person_pixel_height)
-
-                    grid_x = min((x1 + x2) // 2 // grid_width, GRID_SIZE[1] - 1)
-                    grid_y = min((y1 + y2) // 2 // grid_height, GRID_SIZE[0] - 1)
-                    grid_counts[grid_y, grid_x] += 1
-
-                    latitude, longitude = map_pixel_to_gps((x1 + x2) / 2, (y1 + y2) / 2)
-
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(frame, "Person", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                    cv2.putText(frame, f"Lat: {latitude:.5f}, Lon: {longitude:.5f}", (x1, y2 + 20),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 255), 1)
-
-        REAL_WORLD_AREA = compute_real_world_area(camera_height)
-        density_per_sqm = person_count / REAL_WORLD_AREA
-        occupancy = person_count
-        print(f"[DEBUG] Frame stats - People: {person_count}, Density: {density_per_sqm:.2f}")
-
-        new_risk = "Low" if density_per_sqm < 2 else "Medium" if density_per_sqm < 4 else "High"
-        with risk_lock:
-            risk_level = new_risk
-
-        grid_area = compute_real_world_area(camera_height) / (GRID_SIZE[0] * GRID_SIZE[1])
-
-        for y in range(GRID_SIZE[0]):
-            for x in range(GRID_SIZE[1]):
-                cell_key = (y, x)
-                people_in_cell = grid_counts[y, x]
-                cell_density = people_in_cell / grid_area if grid_area else 0
-
-                if cell_density > 2 and (
-                        cell_key not in last_alert_times or current_time - last_alert_times[cell_key] > COOLDOWN_TIME):
-                    last_alert_times[cell_key] = current_time
-                    latitude, longitude = map_pixel_to_gps(x * grid_width, y * grid_height)
-
-                    handle_alert(
-                        frame,
-                        f"{LOCATION} (Grid {x},{y})",
-                        x,
-                        y,
-                        people_in_cell,
-                        cell_density,
-                        latitude,
-                        longitude
-                    )
-
-                # Draw the grid cell and display the crowd count
-                cv2.rectangle(frame, (x * grid_width, y * grid_height),
-                              ((x + 1) * grid_width, (y + 1) * grid_height), (255, 0, 0), 2)
-                cv2.putText(frame, f"{grid_counts[y, x]}",
-                            (x * grid_width + 10, y * grid_height + 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 0), 2)
-
-        # Update shared grid snapshot for real-time map consumers
-        with grid_data_lock:
-            global last_grid_data
-            last_grid_data = {
-                "timestamp": datetime.now().isoformat(),
-                "grid_counts": grid_counts.tolist(),
-                "grid_size": {"rows": GRID_SIZE[0], "cols": GRID_SIZE[1]},
-                "frame": {"width": frame_width, "height": frame_height},
-                "people_count": int(person_count),
-                "density_per_sqm": float(density_per_sqm),
-                "risk_level": risk_level,
-            }
-            print(f"[DEBUG] last_grid_data SET: {last_grid_data}")
-
-        if time.time() - last_update_time >= 30:
-            density_over_time.append(density_per_sqm)
-            occupancy_over_time.append(occupancy)
-
-            insert_crowd_data(
-                location=LOCATION,
-                people_count=person_count,
-                area_sqm=REAL_WORLD_AREA,
-                density_over_time=density_over_time,
-                occupancy_over_time=occupancy_over_time
-            )
-
-            last_update_time = time.time()
-
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame_bytes = buffer.tobytes()
-        yield (b'--frame\r\n' b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-
-    cap.release()
+log = get_logger("detection")
+grid_log = Sampler(log)
+
+def _upload_hub(video_path: str):
+    # Ad-hoc uploaded videos get their own single-source pipeline
+    return get_hub(video_path, lambda on_grid, has_viewers: detect_crowd(video_path, on_grid, has_viewers=has_viewers),
+                   source=os.path.basename(video_path))
+
+def detect_crowd(video_override: str | None = None, on_grid=None, camera: Camera | None = None, has_viewers=None):
+    """Single-source loop for one video; registered cameras go through the scheduler.
+
+    Yields a rendered frame per input frame, or None when `has_viewers()` says
+    nobody is watching and the frame was only analysed.
+    """
+    if camera is None:
+        default = get_camera()
+        camera = Camera(os.path.basename(video_override), video_override, default.location,
+                        default.grid_size, default.map_center) if video_override else default
+    pipeline = CameraPipeline(camera)
+
+    # Decoding, looping and reconnects happen on the capture thread
+    capture = CaptureSource(camera.source, name=camera.id).start()
+    try:
+        while True:
+            lap = time.perf_counter()
+            captured = capture.read(timeout=1)
+            if captured is None:
+                yield None  # Lets the hub check for idleness while the source is down
+                continue
+            frame = captured.frame
+            lap = pipeline.lap("capture_wait", lap)
+
+            infer = pipeline.needs_inference(frame)
+            lap = pipeline.lap("gate", lap)
+            detections = None
+            if infer:
+                parts = detect_parallel(get_detector(), pipeline.inference_crops(frame), CONF_THRESHOLD)
+                detections = pipeline.merge_detections(frame, parts)
+                pipeline.lap("infer", lap)
+                FRAMES_INFERRED.inc(source=camera.id)
+                INFERENCE_FPS.mark(source=camera.id)
+            snapshot = pipeline.process(frame, detections, captured.captured_at)
+            if on_grid:
+                on_grid(snapshot)
+            yield pipeline.render(frame) if has_viewers is None or has_viewers() else None
+    finally:
+        capture.stop()
 
 @detection_bp.route("/stream", methods=["GET"])
 def stream_video():
-    # Optional query param ?video=<filename> for an uploaded video in backend/app/uploads
+    # Optional query param ?video=<filename> for an uploaded video in backend/app/uploads,
+    # or ?camera=<id> for a registered camera (defaults to the first one).
+    # Per-client output: ?fps=&width=&quality= caps, ?adaptive=0 to pin them
     video_param = request.args.get("video")
-    video_path = None
+    hub = None
     if video_param:
-        import os
         base_dir = os.path.dirname(os.path.dirname(__file__))
         upload_dir = os.path.join(base_dir, "uploads")
         candidate = os.path.join(upload_dir, os.path.basename(video_param))
         if os.path.isfile(candidate):
-            video_path = candidate
-    return Response(detect_crowd(video_path), mimetype="multipart/x-mixed-replace; boundary=frame")
+            hub = _upload_hub(candidate)
+    if hub is None:
+        hub = camera_hub(request.args.get("camera"))
+    if hub is None:
+        return jsonify({"error": "Unknown camera"}), 404
+    return Response(mjpeg_stream(hub, StreamSettings.from_args(request.args)),
+                    mimetype="multipart/x-mixed-replace; boundary=frame")
 
 @detection_bp.route("/risk-analysis", methods=["GET"])
 def get_risk_analysis():
-    with risk_lock:
-        return jsonify({"risk_level": risk_level})
+    worst, per_camera = overall_risk()
+    return jsonify({"risk_level": worst, "cameras": per_camera})
+
+
+@detection_bp.route("/stats", methods=["GET"])
+def get_pipeline_stats():
+    # Motion-gate counters per registered camera: how often YOLO actually ran,
+    # plus capture state (decoded, dropped as stale, reconnects)
+    scheduler = get_scheduler()
+    return jsonify({"cameras": scheduler.stats(), "capture": scheduler.capture_stats()})
+
+
+@detection_bp.route("/flow", methods=["GET"])
+def get_flow():
+    # ?camera=<id>: tracked people crossing the camera's gate lines (totals and
+    # per-minute rates per direction) and how long tracks stay in view
+    camera = get_camera(request.args.get("camera"))
+    if camera is None:
+        return jsonify({"error": "Unknown camera"}), 404
+    pipeline = get_scheduler().pipelines[camera.id]
+    return jsonify(dict(pipeline.tracker.stats(), camera=camera.id))
+
+
+@detection_bp.route("/model", methods=["GET"])
+def get_model_report():
+    # Which backend and weights are loaded and what cold start / first frame cost
+    return jsonify(dict(model_report(), backend=get_detector().name))
+
+
+@detection_bp.route("/cameras", methods=["GET"])
+def get_cameras():
+    return jsonify({"cameras": [camera.to_dict() for camera in list_cameras()]})
+
+
+@detection_bp.route("/grid/stream", methods=["GET"])
+def stream_grid():
+    # Server-sent events: one full snapshot, then changed cells only.
+    # ?camera=<id>&max_hz=<events per second, default 2>
+    hub = camera_hub(request.args.get("camera"))
+    if hub is None:
+        return jsonify({"error": "Unknown camera"}), 404
+    max_hz = request.args.get("max_hz", 2.0, type=float)
+    return Response(grid_event_stream(hub, max_hz), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @detection_bp.route("/grid", methods=["GET"])
 def get_latest_grid():
     # Returns the latest grid counts and metadata for the real-time density map
-    # Ensure background detection is running so we have live snapshots even if stream isn't open
-    print("[DEBUG] /grid endpoint called")
-    _ensure_background_running()
-    with grid_data_lock:
-        global last_grid_data
-        data = last_grid_data
-    print(f"[DEBUG] /grid endpoint sees last_grid_data: {data}")
+    # Polling keeps the shared pipeline alive so we have live snapshots even if stream isn't open
+    hub = camera_hub(request.args.get("camera"))
+    if hub is None:
+        return jsonify({"error": "Unknown camera"}), 404
+    hub.touch()
+    data = hub.latest_grid()
     if data is None:
-        print("[DEBUG] No grid data available yet, returning 202")
         return jsonify({"status": "warming_up"}), 202
     # Add data_age_seconds to response
     from datetime import datetime
@@ -275,7 +150,7 @@ def get_latest_grid():
         age = (datetime.now() - ts).total_seconds()
     except Exception:
         age = None
-    print(f"[DEBUG] Returning grid data with {data['people_count']} people, age: {age}")
+    grid_log.log("/grid camera=%s people=%d age=%s", data["camera"], data["people_count"], age)
     resp = dict(data)
     resp["data_age_seconds"] = age
     return jsonify(resp)
@@ -1,31 +1,90 @@
-from flask import Blueprint, jsonify
-from supabase import create_client, Client
-from dotenv import load_dotenv
-
-load_dotenv()
-import os
-SUPABASE_URL =os.getenv('SUPABASE_URL')
-SUPABASE_API_KEY =os.getenv('SUPABASE_API_KEY')
+from flask import Blueprint, jsonify, request
+from datetime import datetime, timezone
+from models.db import get_supabase
+from models.cameras import get_camera
+from models.camera_pipeline import classify_risk
+from models.congestion_predictor import backtest, predict_congestion
+from models.timeseries import get_series, reassemble
+from routes.table_query import paged_table_response
 
 # Create a Blueprint for crowd data routes
 crowd_bp = Blueprint("crowd", __name__)
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
 
 
 @crowd_bp.route("/crowd_data", methods=["GET"])
 def get_crowd_data():
+    # ?since=&until=&location=&columns=&limit=&cursor=, newest first.
+    # Responses are cached briefly and carry an ETag for If-None-Match.
     try:
-        response = (
-            supabase.table("crowd_data")
-            .select("*")
-            .execute()  # Explicitly pass API key
-        )
-
-        print(response)
-        if response.data:
-            return jsonify({"status": "success", "data": response.data}), 200
-        else:
-            return jsonify({"status": "success", "data": []}), 200
+        return paged_table_response(get_supabase(), "crowd_data")
     except Exception as e:
         return jsonify({"status": "error", "message": f"Error fetching crowd data: {str(e)}"}), 500
+
+
+def _load_series(camera, since, until, resolution=None):
+    if request.args.get("source") == "stored":
+        query = get_supabase().table("crowd_data").select("timestamp,density_over_time,occupancy_over_time") \
+            .eq("location", camera.location)
+        if since is not None:
+            query = query.gte("timestamp", datetime.fromtimestamp(since, timezone.utc).replace(tzinfo=None).isoformat())
+        if until is not None:
+            # Samples in a row predate its timestamp by up to one flush interval
+            query = query.lte("timestamp", datetime.fromtimestamp(until + 60, timezone.utc).replace(tzinfo=None).isoformat())
+        response = query.order("timestamp").execute()
+        return reassemble(response.data or [], since, until)
+    return get_series(camera.id).query(since, until, resolution)
+
+
+@crowd_bp.route("/series", methods=["GET"])
+def get_crowd_series():
+    # ?camera=<id>&since=<epoch>&until=<epoch>&resolution=<seconds>
+    # Served from the live in-memory tiers; ?source=stored stitches the
+    # per-row deltas stored in crowd_data instead.
+    camera = get_camera(request.args.get("camera"))
+    if camera is None:
+        return jsonify({"status": "error", "message": "Unknown camera"}), 404
+    try:
+        since = request.args.get("since", type=float)
+        until = request.args.get("until", type=float)
+        resolution = request.args.get("resolution", type=float)
+
+        series = _load_series(camera, since, until, resolution)
+        return jsonify({"status": "success", "camera": camera.id, "data": series}), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error fetching crowd series: {str(e)}"}), 500
+
+
+@crowd_bp.route("/forecast", methods=["GET"])
+def get_crowd_forecast():
+    # ?camera=<id>&minutes=1,5,15 (each 1-15). Whole-view and per-cell
+    # density with ~95% bands, from the camera's online forecaster.
+    camera = get_camera(request.args.get("camera"))
+    if camera is None:
+        return jsonify({"status": "error", "message": "Unknown camera"}), 404
+    try:
+        minutes = [float(m) for m in request.args.get("minutes", "5").split(",") if m.strip()]
+    except ValueError:
+        return jsonify({"status": "error", "message": "minutes must be a comma-separated list of numbers"}), 400
+
+    forecasts = []
+    for m in minutes:
+        forecast = predict_congestion(camera.id, m)
+        if forecast is None:
+            return jsonify({"status": "pending", "message": "Forecaster is still collecting data"}), 202
+        forecast["risk_level"] = classify_risk(forecast["density"]["mean"])
+        forecasts.append(forecast)
+    return jsonify({"status": "success", "camera": camera.id, "forecasts": forecasts}), 200
+
+
+@crowd_bp.route("/forecast/backtest", methods=["GET"])
+def get_forecast_backtest():
+    # ?camera=<id>&since=<epoch>&until=<epoch>[&source=stored]. Replays the
+    # density series through a fresh forecaster and scores the 1/5/15 minute forecasts.
+    camera = get_camera(request.args.get("camera"))
+    if camera is None:
+        return jsonify({"status": "error", "message": "Unknown camera"}), 404
+    try:
+        series = _load_series(camera, request.args.get("since", type=float), request.args.get("until", type=float))
+        return jsonify({"status": "success", "camera": camera.id, "data": backtest(series["density"])}), 200
+    except Exception as e:
+        return jsonify({"status": "error", "message": f"Error running backtest: {str(e)}"}), 500
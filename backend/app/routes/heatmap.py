@@ -1,64 +1,60 @@
-from flask import Flask, Response, request
+import time
+
 import cv2
 import numpy as np
-from flask_cors import CORS
-from flask import Blueprint
-
-heatmap_bp = Blueprint("heatmap", __name__)
-
-# Video path
-video_path = "1.mp4"
-
-def generate_heatmap():
-    cap = cv2.VideoCapture(video_path)
-    heatmap_accumulator = None
-    background_subtractor = cv2.createBackgroundSubtractorMOG2()
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
+from flask import Blueprint, Response, jsonify, request
 
-        frame = cv2.resize(frame, (640, 360))  # Resize for consistency
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (21, 21), 0)
+from models.cameras import get_camera
+from models.heatmap_accumulator import get_heatmap
+from models.mjpeg import DEFAULT_QUALITY, multipart_chunk
+from models.scheduler import camera_hub
 
-        # Initialize heatmap accumulator
-        if heatmap_accumulator is None:
-            heatmap_accumulator = np.zeros_like(blurred, dtype=np.float32)
-
-        # Accumulate heatmap values
-        heatmap_accumulator = cv2.addWeighted(heatmap_accumulator, 0.8, blurred.astype(np.float32), 0.2, 0)
-
-        # Normalize heatmap
-        norm_heatmap = cv2.normalize(heatmap_accumulator, None, 0, 255, cv2.NORM_MINMAX)
-        norm_heatmap = np.uint8(norm_heatmap)
-
-        # Apply HOT colormap
-        heatmap_color = cv2.applyColorMap(norm_heatmap, cv2.COLORMAP_JET)
-
-        # Apply light smoothing to make it cleaner
-        heatmap_color = cv2.GaussianBlur(heatmap_color, (5, 5), 0)
-
-        # Motion detection for highlighting people
-        fg_mask = background_subtractor.apply(gray)
-        contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+heatmap_bp = Blueprint("heatmap", __name__)
 
-        # for cnt in contours:
-            # if cv2.contourArea(cnt) < 10:
-            #     x, y, w, h = cv2.boundingRect(cnt)
-            #     cv2.rectangle(heatmap_color, (x, y), (x + w, y + h), (255, 0, 0), 2)  # Blue box
+MAX_HEATMAP_FPS = 10
+MAX_HEATMAP_WIDTH = 1920
 
-        # Encode as JPEG
-        _, buffer = cv2.imencode('.jpg', heatmap_color)
-        frame_bytes = buffer.tobytes()
 
-        # Yield frame
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+def generate_heatmap(camera_id, hub, fps, width, quality=DEFAULT_QUALITY):
+    # Rendered from the detection pipeline's accumulator; no video is decoded here
+    heatmap = get_heatmap(camera_id)
+    interval = 1.0 / fps
+    hub.attach()
+    try:
+        while True:
+            started = time.time()
+            _, buffer = cv2.imencode('.jpg', heatmap.render(width), [cv2.IMWRITE_JPEG_QUALITY, quality])
+            yield multipart_chunk(buffer.tobytes())
+            # Writing the chunk to a slow client counts against the frame interval
+            time.sleep(max(0.0, interval - (time.time() - started)))
+    finally:
+        hub.detach()
 
-    cap.release()
 
 @heatmap_bp.route('/video_heatmap')
 def video_feed():
-    return Response(generate_heatmap(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    # ?camera=<id>&fps=<renders per second, default 5>&width=<pixels, default 640>&quality=<JPEG 10-95>
+    camera = get_camera(request.args.get("camera"))
+    if camera is None:
+        return jsonify({"error": "Unknown camera"}), 404
+    fps = min(max(request.args.get("fps", 5.0, type=float), 0.1), MAX_HEATMAP_FPS)
+    width = min(max(request.args.get("width", 640, type=int), 16), MAX_HEATMAP_WIDTH)
+    quality = min(max(request.args.get("quality", DEFAULT_QUALITY, type=int), 10), 95)
+    return Response(generate_heatmap(camera.id, camera_hub(camera.id), fps, width, quality),
+                    mimetype='multipart/x-mixed-replace; boundary=frame')
+
+
+@heatmap_bp.route('/api/heatmap/raw')
+def raw_heatmap():
+    # Raw decayed accumulator for the map UI: rows x cols floats, newest heat highest
+    camera = get_camera(request.args.get("camera"))
+    if camera is None:
+        return jsonify({"error": "Unknown camera"}), 404
+    camera_hub(camera.id).touch()
+    heat = get_heatmap(camera.id).raw()
+    return jsonify({
+        "camera": camera.id,
+        "shape": {"rows": heat.shape[0], "cols": heat.shape[1]},
+        "max": float(heat.max()),
+        "values": np.round(heat, 3).tolist(),
+    })
@@ -0,0 +1,67 @@
+import os
+from flask import Blueprint, jsonify, request, send_file
+from models.cameras import get_camera
+from models.jobs import get_job_manager
+from routes.videos import get_upload_folder
+
+jobs_bp = Blueprint("jobs", __name__)
+
+
+@jobs_bp.route("", methods=["POST"])
+def create_job():
+    # Body: {"video": "<uploaded filename>", "stride": 1, "grid": [rows, cols]}
+    body = request.get_json(silent=True) or {}
+    video = body.get("video")
+    if not video:
+        return jsonify({"error": "Missing 'video'"}), 400
+    video_path = os.path.join(get_upload_folder(), os.path.basename(video))
+    if not os.path.isfile(video_path):
+        return jsonify({"error": f"Unknown video: {video}"}), 404
+
+    try:
+        grid_size = tuple(int(n) for n in body.get("grid") or get_camera().grid_size)
+        stride = int(body.get("stride", 1))
+        if len(grid_size) != 2 or min(grid_size) < 1 or stride < 1:
+            raise ValueError
+    except (TypeError, ValueError):
+        return jsonify({"error": "'grid' must be [rows, cols] and 'stride' a positive integer"}), 400
+
+    try:
+        job = get_job_manager().submit(video_path, grid_size, stride)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(job.to_dict()), 202
+
+
+@jobs_bp.route("", methods=["GET"])
+def list_jobs():
+    return jsonify({"status": "success", "jobs": get_job_manager().list()})
+
+
+@jobs_bp.route("/<job_id>", methods=["GET"])
+def get_job(job_id):
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@jobs_bp.route("/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job.to_dict())
+
+
+@jobs_bp.route("/<job_id>/result", methods=["GET"])
+def download_result(job_id):
+    # Compressed .npz: frame, time_s, people, density_per_sqm, grid (N x rows x cols)
+    # and one alert_* column per field
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job.status != "done":
+        return jsonify({"error": f"Job is {job.status}"}), 409
+    return send_file(job.result_path, mimetype="application/octet-stream", as_attachment=True,
+                     download_name=f"{job_id}.npz")
@@ -0,0 +1,39 @@
+from flask import Blueprint, Response
+from models import persistence, scheduler, snapshots
+from models.frame_hub import all_hubs
+from models.metrics import GATE_FRAMES, PERSIST_QUEUE_DEPTH, PERSIST_ROWS, SNAPSHOTS, SUBSCRIBERS, render
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def _collect():
+    # Values owned by other components are copied in at scrape time;
+    # components that were never started are left out instead of created
+    for hub in all_hubs():
+        SUBSCRIBERS.set(hub.subscriber_count(), source=hub.source, kind="all")
+        SUBSCRIBERS.set(hub.viewer_count(), source=hub.source, kind="viewers")
+
+    writer = persistence._writer
+    if writer is not None:
+        stats = writer.stats()
+        PERSIST_QUEUE_DEPTH.set(stats["queue_depth"])
+        for outcome in ("enqueued", "written", "dropped", "spooled", "failures", "dead_lettered", "evicted"):
+            PERSIST_ROWS.set(stats[outcome], outcome=outcome)
+
+    snapshot_writer = snapshots._writer
+    if snapshot_writer is not None:
+        SNAPSHOTS.set(snapshot_writer.written, outcome="written")
+        SNAPSHOTS.set(snapshot_writer.dropped, outcome="dropped")
+
+    if scheduler._scheduler is not None:
+        for camera_id, stats in scheduler._scheduler.stats().items():
+            for outcome in ("inferred", "skipped", "forced"):
+                GATE_FRAMES.set(stats[outcome], source=camera_id, outcome=outcome)
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    # Prometheus text format: stage latency histograms, frame counters,
+    # inference FPS, subscribers, persistence queue and alert counts
+    _collect()
+    return Response(render(), mimetype="text/plain; version=0.0.4")
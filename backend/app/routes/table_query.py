@@ -0,0 +1,141 @@
+# routes/table_query.py
+import base64
+import hashlib
+import json
+import time
+from threading import Lock
+
+from flask import Response, jsonify, request
+
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 1000
+CACHE_TTL = 2.0  # Seconds; dashboards polling the same window share one fetch
+CACHE_MAX_ENTRIES = 256
+
+CROWD_DATA_COLUMNS = (
+    "id", "timestamp", "location", "people_count", "area_sqm", "density_per_sqm",
+    "risk_level", "occupancy", "density_over_time", "occupancy_over_time",
+)
+
+
+class TTLCache:
+    """Small in-process cache where concurrent misses on one key fetch once."""
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # key -> (expires_at, value)
+        self._key_locks = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, key, fetch):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self.hits += 1
+                return entry[1]
+            key_lock = self._key_locks.setdefault(key, Lock())
+
+        with key_lock:
+            # Another request may have filled it while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry[0] > time.time():
+                    self.hits += 1
+                    return entry[1]
+            value = fetch()
+            with self._lock:
+                self.misses += 1
+                if len(self._entries) >= self.max_entries:
+                    self._evict()
+                self._entries[key] = (time.time() + self.ttl, value)
+                self._key_locks.pop(key, None)
+            return value
+
+    def _evict(self):
+        now = time.time()
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) >= self.max_entries:
+            del self._entries[min(self._entries, key=lambda key: self._entries[key][0])]
+
+
+_cache = TTLCache()
+
+
+def encode_cursor(row):
+    raw = json.dumps([row["timestamp"], row["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    timestamp, row_id = (str(v) for v in json.loads(base64.urlsafe_b64decode(cursor.encode())))
+    # Values are spliced into a PostgREST filter, so refuse anything that could escape the quotes
+    if any(c in value for value in (timestamp, row_id) for c in '"\\'):
+        raise ValueError("Malformed cursor")
+    return timestamp, row_id
+
+
+def parse_args(args, allowed_columns):
+    """Validate ?columns=&since=&until=&location=&limit=&cursor= into a plain dict."""
+    columns = args.get("columns")
+    if columns:
+        columns = [c.strip() for c in columns.split(",") if c.strip()]
+        unknown = [c for c in columns if c not in allowed_columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        # Needed to build the next cursor
+        columns = sorted(set(columns) | {"id", "timestamp"})
+    limit = min(max(args.get("limit", DEFAULT_LIMIT, type=int), 1), MAX_LIMIT)
+    cursor = args.get("cursor")
+    return {
+        "columns": ",".join(columns) if columns else "*",
+        "since": args.get("since"),
+        "until": args.get("until"),
+        "location": args.get("location"),
+        "limit": limit,
+        "cursor": decode_cursor(cursor) if cursor else None,
+    }
+
+
+def fetch_page(client, table, query):
+    """One page, newest first, keyset-paginated on (timestamp, id)."""
+    builder = client.table(table).select(query["columns"])
+    if query["since"]:
+        builder = builder.gte("timestamp", query["since"])
+    if query["until"]:
+        builder = builder.lte("timestamp", query["until"])
+    if query["location"]:
+        builder = builder.eq("location", query["location"])
+    if query["cursor"]:
+        timestamp, row_id = query["cursor"]
+        builder = builder.or_(f'timestamp.lt."{timestamp}",and(timestamp.eq."{timestamp}",id.lt."{row_id}")')
+    # Ask for one extra row to know whether another page exists
+    response = builder.order("timestamp", desc=True).order("id", desc=True).limit(query["limit"] + 1).execute()
+
+    rows = response.data or []
+    next_cursor = encode_cursor(rows[query["limit"] - 1]) if len(rows) > query["limit"] else None
+    return {"status": "success", "data": rows[:query["limit"]], "next_cursor": next_cursor}
+
+
+def paged_table_response(client, table, allowed_columns=CROWD_DATA_COLUMNS):
+    """Serve a paginated, cached, ETag-aware listing of `table` for the current request."""
+    try:
+        query = parse_args(request.args, allowed_columns)
+    except (ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": f"Invalid query: {str(e)}"}), 400
+
+    key = (table, json.dumps(query, sort_keys=True))
+
+    def fetch():
+        body = json.dumps(fetch_page(client, table, query), default=str).encode()
+        return body, hashlib.sha1(body).hexdigest()
+
+    body, etag = _cache.get_or_fetch(key, fetch)
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.cache_control.max_age = int(CACHE_TTL)
+    # Turns the response into a bodiless 304 when If-None-Match matches
+    return response.make_conditional(request)
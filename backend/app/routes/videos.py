@@ -1,61 +1,96 @@
 import os
-import time
 from flask import Blueprint, request, jsonify
-from werkzeug.utils import secure_filename
+from models.uploads import get_upload_manager, store_file
+from models.video_index import SORT_COLUMNS, UPLOAD_DIR, allowed_file, get_video_index
 
 videos_bp = Blueprint("videos", __name__)
 
-ALLOWED_EXTENSIONS = {"mp4", "avi", "mov", "mkv", "webm"}
-
 
 def get_upload_folder():
     # Place uploads under backend/app/uploads
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    upload_dir = os.path.join(base_dir, "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-    return upload_dir
-
-
-def allowed_file(filename: str) -> bool:
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    return UPLOAD_DIR
 
 
 @videos_bp.route("/upload", methods=["POST"])
 def upload_videos():
+    # Single-request multipart upload, fine for small files; large ones should
+    # use the resumable /uploads API below
     if "videos" not in request.files:
         return jsonify({"error": "No files part 'videos' in the request"}), 400
 
     files = request.files.getlist("videos")
     if not files:
         return jsonify({"error": "No files provided"}), 400
-
-    saved = []
-    upload_dir = get_upload_folder()
-
     for file in files:
-        if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            # Add a timestamp to avoid collisions
-            name, ext = os.path.splitext(filename)
-            stamped = f"{name}_{int(time.time())}{ext}"
-            dest = os.path.join(upload_dir, stamped)
-            file.save(dest)
-            saved.append({"filename": stamped})
-        else:
+        if not file or not allowed_file(file.filename):
             return jsonify({"error": f"File type not allowed: {file.filename}"}), 400
 
+    get_upload_folder()
+    index = get_video_index()
+    saved = [{"filename": entry["filename"]} for entry in (store_file(file, index) for file in files)]
     return jsonify({"status": "success", "files": saved}), 201
 
 
+@videos_bp.route("/uploads", methods=["POST"])
+def create_upload():
+    # Body: {"filename": "...", "size": <bytes>, "sha256": "<optional, whole file>", "chunk_size": <optional>}
+    body = request.get_json(silent=True) or {}
+    try:
+        session = get_upload_manager().create(body.get("filename"), body.get("size", 0), body.get("sha256"),
+                                              body.get("chunk_size"))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(session), 201
+
+
+@videos_bp.route("/uploads/<upload_id>", methods=["GET"])
+def get_upload(upload_id):
+    # Resume by re-sending the chunks listed in "missing"
+    session = get_upload_manager().get(upload_id)
+    if session is None:
+        return jsonify({"error": f"Unknown upload: {upload_id}"}), 404
+    return jsonify(session)
+
+
+@videos_bp.route("/uploads/<upload_id>/chunks/<int:index>", methods=["PUT"])
+def put_chunk(upload_id, index):
+    # Raw chunk bytes as the body, with their hex SHA-256 in X-Chunk-Sha256
+    # (optional, but checked when sent); the body is streamed to disk, never
+    # held in memory
+    try:
+        chunk = get_upload_manager().write_chunk(upload_id, index, request.stream, request.headers.get("X-Chunk-Sha256"))
+    except LookupError:
+        return jsonify({"error": f"Unknown upload: {upload_id}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(chunk)
+
+
+@videos_bp.route("/uploads/<upload_id>/complete", methods=["POST"])
+def complete_upload(upload_id):
+    # Hashing, probing and indexing run in the background; poll GET /uploads/<id>
+    # until "status" is "done" (the stored name is in "result") or "failed"
+    try:
+        session = get_upload_manager().complete(upload_id)
+    except LookupError:
+        return jsonify({"error": f"Unknown upload: {upload_id}"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(session), 200 if session["status"] == "done" else 202
+
+
 @videos_bp.route("/list", methods=["GET"])
 def list_videos():
-    upload_dir = get_upload_folder()
+    # ?sort=uploaded_at|filename|size|duration|fps|resolution&order=desc|asc&limit=&offset=
+    sort = request.args.get("sort", "uploaded_at")
+    if sort not in SORT_COLUMNS:
+        return jsonify({"error": f"'sort' must be one of {', '.join(SORT_COLUMNS)}"}), 400
     try:
-        files = [f for f in os.listdir(upload_dir) if os.path.isfile(os.path.join(upload_dir, f))]
-        # Filter allowed only
-        files = [f for f in files if allowed_file(f)]
-        # Sort by modified time desc
-        files.sort(key=lambda f: os.path.getmtime(os.path.join(upload_dir, f)), reverse=True)
-        return jsonify({"status": "success", "files": files})
-    except FileNotFoundError:
-        return jsonify({"status": "success", "files": []})
+        limit = int(request.args["limit"]) if "limit" in request.args else None
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "'limit' and 'offset' must be integers"}), 400
+    videos, total = get_video_index().list(sort, request.args.get("order", "desc") != "asc", limit, offset)
+    return jsonify({"status": "success", "files": [video["filename"] for video in videos], "videos": videos,
+                    "total": total})
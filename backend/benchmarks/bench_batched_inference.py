@@ -0,0 +1,87 @@
+"""Aggregate FPS for N cameras: one batched model call vs N separate calls.
+
+    python backend/benchmarks/bench_batched_inference.py --cameras 8 --rounds 20
+    python backend/benchmarks/bench_batched_inference.py --cameras 4 --video backend/app/2.mp4
+
+Prints one JSON object so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from models.camera_pipeline import CONF_THRESHOLD  # noqa: E402
+
+NOISE_FRAME_SIZE = (1920, 1080)
+
+
+def load_frames(video, count):
+    """`count` distinct frames, from a clip if given, otherwise random noise."""
+    if video:
+        cap = cv2.VideoCapture(video)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            frames.append(frame)
+        cap.release()
+        return frames
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, (NOISE_FRAME_SIZE[1], NOISE_FRAME_SIZE[0], 3), dtype=np.uint8) for _ in range(count)]
+
+
+def run_separate(model, frames, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            model(frame, conf=CONF_THRESHOLD, verbose=False)
+    return time.perf_counter() - start
+
+
+def run_batched(model, frames, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        model(frames, conf=CONF_THRESHOLD, verbose=False)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--weights", default="yolov8l.pt")
+    parser.add_argument("--video", default=None)
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    model = YOLO(args.weights)
+    frames = load_frames(args.video, args.cameras)
+
+    # Warm up both paths so lazy initialisation is not timed
+    run_batched(model, frames, 1)
+    run_separate(model, frames[:1], 1)
+
+    total = args.cameras * args.rounds
+    separate = run_separate(model, frames, args.rounds)
+    batched = run_batched(model, frames, args.rounds)
+    print(json.dumps({
+        "benchmark": "batched_inference",
+        "weights": args.weights,
+        "cameras": args.cameras,
+        "rounds": args.rounds,
+        "separate_fps": total / separate,
+        "batched_fps": total / batched,
+        "speedup": separate / batched,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Capture-stage behaviour under slow consumers: staleness, drops, reconnects.
+
+    python backend/benchmarks/bench_capture.py --source backend/app/1.mp4 --work-ms 80
+    python backend/benchmarks/bench_capture.py --source backend/app/1.mp4 --live --work-ms 80
+    python backend/benchmarks/bench_capture.py --source rtsp://127.0.0.1:8554/cam --work-ms 80
+
+--live makes a local file behave like a camera (paced to its frame rate,
+newest frame only). For a real RTSP stand-in, serve a clip with e.g.
+mediamtx and
+
+    ffmpeg -re -stream_loop -1 -i backend/app/1.mp4 -c copy -f rtsp rtsp://127.0.0.1:8554/cam
+
+then stop and restart ffmpeg during a run to exercise reconnects.
+--work-ms simulates inference time per frame. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from models.capture import CaptureSource  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", required=True, help="file path, webcam index or stream URL")
+    parser.add_argument("--live", action="store_true", help="treat a file as a live camera")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--work-ms", type=float, default=50, help="simulated processing per frame")
+    parser.add_argument("--ring", type=int, default=8, help="decode-ahead frames for files")
+    args = parser.parse_args()
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    capture = CaptureSource(source, name="bench", live=True if args.live else None, ring_size=args.ring).start()
+
+    ages = []
+    consumed = 0
+    deadline = time.time() + args.seconds
+    started = time.time()
+    while time.time() < deadline:
+        captured = capture.read(timeout=1)
+        if captured is None:
+            continue
+        ages.append(time.time() - captured.captured_at)
+        consumed += 1
+        time.sleep(args.work_ms / 1000)
+    elapsed = time.time() - started
+    capture.stop()
+
+    ages = np.asarray(ages) if ages else np.zeros(1)
+    print(json.dumps({
+        "benchmark": "capture",
+        "source": str(args.source),
+        "work_ms": args.work_ms,
+        "seconds": elapsed,
+        "consumed": consumed,
+        "consumed_fps": consumed / elapsed,
+        "frame_age_ms": {
+            "mean": float(ages.mean() * 1000),
+            "p95": float(np.percentile(ages, 95) * 1000),
+            "max": float(ages.max() * 1000),
+        },
+        "capture": capture.stats(),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
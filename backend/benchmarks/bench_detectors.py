@@ -0,0 +1,103 @@
+"""FPS and person-count deviation of each detector backend against PyTorch.
+
+    python backend/benchmarks/bench_detectors.py --video backend/app/2.mp4 \
+        --backend onnxruntime=yolov8l.onnx --backend onnxruntime=yolov8l_int8.onnx \
+        --backend openvino=yolov8l_openvino_model --threads 4
+
+    # Produce the exported models first
+    python backend/benchmarks/bench_detectors.py --export onnxruntime --export openvino --int8
+
+The ultralytics (PyTorch) backend is always run first and used as the
+baseline. Prints one JSON object so runs can be compared across commits.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from models.camera_pipeline import CONF_THRESHOLD  # noqa: E402
+from models.detector import create_detector, export_model  # noqa: E402
+from models.grid import PERSON_CLASS  # noqa: E402
+from models.model_manager import weights_path  # noqa: E402
+
+
+def load_frames(video, count):
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read frames from {video}")
+    return frames
+
+
+def measure(detector, frames, warmup=2):
+    for frame in frames[:warmup]:
+        detector.detect([frame], CONF_THRESHOLD)
+    counts = []
+    start = time.perf_counter()
+    for frame in frames:
+        detections = detector.detect([frame], CONF_THRESHOLD)[0]
+        counts.append(int(np.count_nonzero(detections.cls == PERSON_CLASS)))
+    elapsed = time.perf_counter() - start
+    return len(frames) / elapsed, np.array(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default=os.path.join(os.path.dirname(__file__), "..", "app", "2.mp4"))
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--backend", action="append", default=[], metavar="NAME=MODEL",
+                        help="exported backend to compare, e.g. onnxruntime=yolov8l.onnx")
+    parser.add_argument("--export", action="append", default=[], metavar="NAME",
+                        help="export the configured weights for this backend and exit")
+    parser.add_argument("--int8", action="store_true", help="quantize exports to INT8")
+    args = parser.parse_args()
+
+    if args.export:
+        for backend in args.export:
+            print(export_model(weights_path(), backend, int8=args.int8))
+        return
+
+    frames = load_frames(args.video, args.frames)
+    baseline_fps, baseline_counts = measure(create_detector("ultralytics", threads=args.threads), frames)
+    report = {
+        "benchmark": "detectors",
+        "video": os.path.basename(args.video),
+        "frames": len(frames),
+        "threads": args.threads,
+        "results": [{"backend": "ultralytics", "model": weights_path(), "fps": baseline_fps,
+                     "mean_people": float(baseline_counts.mean())}],
+    }
+
+    for spec in args.backend:
+        name, model_path = spec.split("=", 1)
+        fps, counts = measure(create_detector(name, model_path, args.threads), frames)
+        deviation = np.abs(counts - baseline_counts)
+        report["results"].append({
+            "backend": name,
+            "model": model_path,
+            "fps": fps,
+            "speedup": fps / baseline_fps,
+            "mean_people": float(counts.mean()),
+            "count_mae": float(deviation.mean()),
+            "count_max_error": int(deviation.max()),
+            "count_relative_error": float(deviation.sum() / max(baseline_counts.sum(), 1)),
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
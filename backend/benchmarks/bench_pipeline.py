@@ -0,0 +1,198 @@
+"""End-to-end pipeline throughput on a synthetic crowd video.
+
+    python backend/benchmarks/bench_pipeline.py --width 1280 --height 720 --frames 600 --people 40
+    python backend/benchmarks/bench_pipeline.py --detector real --frames 200
+    python backend/benchmarks/bench_pipeline.py --no-render --output before.json
+
+Generates a video of moving "people" (same seed, same video), decodes it
+and runs every frame through CameraPipeline. The fake detector returns the
+generated boxes, so numbers do not depend on weights; --detector real uses
+the configured backend instead. Supabase inserts and alert snapshots go to
+a temporary directory. Prints one JSON object with per-stage seconds,
+end-to-end FPS and peak RSS so runs can be compared across commits.
+Frames are not resized by the pipeline; the detector's own scaling to its
+input size is part of "infer".
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from models import persistence, snapshots  # noqa: E402
+from models.camera_pipeline import CONF_THRESHOLD, CameraPipeline  # noqa: E402
+from models.cameras import Camera  # noqa: E402
+from models.detector import Detections, Detector, create_detector  # noqa: E402
+from models.grid import PERSON_CLASS  # noqa: E402
+from models.mjpeg import DEFAULT_QUALITY  # noqa: E402
+
+STAGES = ("decode", "gate", "infer", "track", "bin", "alert_check", "annotate", "encode", "persist")
+PERSON_SIZE = (0.03, 0.12)  # Box width and height as a fraction of the frame
+
+
+def make_tracks(frames, people, width, height, seed):
+    """Box per person per frame, (frames, people, 4) xyxy, walking and bouncing off the edges."""
+    rng = np.random.default_rng(seed)
+    box_w, box_h = PERSON_SIZE[0] * width, PERSON_SIZE[1] * height
+    start = rng.uniform((0, 0), (width - box_w, height - box_h), size=(people, 2))
+    velocity = rng.normal(0, 0.004, size=(people, 2)) * (width, height)
+    span = np.array([width - box_w, height - box_h])
+    position = start[None] + velocity[None] * np.arange(frames)[:, None, None]
+    # Reflect positions into [0, span] so people stay in frame
+    position = span - np.abs(np.mod(position, 2 * span) - span)
+    return np.concatenate([position, position + (box_w, box_h)], axis=2).astype(np.float32)
+
+
+def write_video(path, tracks, width, height, fps, seed):
+    rng = np.random.default_rng(seed)
+    background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+    colours = rng.integers(120, 255, (tracks.shape[1], 3)).tolist()
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for boxes in tracks:
+        frame = background.copy()
+        for (x1, y1, x2, y2), colour in zip(boxes.astype(int).tolist(), colours):
+            cv2.rectangle(frame, (x1, y1), (x2, y2), colour, -1)
+        writer.write(frame)
+    writer.release()
+
+
+class FakeDetector(Detector):
+    """Returns the generated boxes for each frame, in order."""
+
+    name = "fake"
+
+    def __init__(self, tracks):
+        self.tracks = tracks
+        self.index = 0
+
+    def detect(self, frames, conf):
+        detections = []
+        for _ in frames:
+            boxes = self.tracks[self.index % len(self.tracks)]
+            self.index += 1
+            detections.append(Detections(boxes, np.full(len(boxes), PERSON_CLASS), np.ones(len(boxes))))
+        return detections
+
+
+class NullClient:
+    """Accepts Supabase-style inserts and drops them."""
+
+    def table(self, name):
+        return self
+
+    def insert(self, rows):
+        return self
+
+    def execute(self):
+        return None
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--fps", type=float, default=25)
+    parser.add_argument("--people", type=int, default=30, help="people (fake boxes) per frame")
+    parser.add_argument("--grid", type=int, nargs=2, default=(10, 10), metavar=("ROWS", "COLS"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--detector", choices=("fake", "real"), default="fake")
+    parser.add_argument("--no-gate", action="store_true", help="run the detector on every frame")
+    parser.add_argument("--no-render", action="store_true", help="analytics only, as with no video viewers")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    video = os.path.join(workdir, "synthetic.mp4")
+    tracks = make_tracks(args.frames, args.people, args.width, args.height, args.seed)
+    write_video(video, tracks, args.width, args.height, args.fps, args.seed)
+
+    # Keep persistence and alert snapshots off the network and out of the app tree
+    persistence._writer = persistence.WriteBehindWriter(NullClient, spool_path=os.path.join(workdir, "spool.sqlite3"))
+    snapshots._writer = snapshots.SnapshotWriter(root=os.path.join(workdir, "alerts"))
+
+    detector = FakeDetector(tracks) if args.detector == "fake" else create_detector()
+    pipeline = CameraPipeline(Camera("bench", video, "Benchmark", args.grid))
+    timings = dict.fromkeys(STAGES, 0.0)
+
+    cap = cv2.VideoCapture(video)
+    processed = inferred = 0
+    started = time.perf_counter()
+    while True:
+        lap = time.perf_counter()
+        ret, frame = cap.read()
+        now = time.perf_counter()
+        if not ret:
+            break
+        timings["decode"] += now - lap
+
+        lap = now
+        infer = args.no_gate or pipeline.needs_inference(frame)
+        now = time.perf_counter()
+        timings["gate"] += now - lap
+
+        detections = None
+        if infer:
+            detections = detector.detect([frame], CONF_THRESHOLD)[0]
+            inferred += 1
+        elif args.detector == "fake":
+            detector.index += 1  # Keep the fake boxes in step with the video
+        timings["infer"] += time.perf_counter() - now
+
+        pipeline.process(frame, detections)
+        if not args.no_render:
+            rendered = pipeline.render(frame)
+            lap = time.perf_counter()
+            rendered.chunk(None, DEFAULT_QUALITY)
+            timings["encode"] += time.perf_counter() - lap
+        processed += 1
+    elapsed = time.perf_counter() - started
+    cap.release()
+
+    for stage, seconds in pipeline.stage_seconds.items():
+        timings[stage] += seconds
+    writer_stats = persistence._writer.stats()
+    persistence._writer.close()
+
+    report = {
+        "benchmark": "pipeline",
+        "detector": detector.name,
+        "resolution": [args.width, args.height],
+        "frames": processed,
+        "people": args.people,
+        "grid": list(args.grid),
+        "render": not args.no_render,
+        "inferred_frames": inferred,
+        "seconds": elapsed,
+        "fps": processed / elapsed if elapsed else None,
+        "stages": {stage: {"seconds": seconds, "ms_per_frame": 1000 * seconds / max(processed, 1)}
+                   for stage, seconds in timings.items()},
+        "persistence": writer_stats,
+        "snapshots": {"written": snapshots._writer.written, "dropped": snapshots._writer.dropped},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
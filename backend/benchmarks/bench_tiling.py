@@ -0,0 +1,152 @@
+"""Inference cost and small-person recall of ROI masking and tiled inference.
+
+    python backend/benchmarks/bench_tiling.py --video backend/app/2.mp4
+    python backend/benchmarks/bench_tiling.py --roi 0.1,0.3 0.9,0.3 0.9,1 0.1,1 \
+        --tile-size 640 --overlap 0.2 --workers 4 --backend onnxruntime=yolov8l.onnx
+
+Runs the configured detector (or --backend) on the same frames in four modes:
+
+  full       the whole frame, as without ROI or tiling
+  roi        only the crop around the --roi polygon, outside pixels greyed
+  tiled      overlapping tiles plus a whole-frame pass, merged with NMS
+  tiled+roi  tiles that touch the ROI
+
+Reported per mode: inference ms per frame (detector plus merge), crops per
+frame, people per frame, and recall of the people the tiled mode finds
+inside the ROI (IoU >= --match-iou), split into small (shorter than
+--small-height pixels) and other people. Without --roi the roi modes are
+skipped. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from models.camera_pipeline import CONF_THRESHOLD  # noqa: E402
+from models.detector import create_detector, get_detector  # noqa: E402
+from models.grid import PERSON_CLASS  # noqa: E402
+from models.roi import RegionOfInterest  # noqa: E402
+from models.tiling import CropPlan, Tiling, detect_parallel  # noqa: E402
+from models.tracker import iou_matrix, linear_assignment  # noqa: E402
+
+
+def load_frames(video, count, stride):
+    cap = cv2.VideoCapture(video)
+    frames = []
+    index = 0
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % stride == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read frames from {video}")
+    return frames
+
+
+def run(detector, frames, plan, workers):
+    people, seconds, crops = [], 0.0, 0
+    for frame in frames:
+        started = time.perf_counter()
+        images = plan.crops(frame)
+        detections = plan.merge(detect_parallel(detector, images, CONF_THRESHOLD, workers))
+        seconds += time.perf_counter() - started
+        crops += len(images)
+        people.append(detections.xyxy[detections.cls == PERSON_CLASS])
+    return people, seconds, crops
+
+
+def recall(found, reference, match_iou, small_height):
+    """Matched share of the reference boxes, overall and for small people."""
+    matched = total = small_matched = small_total = 0
+    for boxes, expected in zip(found, reference):
+        small = (expected[:, 3] - expected[:, 1]) < small_height
+        hit = np.zeros(len(expected), dtype=bool)
+        if len(boxes) and len(expected):
+            pairs = linear_assignment(1 - iou_matrix(expected, boxes), 1 - match_iou)
+            hit[pairs[:, 0]] = True
+        matched += hit.sum()
+        total += len(expected)
+        small_matched += (hit & small).sum()
+        small_total += small.sum()
+    return {"recall": matched / max(total, 1), "small_recall": small_matched / max(small_total, 1),
+            "reference_people": int(total), "reference_small": int(small_total)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", default=os.path.join(os.path.dirname(__file__), "..", "app", "2.mp4"))
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--stride", type=int, default=5, help="use every n-th decoded frame")
+    parser.add_argument("--roi", nargs="+", metavar="X,Y", help="include polygon in frame fractions")
+    parser.add_argument("--tile-size", type=int, default=640)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--no-full-frame", action="store_true", help="tiles only, no whole-frame pass")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--backend", metavar="NAME=MODEL", help="detector to use instead of the configured one")
+    parser.add_argument("--match-iou", type=float, default=0.5)
+    parser.add_argument("--small-height", type=int, default=64, help="pixel height below which a person is small")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if args.backend:
+        name, model_path = args.backend.split("=", 1)
+        detector = create_detector(name, model_path)
+    else:
+        detector = get_detector()
+    frames = load_frames(args.video, args.frames, args.stride)
+    frame_size = (frames[0].shape[1], frames[0].shape[0])
+    roi = None
+    if args.roi:
+        roi = RegionOfInterest([[[float(v) for v in point.split(",")] for point in args.roi]])
+    tiling = Tiling(args.tile_size, args.overlap, not args.no_full_frame)
+
+    modes = {"full": CropPlan(frame_size), "tiled": CropPlan(frame_size, tiling=tiling)}
+    if roi is not None:
+        modes["roi"] = CropPlan(frame_size, roi)
+        modes["tiled+roi"] = CropPlan(frame_size, roi, tiling)
+
+    detector.detect(frames[:1], CONF_THRESHOLD)  # Warm up
+    runs = {mode: run(detector, frames, plan, args.workers) for mode, plan in modes.items()}
+    reference = runs["tiled"][0]
+    if roi is not None:
+        reference = [boxes[roi.contains((boxes[:, :2] + boxes[:, 2:]) * 0.5, frame_size)] for boxes in reference]
+
+    results = []
+    for mode, (people, seconds, crops) in runs.items():
+        results.append({
+            "mode": mode,
+            "infer_ms": 1000 * seconds / len(frames),
+            "crops_per_frame": crops / len(frames),
+            "people_per_frame": float(np.mean([len(boxes) for boxes in people])),
+            **recall(people, reference, args.match_iou, args.small_height),
+        })
+
+    text = json.dumps({
+        "benchmark": "tiling",
+        "video": os.path.basename(args.video),
+        "detector": detector.name,
+        "frames": len(frames),
+        "frame_size": list(frame_size),
+        "tiling": tiling.to_dict(),
+        "roi": roi.to_dict() if roi is not None else None,
+        "workers": args.workers,
+        "modes": results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Counting accuracy of the tracker as the detector stride grows.
+
+    python backend/benchmarks/bench_tracker.py
+    python backend/benchmarks/bench_tracker.py --people 80 --strides 1 2 4 8 16 --miss 0.2
+
+Simulates people walking through a 1920x1080 view across a vertical gate
+line, with noisy, sometimes missed detections and a few false positives.
+For each stride the detector output is only used on every stride-th frame;
+the tracker predicts boxes in between. Reported per stride:
+
+  grid_mae        mean absolute error of per-cell counts against ground truth
+  reuse_grid_mae  the same when the last detections are reused instead
+  count_mae       error of the total count per frame
+  line_error      |counted - true| crossings over true crossings, both directions
+  track_ms        tracker time per frame
+
+No video is decoded and no model runs. Prints one JSON object.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
+
+from models.grid import PERSON_CLASS, bin_people  # noqa: E402
+from models.tracker import CountLine, Tracker, line_sides  # noqa: E402
+
+WIDTH, HEIGHT = 1920, 1080
+BOX = (50, 130)  # Person box width and height in pixels
+LINE = CountLine("gate", (0.5, 0.0), (0.5, 1.0))
+
+
+def simulate(frames, people, fps, seed):
+    """(frames, people, 4) xyxy ground truth, NaN while a person is out of view."""
+    rng = np.random.default_rng(seed)
+    enter = rng.uniform(0, frames * 0.7, people)
+    leftwards = rng.random(people) < 0.5
+    speed = rng.uniform(40, 160, people) / fps  # Pixels per frame
+    drift = rng.normal(0, 10, people) / fps
+    start_x = np.where(leftwards, WIDTH + BOX[0], -BOX[0])
+    start_y = rng.uniform(BOX[1], HEIGHT - BOX[1], people)
+
+    t = np.arange(frames)[:, None] - enter[None]
+    x = start_x + np.where(leftwards, -1, 1) * speed * t
+    y = start_y + drift * t
+    boxes = np.stack([x - BOX[0] / 2, y - BOX[1] / 2, x + BOX[0] / 2, y + BOX[1] / 2], axis=2)
+    visible = (t >= 0) & (x > -BOX[0] / 2) & (x < WIDTH + BOX[0] / 2)
+    boxes[~visible] = np.nan
+    return boxes
+
+
+def detect(truth, miss, false_rate, rng):
+    """Jittered, partly missed ground truth plus random false positives."""
+    boxes = truth[~np.isnan(truth[:, 0])]
+    boxes = boxes[rng.random(len(boxes)) >= miss]
+    boxes = boxes + rng.normal(0, 0.03, boxes.shape) * np.tile(BOX, 2)
+    spurious = rng.poisson(false_rate)
+    corner = rng.uniform((0, 0), (WIDTH - BOX[0], HEIGHT - BOX[1]), (spurious, 2))
+    return np.concatenate([boxes, np.concatenate([corner, corner + BOX], axis=1)])
+
+
+def grid_of(boxes, grid):
+    return bin_people(boxes, np.full(len(boxes), PERSON_CLASS), (WIDTH, HEIGHT), grid)[0]
+
+
+def true_crossings(truth):
+    starts = np.array([LINE.start]) * (WIDTH, HEIGHT)
+    ends = np.array([LINE.end]) * (WIDTH, HEIGHT)
+    centres = (truth[:, :, :2] + truth[:, :, 2:]) * 0.5
+    totals = {"in": 0, "out": 0}
+    previous = np.zeros((truth.shape[1], 1), dtype=np.int8)
+    for points in centres:
+        known = ~np.isnan(points[:, 0])
+        sides = np.zeros_like(previous)
+        sides[known] = line_sides(points[known], starts, ends, np.zeros(known.sum()), previous[known])
+        totals["in"] += int(((previous == -1) & (sides == 1)).sum())
+        totals["out"] += int(((previous == 1) & (sides == -1)).sum())
+        previous = sides
+    return totals
+
+
+def run(truth, detections, stride, fps, grid):
+    tracker = Tracker([LINE])
+    grid_error = reuse_error = count_error = 0.0
+    track_seconds = 0.0
+    last = detections[0]
+    for index, (frame_truth, found) in enumerate(zip(truth, detections)):
+        run_detector = index % stride == 0
+        if run_detector:
+            last = found
+        started = time.perf_counter()
+        boxes = tracker.step(index / fps, (WIDTH, HEIGHT), found if run_detector else None)
+        track_seconds += time.perf_counter() - started
+
+        expected = grid_of(frame_truth[~np.isnan(frame_truth[:, 0])], grid)
+        grid_error += np.abs(grid_of(boxes, grid) - expected).mean()
+        reuse_error += np.abs(grid_of(last, grid) - expected).mean()
+        count_error += abs(len(boxes) - expected.sum())
+
+    frames = len(truth)
+    counted = tracker.stats(now=frames / fps)["lines"][0]
+    return {
+        "stride": stride,
+        "detector_runs": -(-frames // stride),
+        "grid_mae": grid_error / frames,
+        "reuse_grid_mae": reuse_error / frames,
+        "count_mae": count_error / frames,
+        "counted": {"in": counted["in"], "out": counted["out"]},
+        "track_ms": 1000 * track_seconds / frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=1500)
+    parser.add_argument("--fps", type=float, default=25)
+    parser.add_argument("--people", type=int, default=60, help="people walking through over the run")
+    parser.add_argument("--strides", type=int, nargs="+", default=(1, 2, 4, 8, 16))
+    parser.add_argument("--miss", type=float, default=0.1, help="probability a person is not detected")
+    parser.add_argument("--false-rate", type=float, default=0.5, help="false positives per frame")
+    parser.add_argument("--grid", type=int, nargs=2, default=(10, 10), metavar=("ROWS", "COLS"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    truth = simulate(args.frames, args.people, args.fps, args.seed)
+    detections = [detect(frame, args.miss, args.false_rate, rng) for frame in truth]
+    expected = true_crossings(truth)
+    results = []
+    for stride in args.strides:
+        result = run(truth, detections, stride, args.fps, tuple(args.grid))
+        result["line_error"] = (abs(result["counted"]["in"] - expected["in"]) +
+                                abs(result["counted"]["out"] - expected["out"])) / max(sum(expected.values()), 1)
+        results.append(result)
+
+    text = json.dumps({
+        "benchmark": "tracker",
+        "frames": args.frames,
+        "people": args.people,
+        "miss": args.miss,
+        "false_rate": args.false_rate,
+        "true_crossings": expected,
+        "strides": results,
+    }, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
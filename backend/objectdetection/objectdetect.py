@@ -1,15 +1,17 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 import os
+import sys
 import time
 from datetime import datetime
 import math
-from backend.app.models.videodata import insert_crowd_data
-from backend.app.models.insertalertdata import insert_alert_data
 
-# Load YOLOv8 model
-model = YOLO("../app/Yolo-Weights/yolov8l.pt")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
+from models.videodata import insert_crowd_data
+from models.insertalertdata import insert_alert_data
+from models.model_manager import predict
+
+# YOLOv8 model is shared with the API and chosen by YOLO_MODEL_SIZE / YOLO_WEIGHTS
 
 # Constants
 GRID_SIZE = (3, 3)
@@ -89,7 +91,7 @@ while cap.isOpened():
         break
 
     frame = cv2.resize(frame, (1920, 1080))
-    results = model(frame, conf=0.00000025)
+    results = predict(frame, conf=0.00000025)
     grid_counts = np.zeros(GRID_SIZE, dtype=int)
     person_count = 0
     current_time = time.time()
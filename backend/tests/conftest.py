@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import app modules the way the app does (from models.x import y)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "app"))
@@ -0,0 +1,46 @@
+import numpy as np
+
+from models.alert_rules import AlertRule, RuleEngine
+
+GRID = (2, 2)
+
+
+def cells(*values):
+    return np.array(values, dtype=np.float64).reshape(GRID)
+
+
+def fired_cells(engine, values, now):
+    return [[tuple(int(v) for v in cell) for cell in found] for _, found in engine.evaluate(values, now)]
+
+
+def test_cell_fires_once_until_it_drops_below_the_clear_level():
+    engine = RuleEngine([AlertRule("density", "cell_density", above=2, clear_below=1.5, cooldown=0)], GRID)
+
+    assert fired_cells(engine, {"cell_density": cells(3, 0, 0, 0)}, now=0) == [[(0, 0)]]
+    # Still high, or dipped only between the two levels: no re-raise
+    assert fired_cells(engine, {"cell_density": cells(3, 0, 0, 0)}, now=10) == []
+    assert fired_cells(engine, {"cell_density": cells(1.8, 0, 0, 0)}, now=20) == []
+    assert fired_cells(engine, {"cell_density": cells(2.5, 0, 0, 0)}, now=30) == []
+    # Below the clear level re-arms it
+    assert fired_cells(engine, {"cell_density": cells(1.0, 0, 0, 0)}, now=40) == []
+    assert fired_cells(engine, {"cell_density": cells(2.5, 0, 0, 0)}, now=50) == [[(0, 0)]]
+
+
+def test_cooldown_is_kept_per_cell():
+    engine = RuleEngine([AlertRule("density", "cell_density", above=2, clear_below=1, cooldown=60)], GRID)
+
+    assert fired_cells(engine, {"cell_density": cells(3, 0, 0, 0)}, now=0) == [[(0, 0)]]
+    engine.evaluate({"cell_density": cells(0, 0, 0, 0)}, now=10)  # Re-armed, but cooling down
+    # Cell (0, 0) waits out its cooldown; cell (1, 1) has none running
+    assert fired_cells(engine, {"cell_density": cells(3, 0, 0, 3)}, now=20) == [[(1, 1)]]
+    engine.evaluate({"cell_density": cells(0, 0, 0, 0)}, now=30)
+    assert fired_cells(engine, {"cell_density": cells(3, 0, 0, 0)}, now=61) == [[(0, 0)]]
+
+
+def test_forecast_rule_is_silent_for_cells_already_over_the_live_threshold():
+    rule = AlertRule("forecast", "forecast_cell_density", above=2, minutes=5)
+    engine = RuleEngine([rule], GRID)
+    values = {"cell_density": cells(3, 1, 0, 0), ("forecast_cell_density", 5.0): cells(4, 4, 0, 0)}
+
+    assert fired_cells(engine, values, now=0) == [[(0, 1)]]
+    assert not rule.notify
@@ -0,0 +1,53 @@
+from models import grid_events
+from models.grid_events import HEARTBEAT_INTERVAL, grid_event_stream
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class StaticSceneHub:
+    """Publishes a new snapshot every `period` seconds in which only the timestamp changes."""
+
+    def __init__(self, clock, period=0.1):
+        self.clock = clock
+        self.period = period
+        self.seq = 0
+        self.attached = 0
+
+    def attach(self):
+        self.attached += 1
+
+    def detach(self):
+        self.attached -= 1
+
+    def wait_grid(self, seen, timeout):
+        if self.clock.now > 1000 + 10 * HEARTBEAT_INTERVAL:
+            raise AssertionError("stream went quiet without a heartbeat")
+        self.clock.now += self.period
+        self.seq += 1
+        return self.seq, {"timestamp": self.clock.now, "grid_size": {"rows": 2, "cols": 2},
+                          "grid_counts": [[1, 0], [0, 2]], "people_count": 3, "density_per_sqm": 0.1,
+                          "risk_level": "Low"}
+
+
+def test_ping_is_sent_on_a_static_scene(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(grid_events, "time", clock)
+    hub = StaticSceneHub(clock)
+    stream = grid_event_stream(hub, max_hz=2)
+
+    assert next(stream).startswith("id: 1\nevent: snapshot")
+    started = clock.now
+    assert next(stream) == ": ping\n\n"
+    assert clock.now - started >= HEARTBEAT_INTERVAL
+
+    stream.close()  # What a failed write does to the generator
+    assert hub.attached == 0
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from models import notifier
+from models.notifier import BURST, NotificationDispatcher, StubNotifier
+
+ADMIN = "+10000000000"
+
+
+class FakeClock:
+    """Stands in for the time module inside models.notifier."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(notifier, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def make_dispatcher():
+    dispatchers = []
+
+    def make(stub, **kwargs):
+        dispatcher = NotificationDispatcher(stub, **kwargs)
+        dispatchers.append(dispatcher)
+        return dispatcher
+    yield make
+    for dispatcher in dispatchers:
+        dispatcher.close()
+
+
+def settle(dispatcher, stub, expected, timeout=3.0):
+    """Wait (in real time) for the worker to have sent `expected` messages, then a little longer."""
+    deadline = time.monotonic() + timeout
+    while len(stub.sent) < expected and time.monotonic() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.6)  # One more pass of the worker loop, so extra sends would show
+    return [message["body"] for message in stub.sent]
+
+
+def test_burst_is_coalesced_into_one_digest(clock, make_dispatcher):
+    stub = StubNotifier()
+    dispatcher = make_dispatcher(stub, digest_seconds=60, rate_per_minute=60)
+    for n in range(5):
+        assert dispatcher.notify(f"alert {n}", to=ADMIN)
+
+    # The first alert goes out at once; the rest wait for the digest window
+    assert settle(dispatcher, stub, 1) == ["alert 0"]
+
+    clock.now += 60
+    sent = settle(dispatcher, stub, 2)
+    assert len(sent) == 2
+    assert sent[1].splitlines() == ["4 alerts:", "- alert 1", "- alert 2", "- alert 3", "- alert 4"]
+    assert dispatcher.stats()["digests"] == 1 and dispatcher.stats()["coalesced"] == 4
+
+
+def test_sends_are_capped_by_the_global_rate(clock, make_dispatcher):
+    stub = StubNotifier()
+    dispatcher = make_dispatcher(stub, digest_seconds=0, rate_per_minute=6)  # One token per 10 s
+    recipients = [f"+1555000000{n}" for n in range(BURST + 2)]
+    for to in recipients:
+        dispatcher.notify("alert", to=to)
+
+    assert len(settle(dispatcher, stub, BURST)) == BURST
+    assert dispatcher.stats()["rate_limited"] >= 1
+
+    clock.now += 10
+    assert len(settle(dispatcher, stub, BURST + 1)) == BURST + 1
+    clock.now += 10
+    assert len(settle(dispatcher, stub, BURST + 2)) == BURST + 2
+    assert sorted(message["to"] for message in stub.sent) == sorted(recipients)
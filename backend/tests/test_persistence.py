@@ -0,0 +1,146 @@
+import pytest
+
+from models import persistence
+from models.persistence import SqliteSpool, WriteBehindWriter, is_permanent
+
+
+class StubError(Exception):
+    def __init__(self, message, status_code=None, code=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+class StubClient:
+    """The slice of the Supabase table API the writer uses, backed by a dict.
+
+    Like PostgREST, a bulk insert is all or nothing: one rejected row fails
+    the whole batch.
+    """
+
+    def __init__(self, reject=lambda row: False):
+        self.tables = {}
+        self.batches = []
+        self.down = False
+        self.reject = reject
+        self._pending = None
+
+    def table(self, name):
+        self._pending = name
+        return self
+
+    def insert(self, rows):
+        if self.down:
+            raise ConnectionError("backend unreachable")
+        if any(self.reject(row) for row in rows):
+            raise StubError("violates check constraint", status_code=400, code="23514")
+        self.batches.append(list(rows))
+        self.tables.setdefault(self._pending, []).extend(rows)
+        return self
+
+    def execute(self):
+        return self
+
+
+@pytest.fixture
+def make_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(persistence, "MIN_BACKOFF", 0)
+
+    def make(client, **kwargs):
+        kwargs.setdefault("spool_path", str(tmp_path / "spool.sqlite3"))
+        return WriteBehindWriter(lambda: client, **kwargs)
+    return make
+
+
+def rows(*ids):
+    return [{"id": i} for i in ids]
+
+
+def test_rows_are_inserted_in_batches(make_writer):
+    client = StubClient()
+    writer = make_writer(client, batch_size=3, flush_interval=0.05)
+    for row in rows(*range(7)):
+        assert writer.enqueue("crowd_data", row)
+    writer.close()
+
+    assert client.tables["crowd_data"] == rows(*range(7))
+    assert max(len(batch) for batch in client.batches) <= 3
+    assert writer.stats()["written"] == 7
+
+
+def test_spooled_rows_are_replayed_once_the_backend_is_back(make_writer):
+    client = StubClient()
+    writer = make_writer(client)
+    client.down = True
+    writer._flush("crowd_data", rows(1, 2))
+    writer._flush("crowd_data", rows(3))
+    assert writer.spool.size == 3
+
+    client.down = False
+    writer._replay()
+    assert client.tables["crowd_data"] == rows(1, 2, 3)
+    assert writer.spool.size == 0
+
+
+def test_rejected_row_is_dead_lettered_and_the_rest_of_its_batch_written(make_writer):
+    client = StubClient(reject=lambda row: row["id"] == 3)
+    writer = make_writer(client)
+    writer._flush("alerts", rows(1, 2, 3, 4, 5, 6))
+
+    assert client.tables["alerts"] == rows(1, 2, 4, 5, 6)
+    assert writer.dead_lettered == 1
+    assert [entry["row"] for entry in writer.spool.dead_letters()] == rows(3)
+    # A rejected row is not a connection problem: no backoff, nothing spooled
+    assert writer.failures == 0 and writer._retry_at == 0
+    writer._flush("alerts", rows(7))
+    assert client.tables["alerts"][-1] == {"id": 7}
+
+
+def test_rejected_row_does_not_block_spool_replay(make_writer):
+    client = StubClient(reject=lambda row: row["id"] == 1)
+    writer = make_writer(client)
+    client.down = True
+    writer._flush("crowd_data", rows(1, 2))
+    writer._flush("crowd_data", rows(3))
+
+    client.down = False
+    writer._replay()
+    assert client.tables["crowd_data"] == rows(2, 3)
+    assert writer.spool.size == 0
+    assert writer.dead_lettered == 1
+
+
+def test_transient_error_keeps_undelivered_rows_at_the_spool_head(make_writer):
+    client = StubClient()
+    writer = make_writer(client)
+    client.down = True
+    writer._flush("crowd_data", rows(1, 2, 3))
+    writer._replay()  # Still down: nothing leaves the spool
+
+    assert writer.spool.size == 3
+    client.down = False
+    writer._replay()
+    assert client.tables["crowd_data"] == rows(1, 2, 3)
+
+
+def test_spool_evicts_oldest_rows_beyond_its_cap(tmp_path):
+    spool = SqliteSpool(str(tmp_path / "spool.sqlite3"), max_rows=5)
+    assert spool.append("crowd_data", rows(*range(8))) == 3
+
+    table, entries = spool.peek(10)
+    assert table == "crowd_data"
+    assert [row for _, row in entries] == rows(3, 4, 5, 6, 7)
+    assert spool.size == 5
+
+
+@pytest.mark.parametrize("error, permanent", [
+    (ConnectionError("reset"), False),
+    (StubError("server error", status_code=503), False),
+    (StubError("rate limited", status_code=429), False),
+    (StubError("bad request", status_code=400), True),
+    (StubError("duplicate key", code="23505"), True),
+    (StubError("unknown column", code="PGRST204"), True),
+    (StubError("connection failure", code="08006"), False),
+])
+def test_is_permanent(error, permanent):
+    assert is_permanent(error) is permanent
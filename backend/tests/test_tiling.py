@@ -0,0 +1,70 @@
+import numpy as np
+
+from models.detector import Detections
+from models.roi import RegionOfInterest
+from models.tiling import CropPlan, Tiling, detect_parallel
+
+FRAME_SIZE = (1920, 1080)
+WHOLE_FRAME = [[0, 0], [1, 0], [1, 1], [0, 1]]
+
+
+class CountingDetector:
+    thread_safe = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def detect(self, frames, conf):
+        self.calls += 1
+        return [Detections(np.empty((0, 4)), [], []) for _ in frames]
+
+
+def detections_of(person, plan):
+    """What a detector would report for one person box in each crop of `plan`."""
+    parts = []
+    for x0, y0, x1, y1 in plan.rects:
+        box = np.asarray(person, dtype=np.float32) - [x0, y0, x0, y0]
+        seen = int(box[0] >= 0 and box[1] >= 0 and box[2] <= x1 - x0 and box[3] <= y1 - y0)
+        parts.append(Detections(box[None] if seen else np.empty((0, 4)), [0] * seen, [0.9] * seen))
+    return parts
+
+
+def test_fully_excluded_roi_merges_to_no_detections():
+    plan = CropPlan(FRAME_SIZE, RegionOfInterest(exclude=[WHOLE_FRAME]), Tiling())
+    frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+
+    assert plan.crops(frame) == []
+    assert len(plan.merge([])) == 0
+
+
+def test_empty_crop_list_skips_the_detector():
+    detector = CountingDetector()
+    assert detect_parallel(detector, [], 0.25) == []
+    assert detector.calls == 0
+
+
+def test_person_seen_by_overlapping_tiles_merges_to_one_box():
+    plan = CropPlan(FRAME_SIZE, tiling=Tiling(640, 0.2))
+    person = [880, 560, 920, 660]
+    merged = plan.merge(detections_of(person, plan))
+
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged.xyxy[0], person)
+
+
+def test_boxes_outside_the_roi_are_dropped():
+    roi = RegionOfInterest(include=[[[0, 0], [0.5, 0], [0.5, 1], [0, 1]]])
+    plan = CropPlan(FRAME_SIZE, roi)
+    merged = plan.merge(detections_of([1500, 500, 1540, 600], plan))
+
+    assert len(merged) == 0
+
+
+def test_plain_camera_keeps_the_whole_frame_path():
+    plan = CropPlan(FRAME_SIZE)
+    frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    parts = [Detections([[1, 2, 3, 4]], [0], [0.9])]
+
+    assert plan.whole
+    assert plan.crops(frame)[0] is frame
+    assert plan.merge(parts) is parts[0]
@@ -0,0 +1,67 @@
+import hashlib
+import io
+import time
+
+import pytest
+
+from models.uploads import UploadManager
+from models.video_index import VideoIndex
+
+CHUNK = 256 * 1024
+
+
+@pytest.fixture
+def manager(tmp_path):
+    index = VideoIndex(str(tmp_path / "index" / "videos.sqlite3"), str(tmp_path / "uploads"))
+    return UploadManager(index)
+
+
+def test_chunks_without_a_checksum_are_accepted(manager):
+    data = bytes(range(256)) * (CHUNK // 128)  # Two chunks
+    session = manager.create("clip.mp4", len(data), chunk_size=CHUNK)
+    for index in session["missing"]:
+        manager.write_chunk(session["id"], index, io.BytesIO(data[index * CHUNK:(index + 1) * CHUNK]))
+
+    assert manager.get(session["id"])["missing"] == []
+
+
+def test_chunk_with_a_wrong_checksum_is_rejected_and_stays_missing(manager):
+    data = b"x" * CHUNK
+    session = manager.create("clip.mp4", len(data), chunk_size=CHUNK)
+    with pytest.raises(ValueError, match="checksum"):
+        manager.write_chunk(session["id"], 0, io.BytesIO(data), hashlib.sha256(b"other").hexdigest())
+
+    assert manager.get(session["id"])["missing"] == [0]
+    manager.write_chunk(session["id"], 0, io.BytesIO(data), hashlib.sha256(data).hexdigest())
+    assert manager.get(session["id"])["missing"] == []
+
+
+def wait_until_finished(manager, upload_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    session = manager.get(upload_id)
+    while session["status"] not in ("done", "failed") and time.monotonic() < deadline:
+        time.sleep(0.02)
+        session = manager.get(upload_id)
+    return session
+
+
+@pytest.mark.parametrize("bad", [
+    pytest.param(lambda good: (b"y" * len(good), hashlib.sha256(good).hexdigest()), id="wrong-checksum"),
+    pytest.param(lambda good: (b"y" * (len(good) // 2), None), id="truncated"),
+])
+def test_bad_resend_of_a_received_chunk_keeps_the_good_bytes(manager, tmp_path, bad):
+    data = b"a" * CHUNK + b"b" * CHUNK
+    session = manager.create("clip.mp4", len(data), hashlib.sha256(data).hexdigest(), chunk_size=CHUNK)
+    for index in session["missing"]:
+        chunk = data[index * CHUNK:(index + 1) * CHUNK]
+        manager.write_chunk(session["id"], index, io.BytesIO(chunk), hashlib.sha256(chunk).hexdigest())
+
+    body, checksum = bad(data[:CHUNK])
+    with pytest.raises(ValueError):
+        manager.write_chunk(session["id"], 0, io.BytesIO(body), checksum)
+    assert manager.get(session["id"])["missing"] == []
+
+    manager.complete(session["id"])
+    session = wait_until_finished(manager, session["id"])
+    assert session["status"] == "done", session["error"]
+    assert (tmp_path / "uploads" / session["result"]).read_bytes() == data
@@ -12,13 +12,54 @@ export const listVideos = async (): Promise<string[]> => {
   return res.data.files ?? [];
 };
 
+const CHUNK_RETRIES = 3;
+
+// crypto.subtle only exists in secure contexts (https or localhost); over plain
+// http on the LAN chunks go without a checksum, which the server allows
+const sha256Hex = async (data: ArrayBuffer): Promise<string | undefined> => {
+  if (!globalThis.crypto?.subtle) return undefined;
+  const digest = await globalThis.crypto.subtle.digest("SHA-256", data);
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, "0"))
+    .join("");
+};
+
+// Chunked, resumable upload: chunks the server reports missing are (re)sent
+// with their checksum where available, so a dropped connection only costs the
+// chunk in flight
+export const uploadVideo = async (file: File): Promise<string> => {
+  let session = (await axios.post(`${BASE_URL}/videos/uploads`, { filename: file.name, size: file.size })).data;
+  const url = `${BASE_URL}/videos/uploads/${session.id}`;
+  for (let attempt = 0; session.missing.length > 0; attempt++) {
+    if (attempt > CHUNK_RETRIES) throw new Error(`Upload of ${file.name} keeps failing`);
+    for (const index of session.missing as number[]) {
+      const start = index * session.chunk_size;
+      const chunk = await file.slice(start, start + session.chunk_size).arrayBuffer();
+      const checksum = await sha256Hex(chunk);
+      await axios
+        .put(`${url}/chunks/${index}`, chunk, {
+          headers: {
+            "Content-Type": "application/octet-stream",
+            ...(checksum ? { "X-Chunk-Sha256": checksum } : {}),
+          },
+        })
+        .catch(() => undefined); // Retried from the missing list below
+    }
+    session = (await axios.get(url)).data;
+  }
+  session = (await axios.post(`${url}/complete`)).data;
+  while (session.status === "finalizing") {
+    await new Promise((resolve) => setTimeout(resolve, 1000));
+    session = (await axios.get(url)).data;
+  }
+  if (session.status !== "done") throw new Error(session.error || `Upload of ${file.name} failed`);
+  return session.result;
+};
+
 export const uploadVideos = async (files: File[]) => {
-  const form = new FormData();
-  files.forEach((f) => form.append("videos", f));
-  const res = await axios.post(`${BASE_URL}/videos/upload`, form, {
-    headers: { "Content-Type": "multipart/form-data" },
-  });
-  return res.data;
+  const saved = [];
+  for (const file of files) saved.push({ filename: await uploadVideo(file) });
+  return { status: "success", files: saved };
 };
 
 export const getStreamUrl = (filename?: string) => {